@@ -1,11 +1,15 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import surf
+from app.api.endpoints import history, metrics, surf
 
 SURF_API_PREFIX: str = "/surf"
 
 api_router = APIRouter()
 api_router.include_router(surf.router, tags=["surf"], prefix=SURF_API_PREFIX)
+api_router.include_router(metrics.router, tags=["metrics"])
+api_router.include_router(
+    history.router, tags=["history"], prefix=f"{SURF_API_PREFIX}/history"
+)
 
 ## HELLO WORLD
 
@@ -0,0 +1,95 @@
+import gzip
+import os
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it only gzip is offered
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; the framing costs more
+# than it saves.
+COMPRESS_MIN_SIZE = int(os.environ.get("SURF_COMPRESS_MIN_SIZE", 1024))
+GZIP_LEVEL = int(os.environ.get("SURF_GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.environ.get("SURF_BROTLI_QUALITY", 5))
+
+# Supported codings in order of preference when the client weighs them equally.
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Content types worth compressing. Event streams are left alone so every
+# event reaches the client as soon as it is sent.
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/plain")
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Best supported coding allowed by an Accept-Encoding header, if any."""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip()
+        if not coding:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+
+    best, best_weight = None, 0.0
+    for coding in ENCODINGS:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def coded_etag(etag: str, encoding: str) -> str:
+    """ETag of the `encoding` coded variant of a representation tagged `etag`.
+
+    Each coding is a separate representation, so it gets its own validator.
+    """
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def compressible(content_type: str) -> bool:
+    return content_type.split(";", 1)[0].strip() in COMPRESSIBLE_TYPES
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    # A fixed mtime keeps the output, and so the cached variants, stable.
+    return gzip.compress(body, GZIP_LEVEL, mtime=0)
+
+
+class StreamCompressor:
+    """Compress a body sent in chunks, flushing after every chunk.
+
+    Each chunk can be decoded as soon as it arrives, so compressed NDJSON
+    streams still deliver one day of records at a time.
+    """
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(
+                GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+            )
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
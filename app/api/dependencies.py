@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 from fastapi import HTTPException, Security
 from fastapi.security.api_key import APIKeyHeader
 
+from app.core.catalog import catalog
+
 workdir = os.getcwd()
 load_dotenv(f"{workdir}/vars.env")
 
@@ -17,3 +19,11 @@ def verify_api_key(api_key_header: str = Security(api_key_header)) -> str:
     if not is_correct:
         raise HTTPException(status_code=400, detail="API Key incorrect")
     return "verified"
+
+
+def resolve_spot(spot: str) -> str:
+    """Slug of the `spot` parameter, which also takes a spot id or name.
+
+    Unknown spots are passed through for the endpoint to report.
+    """
+    return catalog.get_spot(spot) or spot
@@ -0,0 +1,96 @@
+import logging
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api.dependencies import resolve_spot, verify_api_key
+from app.core.helpers import get_region_info
+from app.db.locations import SPOTS
+from app.db.store import snapshot_store
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+FORECAST_KINDS = ("wave", "wind", "rating", "tide")
+DAY = 24 * 60 * 60
+
+
+def _time_range(start: Optional[int], end: Optional[int]):
+    end = end if end is not None else int(time.time()) + 16 * DAY
+    start = start if start is not None else end - 30 * DAY
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end.")
+    return start, end
+
+
+def _check_store():
+    if not snapshot_store.enabled:
+        raise HTTPException(status_code=503, detail="Snapshot store is disabled.")
+
+
+@router.get("/forecast")
+async def get_forecast_history(
+    kind: str,
+    spot: str = Depends(resolve_spot),
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    run_init: Optional[int] = None,
+    verified: str = Depends(verify_api_key),
+):
+    logger.info(f"New GET /history/forecast request for {spot} {kind}")
+    _check_store()
+    if spot not in SPOTS or kind not in FORECAST_KINDS:
+        raise HTTPException(status_code=404, detail=f"No {kind} history for {spot}.")
+    start, end = _time_range(start, end)
+    intervals = await snapshot_store.get_forecast_history(
+        spot, kind, start, end, run_init
+    )
+    return {"spot": spot, "kind": kind, "intervals": intervals}
+
+
+@router.get("/runs")
+async def get_forecast_runs(
+    kind: str,
+    spot: str = Depends(resolve_spot),
+    verified: str = Depends(verify_api_key),
+):
+    _check_store()
+    if spot not in SPOTS or kind not in FORECAST_KINDS:
+        raise HTTPException(status_code=404, detail=f"No {kind} history for {spot}.")
+    runs = await snapshot_store.get_forecast_runs(spot, kind)
+    return {"spot": spot, "kind": kind, "runs": runs}
+
+
+@router.get("/conditions")
+async def get_condition_history(
+    spot: str = Depends(resolve_spot),
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    verified: str = Depends(verify_api_key),
+):
+    _check_store()
+    reg_info = get_region_info(spot)
+    if not reg_info:
+        raise HTTPException(status_code=404, detail=f"No region info for {spot}.")
+    start, end = _time_range(start, end)
+    reports = await snapshot_store.get_condition_history(
+        reg_info.region_name, start, end
+    )
+    return {"region": reg_info.region_name, "conditions": reports}
+
+
+@router.get("/buoy")
+async def get_buoy_history(
+    spot: str = Depends(resolve_spot),
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    verified: str = Depends(verify_api_key),
+):
+    _check_store()
+    reg_info = get_region_info(spot)
+    if not reg_info:
+        raise HTTPException(status_code=404, detail=f"No region info for {spot}.")
+    start, end = _time_range(start, end)
+    readings = await snapshot_store.get_buoy_history(reg_info.buoy_id, start, end)
+    return {"buoy_id": reg_info.buoy_id, "readings": readings}
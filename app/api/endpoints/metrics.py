@@ -0,0 +1,86 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.api.responses import rendered_cache
+from app.core.cache import response_cache
+from app.core.metrics import CounterFunc, Gauge, registry
+from app.core.resilience import upstream
+from app.core.shared import shared_cache
+
+router = APIRouter()
+
+CACHES = {"responses": response_cache, "rendered": rendered_cache}
+
+
+def _cache_stats(field: str):
+    return lambda: {(name,): cache.stats()[field] for name, cache in CACHES.items()}
+
+
+for field, documentation in (
+    ("hits", "Fresh cache hits."),
+    ("stale_hits", "Expired entries served while refreshing."),
+    ("misses", "Cache misses."),
+    ("evictions", "Entries evicted to stay under the size limit."),
+):
+    registry.register(
+        CounterFunc(
+            f"surf_cache_{field}_total", documentation, ("cache",), _cache_stats(field)
+        )
+    )
+registry.register(
+    Gauge(
+        "surf_cache_hit_ratio",
+        "Share of lookups answered from the cache.",
+        ("cache",),
+        _cache_stats("hit_ratio"),
+    )
+)
+registry.register(
+    Gauge(
+        "surf_cache_size", "Entries currently cached.", ("cache",), _cache_stats("size")
+    )
+)
+for field, documentation in (
+    ("hits", "Worker cache misses answered from the shared tier."),
+    ("misses", "Shared tier lookups that left this worker to fetch upstream."),
+    ("waits", "Fetches that waited for another worker holding the lease."),
+    ("wait_timeouts", "Lease waits that gave up and fetched upstream."),
+    ("errors", "Failed shared tier operations."),
+):
+    registry.register(
+        CounterFunc(
+            f"surf_shared_cache_{field}_total",
+            documentation,
+            collect=lambda field=field: {(): shared_cache.stats()[field]},
+        )
+    )
+registry.register(
+    CounterFunc(
+        "surf_upstream_retries_total",
+        "Upstream requests retried after a failure.",
+        collect=lambda: {(): upstream.retries},
+    )
+)
+registry.register(
+    CounterFunc(
+        "surf_upstream_budget_rejections_total",
+        "Upstream requests rejected because the request budget was exhausted.",
+        collect=lambda: {(): upstream.rejected},
+    )
+)
+registry.register(
+    Gauge(
+        "surf_upstream_circuit_open",
+        "1 while the circuit breaker for an upstream path is open.",
+        ("path",),
+        lambda: {
+            (name,): int(b.state == "open") for name, b in upstream.breakers.items()
+        },
+    )
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    # Rendered on the event loop thread, which is the only one updating metrics.
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
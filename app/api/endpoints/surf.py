@@ -1,28 +1,107 @@
 import logging
+import time
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse
 
-from app.api.dependencies import verify_api_key
-from app.core.helpers import get_buoy_reading, get_region_conditions, get_wind_data
+from app.api.dependencies import resolve_spot, verify_api_key
+from app.api.responses import (
+    event_stream_response,
+    ndjson_response,
+    render_cached,
+    rendered_cache,
+)
+from app.core.buoyfeed import buoy_feeds
+from app.core.cache import response_cache
+from app.core.catalog import catalog
+from app.core.helpers import (
+    get_batch_report,
+    get_buoy_reading,
+    get_full_report,
+    get_rating_data,
+    get_region_conditions,
+    get_region_info,
+    get_wave_data,
+    get_wind_data,
+    resolve_buoy,
+    stream_wave_data,
+    stream_wind_data,
+)
+from app.core.prefetch import prefetcher
+from app.core.profiling import profiler
+from app.core.resample import RESOLUTIONS
+from app.core.resilience import upstream
+from app.core.sessions import TIDE_PREFERENCES, get_best_sessions
+from app.core.shared import shared_cache
 from app.core.surfline import get_access_token
-from app.models import LatestBuoyData, WindData
+from app.core.tides import get_tide_heights
+from app.db.diskcache import disk_cache
+from app.models import (
+    BatchReport,
+    BestSessions,
+    LatestBuoyData,
+    NearbyPlace,
+    RatingForecast,
+    SpotReport,
+    TideHeights,
+    WaveForecast,
+    WindData,
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+BATCH_INCLUDES = ("conditions", "wind", "buoy")
+MAX_BATCH_SPOTS = 50
+MAX_NEAREST = 100
+MAX_FORECAST_DAYS = 16
+RESOLUTION_PATTERN = f"^({'|'.join(RESOLUTIONS)})$"
+MAX_SESSION_HOURS = 7 * 24
+MAX_SESSIONS = 100
+MAX_TIDE_POINTS = 1000
+
 
 @router.get("/rat")
-def refresh_access_token(verified: str = Depends(verify_api_key)):
-    resp = get_access_token()
+async def refresh_access_token(verified: str = Depends(verify_api_key)):
+    resp = await get_access_token()
     return "<3" if resp == 1 else "</3"
 
 
+@router.get("/cache")
+async def get_cache_stats(verified: str = Depends(verify_api_key)):
+    return {
+        "responses": response_cache.stats(),
+        "shared": shared_cache.stats(),
+        "disk": disk_cache.stats(),
+        "rendered": rendered_cache.stats(),
+        "prefetch": prefetcher.stats(),
+        "upstream": upstream.stats(),
+        "buoy_feeds": buoy_feeds.stats(),
+        "profiler": profiler.stats(),
+    }
+
+
+@router.get("/profiles/{name}", include_in_schema=False)
+async def get_profile(name: str, verified: str = Depends(verify_api_key)):
+    path = profiler.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"No profile {name}.")
+    return FileResponse(path, media_type="application/json")
+
+
 @router.get("/conditions")
-def get_conditions(
-    spot: str, days: int, now: bool = False, verified: str = Depends(verify_api_key)
+async def get_conditions(
+    request: Request,
+    spot: str = Depends(resolve_spot),
+    days: int = Query(..., ge=1, le=MAX_FORECAST_DAYS),
+    now: bool = False,
+    verified: str = Depends(verify_api_key),
 ):
     logger.info(f"New GET /conditions {spot} {days} now={now}!")
-    cond_data = get_region_conditions(spot, days, now)
+    cond_data = await render_cached(
+        request, lambda: get_region_conditions(spot, days, now)
+    )
     if not cond_data:
         raise HTTPException(
             status_code=500, detail=f"Could not load conditions for {spot}."
@@ -31,9 +110,13 @@ def get_conditions(
 
 
 @router.get("/buoy", response_model=LatestBuoyData)
-def get_current_buoy_reading(spot: str, verified: str = Depends(verify_api_key)):
+async def get_current_buoy_reading(
+    request: Request,
+    spot: str = Depends(resolve_spot),
+    verified: str = Depends(verify_api_key),
+):
     logger.info(f"New GET /buoy request for {spot}")
-    buoy_data = get_buoy_reading(spot)
+    buoy_data = await render_cached(request, lambda: get_buoy_reading(spot))
     if not buoy_data:
         raise HTTPException(
             status_code=500, detail=f"Data for buoy at {spot} not found"
@@ -41,16 +124,268 @@ def get_current_buoy_reading(spot: str, verified: str = Depends(verify_api_key))
     return buoy_data
 
 
+@router.get("/buoy/stream")
+async def stream_buoy_readings(
+    spot: Optional[str] = None,
+    buoy: Optional[str] = None,
+    verified: str = Depends(verify_api_key),
+):
+    """Server-sent `reading` events whenever the buoy reports new data.
+
+    Pass either a spot, which follows its region's buoy (or the nearest
+    online one), or a buoy id from the catalog.
+    """
+    if buoy is None and spot is not None:
+        reg_info = get_region_info(resolve_spot(spot))
+        buoy = resolve_buoy(reg_info) if reg_info else None
+    buoy_data = catalog.buoys.get(buoy) if buoy else None
+    if not buoy_data:
+        raise HTTPException(
+            status_code=404, detail=f"No buoy found for {spot or buoy}."
+        )
+
+    logger.info(f"New GET /buoy/stream subscription for {buoy}")
+    feed = buoy_feeds.get(buoy, buoy_data["latitude"], buoy_data["longitude"])
+    return event_stream_response(feed, "reading")
+
+
 @router.get("/wind", response_model=WindData)
-def get_wind(spot: str, days: int, verified: str = Depends(verify_api_key)):
+async def get_wind(
+    request: Request,
+    spot: str = Depends(resolve_spot),
+    days: int = Query(..., ge=1, le=MAX_FORECAST_DAYS),
+    resolution: Optional[str] = Query(None, regex=RESOLUTION_PATTERN),
+    verified: str = Depends(verify_api_key),
+):
     logger.info(f"New GET /wind request for {spot}")
-    if days > 1:
+    if days > 1 and resolution is None:
         raise HTTPException(
-            status_code=501, detail=f"Could not load wind data for days > 1."
+            status_code=501,
+            detail=f"Could not load hourly wind data for days > 1, pass a resolution.",
         )
-    wind_data = get_wind_data(spot, days)
+    wind_data = await render_cached(
+        request, lambda: get_wind_data(spot, days, resolution)
+    )
     if not wind_data:
         raise HTTPException(
             status_code=500, detail=f"Could not load wind data for spot {spot}."
         )
     return wind_data
+
+
+@router.get("/wave", response_model=WaveForecast)
+async def get_wave(
+    request: Request,
+    spot: str = Depends(resolve_spot),
+    days: int = Query(..., ge=1, le=MAX_FORECAST_DAYS),
+    resolution: Optional[str] = Query(None, regex=RESOLUTION_PATTERN),
+    verified: str = Depends(verify_api_key),
+):
+    logger.info(f"New GET /wave request for {spot}")
+    wave_data = await render_cached(
+        request, lambda: get_wave_data(spot, days, resolution)
+    )
+    if not wave_data:
+        raise HTTPException(
+            status_code=500, detail=f"Could not load wave data for spot {spot}."
+        )
+    return wave_data
+
+
+@router.get("/rating", response_model=RatingForecast)
+async def get_rating(
+    request: Request,
+    spot: str = Depends(resolve_spot),
+    days: int = Query(..., ge=1, le=MAX_FORECAST_DAYS),
+    resolution: Optional[str] = Query(None, regex=RESOLUTION_PATTERN),
+    verified: str = Depends(verify_api_key),
+):
+    logger.info(f"New GET /rating request for {spot}")
+    rating_data = await render_cached(
+        request, lambda: get_rating_data(spot, days, resolution)
+    )
+    if not rating_data:
+        raise HTTPException(
+            status_code=500, detail=f"Could not load rating data for spot {spot}."
+        )
+    return rating_data
+
+
+@router.get("/wind/stream")
+async def stream_wind(
+    spot: str = Depends(resolve_spot),
+    days: int = Query(..., ge=1, le=MAX_FORECAST_DAYS),
+    interval_hours: int = Query(1, ge=1, le=24),
+    verified: str = Depends(verify_api_key),
+):
+    logger.info(f"New GET /wind/stream request for {spot} days={days}")
+    chunks = await stream_wind_data(spot, days, interval_hours)
+    if chunks is None:
+        raise HTTPException(
+            status_code=500, detail=f"Could not load wind data for spot {spot}."
+        )
+    return ndjson_response(chunks)
+
+
+@router.get("/wave/stream")
+async def stream_wave(
+    spot: str = Depends(resolve_spot),
+    days: int = Query(..., ge=1, le=MAX_FORECAST_DAYS),
+    interval_hours: int = Query(1, ge=1, le=24),
+    verified: str = Depends(verify_api_key),
+):
+    logger.info(f"New GET /wave/stream request for {spot} days={days}")
+    chunks = await stream_wave_data(spot, days, interval_hours)
+    if chunks is None:
+        raise HTTPException(
+            status_code=500, detail=f"Could not load wave data for spot {spot}."
+        )
+    return ndjson_response(chunks)
+
+
+@router.get("/batch", response_model=BatchReport)
+async def get_batch(
+    request: Request,
+    spots: str,
+    include: str = ",".join(BATCH_INCLUDES),
+    days: int = Query(1, ge=1, le=MAX_FORECAST_DAYS),
+    verified: str = Depends(verify_api_key),
+):
+    spot_list = list(
+        dict.fromkeys(resolve_spot(s.strip()) for s in spots.split(",") if s.strip())
+    )
+    include_list = [i.strip() for i in include.split(",") if i.strip()]
+    logger.info(f"New GET /batch request for {spot_list} include={include_list}")
+    if not spot_list or len(spot_list) > MAX_BATCH_SPOTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Provide between 1 and {MAX_BATCH_SPOTS} spots.",
+        )
+    unknown = set(include_list) - set(BATCH_INCLUDES)
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown include values: {sorted(unknown)}."
+        )
+    return await render_cached(
+        request, lambda: get_batch_report(spot_list, include_list, days)
+    )
+
+
+@router.get("/report", response_model=SpotReport)
+async def get_report(
+    request: Request,
+    spot: str = Depends(resolve_spot),
+    days: int = Query(..., ge=1, le=MAX_FORECAST_DAYS),
+    interval_hours: int = Query(3, ge=1, le=24),
+    verified: str = Depends(verify_api_key),
+):
+    logger.info(f"New GET /report request for {spot}")
+    report = await render_cached(
+        request, lambda: get_full_report(spot, days, interval_hours)
+    )
+    if not report:
+        raise HTTPException(
+            status_code=500, detail=f"Could not load report for spot {spot}."
+        )
+    return report
+
+
+@router.get("/tide", response_model=TideHeights)
+async def get_tide_curve(
+    request: Request,
+    spot: str = Depends(resolve_spot),
+    at: Optional[str] = None,
+    hours: int = Query(24, ge=1, le=MAX_FORECAST_DAYS * 24),
+    step: int = Query(60, ge=1, le=24 * 60),
+    verified: str = Depends(verify_api_key),
+):
+    """Tide height, rate (per hour) and direction at any times.
+
+    `at` takes comma separated UTC timestamps; without it the tide is
+    given every `step` minutes for the next `hours`. Heights come from a
+    cosine curve between the forecast highs and lows.
+    """
+    logger.info(f"New GET /tide request for {spot}")
+    start = int(time.time()) // 3600 * 3600
+    if at is None:
+        timestamps = list(range(start, start + hours * 3600, step * 60))
+    else:
+        try:
+            timestamps = [int(t) for t in at.split(",") if t.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="`at` takes UTC timestamps.")
+    if not timestamps or len(timestamps) > MAX_TIDE_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ask for between 1 and {MAX_TIDE_POINTS} times.",
+        )
+    if max(timestamps) > start + MAX_FORECAST_DAYS * 24 * 3600:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tides are forecast up to {MAX_FORECAST_DAYS} days ahead.",
+        )
+    heights = await render_cached(
+        request,
+        lambda: get_tide_heights(spot, timestamps),
+        version=start if at is None else None,
+    )
+    if not heights:
+        raise HTTPException(
+            status_code=500, detail=f"Could not load tide data for spot {spot}."
+        )
+    return heights
+
+
+@router.get("/best-sessions", response_model=BestSessions)
+async def get_sessions(
+    request: Request,
+    spots: str,
+    hours: int = Query(24, ge=1, le=MAX_SESSION_HOURS),
+    top: int = Query(10, ge=1, le=MAX_SESSIONS),
+    tide: str = Query("mid", regex=f"^({'|'.join(TIDE_PREFERENCES)})$"),
+    daylight: bool = True,
+    verified: str = Depends(verify_api_key),
+):
+    """Best spot and hour windows over the next `hours`, best first.
+
+    Every hourly window of every spot is scored from surf height, swell,
+    wind, rating and tide (`tide` sets the preferred stage, `any` ignores
+    it). With `daylight`, only windows between 6:00 and 19:00 local time
+    are considered.
+    """
+    spot_list = list(
+        dict.fromkeys(resolve_spot(s.strip()) for s in spots.split(",") if s.strip())
+    )
+    logger.info(f"New GET /best-sessions request for {spot_list} hours={hours}")
+    if not spot_list or len(spot_list) > MAX_BATCH_SPOTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Provide between 1 and {MAX_BATCH_SPOTS} spots.",
+        )
+    start = int(time.time()) // 3600 * 3600
+    return await render_cached(
+        request,
+        lambda: get_best_sessions(spot_list, start, hours, top, tide, daylight),
+        version=start,
+    )
+
+
+@router.get("/spots/nearest", response_model=List[NearbyPlace])
+async def get_nearest_spots(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    n: int = Query(5, ge=1, le=MAX_NEAREST),
+    verified: str = Depends(verify_api_key),
+):
+    return catalog.nearest_spots(lat, lon, n)
+
+
+@router.get("/buoys/nearest", response_model=List[NearbyPlace])
+async def get_nearest_buoys(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    n: int = Query(5, ge=1, le=MAX_NEAREST),
+    online: bool = False,
+    verified: str = Depends(verify_api_key),
+):
+    return catalog.nearest_buoys(lat, lon, n, online_only=online)
@@ -0,0 +1,201 @@
+import time
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.compression import (
+    COMPRESS_MIN_SIZE,
+    StreamCompressor,
+    coded_etag,
+    compress,
+    compressible,
+    negotiate,
+)
+from app.api.dependencies import MAIN_API_KEY
+from app.core.metrics import http_request_seconds, http_requests, stage, stage_trace
+from app.core.profiling import profiler
+
+PROFILE_HEADER = "x-surf-profile"
+PROFILE_QUERY = "profile"
+PROFILE_FLAGS = ("1", "true", "yes")
+
+
+class MetricsMiddleware:
+    """Count requests and time them per route template.
+
+    Labels use the matched route's path (`/surf/wind`), never the raw URL,
+    so query strings and unknown paths cannot blow up label cardinality.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            http_request_seconds.observe(time.perf_counter() - start, path, method)
+            http_requests.inc(path, method, str(status))
+
+
+class CompressionMiddleware:
+    """Compress responses with the best coding the client accepts.
+
+    Responses that already carry a Content-Encoding, such as the
+    pre-compressed bodies from `render_cached`, are passed through, and so
+    are small bodies and content types outside `COMPRESSIBLE_TYPES`.
+    Streaming bodies are compressed chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, min_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        compressor: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                passthrough = (
+                    "content-encoding" in headers
+                    or not compressible(headers.get("content-type", ""))
+                    or message["status"] < 200
+                    or message["status"] in (204, 304)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                if not more_body and len(body) < self.min_size:
+                    await send(start)
+                    await send(message)
+                    passthrough = True
+                    return
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers:
+                    headers["ETag"] = coded_etag(headers["etag"], encoding)
+                if more_body:
+                    del headers["Content-Length"]
+                    compressor = StreamCompressor(encoding)
+                    body = compressor.chunk(body)
+                else:
+                    with stage("compress"):
+                        body = compress(body, encoding)
+                    headers["Content-Length"] = str(len(body))
+                await send(start)
+                start = None
+            elif compressor is not None:
+                body = compressor.chunk(body)
+                if not more_body:
+                    body += compressor.finish()
+            await send(
+                {"type": "http.response.body", "body": body, "more_body": more_body}
+            )
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class ProfilingMiddleware:
+    """Profile requests under `prefix` on demand or at the sampling rate.
+
+    A request carrying a valid API key and an `X-Surf-Profile: 1` header or
+    a `profile=1` query flag gets a Server-Timing header with its stage
+    breakdown and an X-Surf-Profile header naming the stored speedscope
+    file. Sampled requests are only stored. Requests that are not
+    profiled pass straight through.
+    """
+
+    def __init__(self, app: ASGIApp, prefix: str = "/surf"):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        requested = self._requested(scope)
+        if not requested and not profiler.sampled():
+            await self.app(scope, receive, send)
+            return
+        profile = profiler.begin(scope["path"])
+        if profile is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message):
+            if requested and message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", profile.server_timing())
+                headers["X-Surf-Profile"] = profile.name
+            await send(message)
+
+        token = stage_trace.set(profile.stages)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stage_trace.reset(token)
+            await profiler.end(profile)
+
+    @staticmethod
+    def _requested(scope: Scope) -> bool:
+        """Whether profiling was asked for, dropping the query flag from `scope`.
+
+        The flag is removed in place, so the route matched further in is
+        still seen by the outer middleware.
+        """
+        flag = Headers(scope=scope).get(PROFILE_HEADER, "").lower() in PROFILE_FLAGS
+        query = parse_qsl(scope["query_string"].decode("latin-1"), True)
+        if any(name == PROFILE_QUERY for name, _ in query):
+            # Drop the flag so the request is served (and cached) as usual.
+            flag = flag or any(
+                name == PROFILE_QUERY and value.lower() in PROFILE_FLAGS
+                for name, value in query
+            )
+            rest = [(name, value) for name, value in query if name != PROFILE_QUERY]
+            scope["query_string"] = urlencode(rest).encode("latin-1")
+        if not flag:
+            return False
+        api_key = Headers(scope=scope).get("x-api-key")
+        return MAIN_API_KEY is not None and api_key == MAIN_API_KEY
@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.api.compression import (
+    COMPRESS_MIN_SIZE,
+    ENCODINGS,
+    coded_etag,
+    compress,
+    negotiate,
+)
+from app.core.cache import CacheEntry, ResponseCache, track_reads
+from app.core.metrics import stage
+
+logger = logging.getLogger(__name__)
+
+# Seconds a rendered response body is reused for identical requests; 0 turns
+# the rendered cache off and every request is encoded again.
+RENDER_CACHE_TTL = float(os.environ.get("SURF_RENDER_CACHE_TTL", 60))
+
+rendered_cache = ResponseCache(int(os.environ.get("SURF_RENDER_CACHE_SIZE", 256)))
+
+# Seconds of silence after which an event stream sends a keep-alive comment.
+SSE_HEARTBEAT = float(os.environ.get("SURF_SSE_HEARTBEAT", 15))
+
+
+def _default(obj):
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+class FastJSONResponse(Response):
+    """JSON response encoded with orjson, passing pre-rendered bytes through."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+class Rendered:
+    """A rendered JSON body with its validator and compressed variants."""
+
+    __slots__ = ("body", "etag", "expires_at", "encoded")
+
+    def __init__(self, body: bytes, etag: str, expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+        self.encoded: Dict[str, bytes] = {}
+
+    def headers(self) -> Dict[str, str]:
+        return _cache_headers(self.etag, self.expires_at)
+
+    def response(self, accept_encoding: str) -> FastJSONResponse:
+        """The body in the best coding the client accepts, compressed once."""
+        headers = self.headers()
+        encoding = negotiate(accept_encoding)
+        if encoding is None or len(self.body) < COMPRESS_MIN_SIZE:
+            return FastJSONResponse(self.body, headers=headers)
+        body = self.encoded.get(encoding)
+        if body is None:
+            with stage("compress"):
+                body = self.encoded[encoding] = compress(self.body, encoding)
+        headers["Content-Encoding"] = encoding
+        headers["ETag"] = coded_etag(self.etag, encoding)
+        return FastJSONResponse(body, headers=headers)
+
+
+def _cache_headers(etag: str, expires_at: float) -> Dict[str, str]:
+    max_age = max(0, int(expires_at - time.time()))
+    return {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={max_age}",
+        "Vary": "Accept-Encoding",
+    }
+
+
+def _etag(parts: Any) -> str:
+    return '"%s"' % hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+
+def _matches(request: Request, etag: str) -> Optional[str]:
+    """The tag If-None-Match names for any coding of `etag`, weakly compared.
+
+    The 304 carries it back, so the client keeps the variant it has.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    if header.strip() == "*":
+        return etag
+    variants = {etag} | {coded_etag(etag, encoding) for encoding in ENCODINGS}
+    for tag in header.split(","):
+        tag = tag.strip().replace("W/", "", 1)
+        if tag in variants:
+            return tag
+    return None
+
+
+def _expires_at(reads: List[CacheEntry]) -> float:
+    if reads:
+        return min(entry.expires_at for entry in reads)
+    return time.time() + RENDER_CACHE_TTL
+
+
+async def render_cached(
+    request: Request, build: Callable[[], Awaitable[Any]], version: Any = None
+) -> Optional[Response]:
+    """Render the data built by `build` once per path and query string.
+
+    Handlers return the result directly, so data the server assembled
+    itself is encoded straight to JSON without another round of response
+    model validation. Returns None when `build` produced no data.
+
+    The ETag is derived from the request and the versions of the upstream
+    responses `build` read, so it only changes with a new model run or
+    report, and a matching If-None-Match is answered with a 304 before the
+    data is encoded. Cache-Control allows clients to reuse the response
+    until the first of those upstream responses expires. Pass `version`
+    when the data also depends on something outside the request, such as
+    the current hour; it is part of both the cache key and the ETag.
+    """
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+    if version is not None:
+        key += (version,)
+    rendered = rendered_cache.get(key) if RENDER_CACHE_TTL > 0 else None
+    if rendered is None:
+        with track_reads() as reads:
+            data = await build()
+        if not data:
+            return None
+        versions = sorted({(entry.group, entry.version) for entry in reads}, key=repr)
+        etag = _etag((key, versions)) if versions else None
+        matched = _matches(request, etag) if etag is not None else None
+        if matched is not None:
+            headers = _cache_headers(matched, _expires_at(reads))
+            return Response(status_code=304, headers=headers)
+
+        with stage("encode"):
+            body = dumps(data)
+        rendered = Rendered(body, etag or _etag(body), _expires_at(reads))
+        if RENDER_CACHE_TTL > 0:
+            rendered_cache.set(key, rendered, RENDER_CACHE_TTL)
+    else:
+        matched = _matches(request, rendered.etag)
+        if matched is not None:
+            headers = _cache_headers(matched, rendered.expires_at)
+            return Response(status_code=304, headers=headers)
+    return rendered.response(request.headers.get("accept-encoding", ""))
+
+
+def ndjson_response(chunks: AsyncIterator[List[Any]]) -> StreamingResponse:
+    """Stream each chunk of records as newline-delimited JSON.
+
+    Every chunk is encoded and sent as soon as it is produced, so only one
+    chunk of records is held in memory at a time.
+    """
+
+    async def body():
+        async for records in chunks:
+            yield b"".join(dumps(record) + b"\n" for record in records)
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+def event_stream_response(feed, event: str) -> StreamingResponse:
+    """Server-sent events for every `(id, json)` update published by `feed`.
+
+    The client is subscribed when the stream starts and unsubscribed when
+    it disconnects. Quiet periods are filled with comment lines so proxies
+    keep the connection open.
+    """
+
+    async def body():
+        queue = feed.subscribe()
+        try:
+            while True:
+                try:
+                    event_id, data = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield b"id: %d\nevent: %s\ndata: %s\n\n" % (
+                    event_id,
+                    event.encode(),
+                    data,
+                )
+        finally:
+            feed.unsubscribe(queue)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(body(), media_type="text/event-stream", headers=headers)
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Optional, Tuple
+
+from app.core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Refresh this many seconds before the token expires.
+REFRESH_MARGIN = float(os.environ.get("SURFLINE_TOKEN_REFRESH_MARGIN", 5 * 60))
+# After a failed login, wait this long before trying again.
+LOGIN_RETRY_AFTER = float(os.environ.get("SURFLINE_LOGIN_RETRY_AFTER", 30))
+
+# A login returns the new token and its lifetime in seconds, if known.
+Login = Callable[[], Awaitable[Optional[Tuple[str, Optional[float]]]]]
+
+
+class TokenManager:
+    """Hold the current upstream access token and keep it fresh.
+
+    The token is refreshed proactively `refresh_margin` seconds before it
+    expires, and on demand when a fetcher reports a 401. Concurrent
+    refreshes share one login call, and a 401 for a token that has already
+    been replaced does not trigger another login.
+    """
+
+    def __init__(
+        self,
+        login: Login,
+        token: Optional[str] = None,
+        refresh_margin: float = REFRESH_MARGIN,
+    ):
+        self._login = login
+        self.token = token
+        self.expires_at: Optional[float] = None
+        self.refresh_margin = refresh_margin
+        self._flight = SingleFlight()
+        self._last_failure = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.failures = 0
+
+    def _expiring(self) -> bool:
+        if self.expires_at is None:
+            return False
+        return self.expires_at - self.refresh_margin <= time.time()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            if self.expires_at is None:
+                delay = self.refresh_margin
+            else:
+                delay = self.expires_at - self.refresh_margin - time.time()
+            await asyncio.sleep(max(delay, 1.0))
+            if self._expiring():
+                await self.refresh()
+
+    async def get_token(self) -> Optional[str]:
+        if self.token is None or self._expiring():
+            await self.refresh()
+        return self.token
+
+    async def refresh(self, force: bool = False) -> bool:
+        """Log in again, sharing the call with concurrent refreshes.
+
+        Unless `force` is set, no login is attempted for a while after a
+        failed one, so a misconfigured login does not run on every request.
+        """
+        recently_failed = time.monotonic() - self._last_failure < LOGIN_RETRY_AFTER
+        if recently_failed and not force:
+            return False
+        return await self._flight.do("login", self._do_refresh)
+
+    async def _do_refresh(self) -> bool:
+        try:
+            result = await self._login()
+        except Exception as e:
+            logger.error("Access token refresh failed: %r", e)
+            result = None
+        if not result:
+            self.failures += 1
+            self._last_failure = time.monotonic()
+            return False
+
+        self.token, expires_in = result
+        self.expires_at = time.time() + expires_in if expires_in else None
+        self.refreshes += 1
+        logger.info("Refreshed access token (expires in %ss)", expires_in)
+        return True
+
+    async def handle_unauthorized(self, rejected: Optional[str]) -> bool:
+        """Replace a rejected token; True when a retry may succeed."""
+        if self.token != rejected:
+            return True
+        return await self.refresh()
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import os
+from http import HTTPStatus
+from typing import Dict, Optional, Set, Tuple
+
+import orjson
+
+from app.core.helpers import buoy_reading
+from app.core.surfline import get_nearby
+from app.db.diskcache import bypass_disk_cache
+
+logger = logging.getLogger(__name__)
+
+# Seconds between upstream polls of a buoy that has subscribers. Buoys report
+# every 30-60 minutes, so this only bounds how late a new reading shows up.
+BUOY_POLL_INTERVAL = float(os.environ.get("SURF_BUOY_POLL_INTERVAL", 60))
+# Updates buffered per subscriber; a slow client only ever misses old ones.
+SUBSCRIBER_BUFFER = int(os.environ.get("SURF_BUOY_SUBSCRIBER_BUFFER", 4))
+
+# Reading timestamp and the reading encoded as JSON.
+Update = Tuple[int, bytes]
+
+
+class BuoyFeed:
+    """Poll one buoy and fan new readings out to every subscriber.
+
+    A single task polls upstream while anyone is subscribed and publishes
+    only when `latestData.timestamp` changes, so upstream load depends on
+    the number of watched buoys, not on the number of clients. Each update
+    is encoded once and shared by all subscribers.
+    """
+
+    def __init__(
+        self,
+        buoy_id: str,
+        latitude: float,
+        longitude: float,
+        interval: float = BUOY_POLL_INTERVAL,
+    ):
+        self.buoy_id = buoy_id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.interval = interval
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.latest: Optional[Update] = None
+        self._task: Optional[asyncio.Task] = None
+        self.polls = 0
+        self.updates = 0
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_BUFFER)
+        if self.latest is not None:
+            queue.put_nowait(self.latest)
+        self.subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _publish(self, update: Update):
+        self.latest = update
+        self.updates += 1
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(update)
+
+    async def poll(self):
+        self.polls += 1
+        # Skip both caches: a stored nearby response can be minutes old.
+        with bypass_disk_cache():
+            status, nearby = await get_nearby.uncached(self.latitude, self.longitude)
+        if status != HTTPStatus.OK:
+            logger.warning("Polling buoy %s failed with %s", self.buoy_id, status)
+            return
+
+        buoy = next((b for b in nearby.data if b.id == self.buoy_id), None)
+        if buoy is None:
+            logger.warning("Buoy %s missing from nearby response", self.buoy_id)
+            return
+
+        timestamp = buoy.latestData.timestamp
+        if self.latest is None or timestamp != self.latest[0]:
+            reading = buoy_reading(buoy).dict()
+            reading["buoy_id"] = buoy.id
+            reading["timestamp"] = timestamp
+            self._publish((timestamp, orjson.dumps(reading)))
+
+    async def _run(self):
+        # Polls until a check finds nobody subscribed, so a client that
+        # reconnects within one interval does not restart the poller.
+        while self.subscribers:
+            try:
+                await self.poll()
+            except Exception:
+                logger.exception("Polling buoy %s failed", self.buoy_id)
+            await asyncio.sleep(self.interval)
+
+
+class BuoyFeeds:
+    """One `BuoyFeed` per buoy id, created on first subscription."""
+
+    def __init__(self, interval: float = BUOY_POLL_INTERVAL):
+        self.interval = interval
+        self.feeds: Dict[str, BuoyFeed] = {}
+
+    def get(self, buoy_id: str, latitude: float, longitude: float) -> BuoyFeed:
+        feed = self.feeds.get(buoy_id)
+        if feed is None:
+            feed = BuoyFeed(buoy_id, latitude, longitude, self.interval)
+            self.feeds[buoy_id] = feed
+        return feed
+
+    async def stop(self):
+        for feed in self.feeds.values():
+            await feed.stop()
+
+    def stats(self) -> dict:
+        return {
+            buoy_id: {
+                "subscribers": len(feed.subscribers),
+                "polls": feed.polls,
+                "updates": feed.updates,
+            }
+            for buoy_id, feed in self.feeds.items()
+        }
+
+
+buoy_feeds = BuoyFeeds()
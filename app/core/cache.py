@@ -0,0 +1,395 @@
+import asyncio
+import inspect
+import logging
+import os
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from http import HTTPStatus
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
+
+import orjson
+from pydantic import BaseModel
+
+from app.core.decoding import decode
+from app.core.shared import Shared, shared_cache
+from app.core.singleflight import SingleFlight
+from app.db.diskcache import bypass_disk_cache, disk_hit_expiry
+
+logger = logging.getLogger(__name__)
+
+# Seconds each upstream data type stays fresh when no model run information
+# is available. Overridable per type with SURFLINE_CACHE_TTL_<KIND>.
+DEFAULT_TTLS = {
+    "conditions": 30 * 60,
+    "wave": 60 * 60,
+    "rating": 60 * 60,
+    "wind": 60 * 60,
+    "tide": 6 * 60 * 60,
+    "nearby": 5 * 60,
+}
+
+# Surfline publishes a new model run every 6 hours; the data for a run shows
+# up some time after its runInitializationTimestamp.
+RUN_INTERVAL = int(os.environ.get("SURFLINE_RUN_INTERVAL", 6 * 60 * 60))
+RUN_PUBLISH_DELAY = int(os.environ.get("SURFLINE_RUN_PUBLISH_DELAY", 4 * 60 * 60))
+
+
+def get_ttl(kind: str) -> int:
+    return int(os.environ.get(f"SURFLINE_CACHE_TTL_{kind.upper()}", DEFAULT_TTLS[kind]))
+
+
+def get_run_init(data) -> Optional[int]:
+    associated = getattr(data, "associated", None)
+    return getattr(associated, "runInitializationTimestamp", None)
+
+
+def get_version(data) -> Optional[int]:
+    """Upstream timestamp that changes whenever the content of `data` does.
+
+    Forecasts carry the model run they were computed from; conditions and
+    buoy responses are versioned by their latest report or reading.
+    """
+    run_init = get_run_init(data)
+    if run_init is not None:
+        return run_init
+    payload = getattr(data, "data", None)
+    if isinstance(payload, list):
+        return max((buoy.latestData.timestamp for buoy in payload), default=None)
+    conditions = getattr(payload, "conditions", None)
+    if conditions:
+        return max(max(c.timestamp, c.am.timestamp, c.pm.timestamp) for c in conditions)
+    return None
+
+
+class CacheEntry:
+    __slots__ = (
+        "value",
+        "expires_at",
+        "stale_until",
+        "group",
+        "run_init",
+        "refresh",
+        "version",
+    )
+
+    def __init__(
+        self,
+        value,
+        expires_at: float,
+        stale_until: float,
+        group: Hashable,
+        run_init,
+        refresh: Optional[Callable[[], Awaitable]],
+        version: Hashable,
+    ):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.group = group
+        self.run_init = run_init
+        self.refresh = refresh
+        self.version = version
+
+    def is_fresh(self, now: float) -> bool:
+        return self.expires_at > now
+
+
+class ResponseCache:
+    """Bounded LRU cache of parsed upstream responses with per-entry expiry.
+
+    Entries stay usable for `stale_grace` seconds after they expire, so a
+    caller can serve them while a refresh is in flight. With
+    `track_popularity`, lookups are counted per key in `popularity`, which
+    the prefetch scheduler uses to pick entries to refresh ahead of time.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 512,
+        stale_grace: float = 0,
+        track_popularity: bool = False,
+    ):
+        self.max_size = max_size
+        self.stale_grace = stale_grace
+        self.track_popularity = track_popularity
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self.popularity: Counter = Counter()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def peek(self, key: Hashable) -> Optional[CacheEntry]:
+        """Entry for `key`, fresh or stale, without counting a lookup."""
+        return self._entries.get(key)
+
+    def lookup(self, key: Hashable) -> Optional[CacheEntry]:
+        """Count a lookup and return the entry if it is fresh or still usable."""
+        if self.track_popularity:
+            self.popularity[key] += 1
+        entry = self._entries.get(key)
+        now = time.time()
+        if entry is not None and entry.stale_until <= now:
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        if entry.is_fresh(now):
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return entry
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self.lookup(key)
+        if entry is None or not entry.is_fresh(time.time()):
+            return None
+        return entry.value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: float,
+        group: Hashable = None,
+        run_init: Optional[int] = None,
+        refresh: Optional[Callable[[], Awaitable]] = None,
+        version: Optional[Hashable] = None,
+    ):
+        """Store `value` for `ttl` seconds.
+
+        `version` identifies the content for conditional requests; entries
+        without one are versioned by the time they were stored.
+        """
+        now = time.time()
+        expires_at = now + ttl
+        if run_init is not None:
+            self._invalidate_older_runs(group, run_init)
+            next_run_at = run_init + RUN_INTERVAL + RUN_PUBLISH_DELAY
+            if next_run_at > now:
+                expires_at = min(expires_at, next_run_at)
+
+        stale_until = expires_at + self.stale_grace
+        if version is None:
+            version = now
+        entry = CacheEntry(
+            value, expires_at, stale_until, group, run_init, refresh, version
+        )
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            self.popularity.pop(evicted, None)
+            self.evictions += 1
+
+    def _invalidate_older_runs(self, group: Hashable, run_init: int):
+        stale = [
+            key
+            for key, entry in self._entries.items()
+            if entry.group == group
+            and entry.run_init is not None
+            and entry.run_init < run_init
+        ]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+
+    def decay_popularity(self, factor: float):
+        """Scale lookup counts down so popularity follows recent traffic."""
+        for key, count in list(self.popularity.items()):
+            count *= factor
+            if count < 0.5 or key not in self._entries:
+                del self.popularity[key]
+            else:
+                self.popularity[key] = count
+
+    def clear(self):
+        self._entries.clear()
+        self.popularity.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+response_cache = ResponseCache(
+    int(os.environ.get("SURFLINE_CACHE_SIZE", 512)),
+    stale_grace=float(os.environ.get("SURFLINE_CACHE_STALE_GRACE", 10 * 60)),
+    track_popularity=True,
+)
+inflight = SingleFlight()
+_background: Set[asyncio.Task] = set()
+
+# Entries read by cached fetches in the current request, see `track_reads`.
+_reads: ContextVar[Optional[List[CacheEntry]]] = ContextVar("reads", default=None)
+
+
+@contextmanager
+def track_reads():
+    """Collect the cache entry behind every cached fetch made in the block.
+
+    Responses use the entries' versions and expiry times as validators and
+    freshness lifetime. Tasks started inside the block share the list.
+    """
+    reads: List[CacheEntry] = []
+    token = _reads.set(reads)
+    try:
+        yield reads
+    finally:
+        _reads.reset(token)
+
+
+def _record_read(entry: Optional[CacheEntry]):
+    reads = _reads.get()
+    if reads is not None and entry is not None:
+        reads.append(entry)
+
+
+def _log_refresh_failure(task: asyncio.Task):
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Background refresh failed: %r", task.exception())
+
+
+async def _refetch(fetch: Callable[[], Awaitable]):
+    # The disk cache only holds copies of what is being refreshed.
+    with bypass_disk_cache():
+        return await fetch()
+
+
+async def refresh(key: Hashable):
+    """Re-fetch a cached entry now, sharing any fetch already in flight."""
+    entry = response_cache.peek(key)
+    if entry is None or entry.refresh is None:
+        return None
+    return await inflight.do(key, lambda: _refetch(entry.refresh))
+
+
+def refresh_in_background(key: Hashable, fetch: Callable[[], Awaitable]):
+    task = asyncio.ensure_future(inflight.do(key, lambda: _refetch(fetch)))
+    _background.add(task)
+    task.add_done_callback(_log_refresh_failure)
+
+
+def cached(kind: str, model: Optional[Type[BaseModel]] = None):
+    """Cache successful `(status, data)` results of an async Surfline fetcher.
+
+    Entries are keyed on the data type and every bound argument of the call
+    (spot or region, days, interval hours, ...). A response from a newer
+    model run drops entries of the same type and location from older runs.
+    Concurrent misses for the same key share a single upstream request, and
+    an expired entry inside the stale grace period is served while it is
+    refreshed in the background.
+
+    With a response `model` and the shared tier enabled, misses are first
+    looked up in `shared_cache`, and only the worker holding a key's lease
+    fetches it upstream, so other workers reuse its response.
+    """
+
+    def decorator(fetcher):
+        signature = inspect.signature(fetcher)
+
+        @wraps(fetcher)
+        async def wrapper(*args, **kwargs) -> Tuple[HTTPStatus, Any]:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (kind,) + tuple(bound.arguments.values())
+            group = key[:2]
+
+            async def fetch_upstream():
+                token = disk_hit_expiry.set(None)
+                try:
+                    status, data = await fetcher(*args, **kwargs)
+                    expires_at = disk_hit_expiry.get()
+                finally:
+                    disk_hit_expiry.reset(token)
+                if status == HTTPStatus.OK and data is not None:
+                    run_init = get_run_init(data)
+                    if expires_at is None:
+                        ttl = get_ttl(kind)
+                    else:
+                        ttl = expires_at - time.time()
+                    version = get_version(data)
+                    response_cache.set(key, data, ttl, group, run_init, fetch, version)
+                return status, data
+
+            async def fetch_shared():
+                # A refresh must not be answered with the copy it replaces.
+                current = response_cache.peek(key)
+                newer_than = current.expires_at if current is not None else None
+                entry = await shared_cache.get_or_lease(key, newer_than)
+                if entry is not None:
+                    data = decode(orjson.loads(entry.body), model, mode="fast")
+                    ttl = entry.expires_at - time.time()
+                    response_cache.set(
+                        key, data, ttl, group, entry.run_init, fetch, entry.version
+                    )
+                    return HTTPStatus.OK, data
+
+                try:
+                    status, data = await fetch_upstream()
+                    cached_entry = response_cache.peek(key)
+                    if status == HTTPStatus.OK and cached_entry is not None:
+                        await shared_cache.set(
+                            key,
+                            Shared(
+                                orjson.dumps(data.dict()),
+                                cached_entry.expires_at,
+                                cached_entry.run_init,
+                                cached_entry.version,
+                            ),
+                        )
+                    return status, data
+                finally:
+                    await shared_cache.release(key)
+
+            async def fetch():
+                if model is not None and shared_cache.enabled:
+                    return await fetch_shared()
+                return await fetch_upstream()
+
+            entry = response_cache.lookup(key)
+            if entry is not None:
+                if not entry.is_fresh(time.time()):
+                    refresh_in_background(key, fetch)
+                _record_read(entry)
+                return HTTPStatus.OK, entry.value
+
+            status, data = await inflight.do(key, fetch)
+            if status == HTTPStatus.OK and data is not None:
+                _record_read(response_cache.peek(key))
+            return status, data
+
+        wrapper.uncached = fetcher
+        return wrapper
+
+    return decorator
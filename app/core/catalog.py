@@ -0,0 +1,142 @@
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.spatial import KDTree, chord_to_km, to_unit_vectors
+from app.db.locations import BUOYS, REGIONS, SPOTS
+from app.models import NearbyResponse
+
+logger = logging.getLogger(__name__)
+
+
+def _located(entries: Dict[str, dict]) -> List[str]:
+    return [
+        key
+        for key, data in entries.items()
+        if isinstance(data, dict)
+        and data.get("latitude") is not None
+        and data.get("longitude") is not None
+    ]
+
+
+def _tree(entries: Dict[str, dict], keys: List[str]) -> KDTree:
+    return KDTree(
+        to_unit_vectors(
+            [entries[key]["latitude"] for key in keys],
+            [entries[key]["longitude"] for key in keys],
+        )
+    )
+
+
+class Catalog:
+    """Indexed registry of spots, regions and buoys.
+
+    Spots are looked up by slug, Surfline spot id or name, and spots and
+    buoys can be searched by distance through k-d trees, so "what is near
+    here" never needs an upstream call. Buoys seen in `get_nearby`
+    responses are added to the registry with their latest status, which
+    keeps the online-only search current.
+    """
+
+    def __init__(self, regions: dict, spots: dict, buoys: dict):
+        self.regions = regions
+        self.spots = spots
+        self.buoys = buoys
+        self._spot_aliases: Dict[str, str] = {}
+        for slug, data in spots.items():
+            self._spot_aliases[slug.lower()] = slug
+            self._spot_aliases[data["spot_id"].lower()] = slug
+            self._spot_aliases.setdefault(data["name"].lower(), slug)
+
+        self._spot_keys = _located(spots)
+        self._spot_tree = _tree(spots, self._spot_keys)
+        self._buoy_tree: Optional[KDTree] = None
+        self._buoy_keys: List[str] = []
+        self._buoy_online = np.empty(0, dtype=bool)
+
+    def get_spot(self, key: str) -> Optional[str]:
+        """Slug of the spot with slug, spot id or name `key`."""
+        return self._spot_aliases.get(key.strip().lower())
+
+    def _ensure_buoy_index(self):
+        if self._buoy_tree is None:
+            self._buoy_keys = _located(self.buoys)
+            self._buoy_tree = _tree(self.buoys, self._buoy_keys)
+            self._refresh_buoy_status()
+
+    def _refresh_buoy_status(self):
+        self._buoy_online = np.array(
+            [self.buoys[key].get("status") == "ONLINE" for key in self._buoy_keys],
+            dtype=bool,
+        )
+
+    def nearest_spots(self, latitude: float, longitude: float, n: int = 5) -> list:
+        point = to_unit_vectors([latitude], [longitude])[0]
+        chords, rows = self._spot_tree.query(point, n)
+        results = []
+        for row, km in zip(rows.tolist(), chord_to_km(chords).tolist()):
+            slug = self._spot_keys[row]
+            spot = self.spots[slug]
+            results.append(
+                {
+                    "id": slug,
+                    "name": spot["name"],
+                    "latitude": spot["latitude"],
+                    "longitude": spot["longitude"],
+                    "region": spot.get("region"),
+                    "distance_km": km,
+                }
+            )
+        return results
+
+    def nearest_buoys(
+        self,
+        latitude: float,
+        longitude: float,
+        n: int = 5,
+        online_only: bool = False,
+    ) -> list:
+        self._ensure_buoy_index()
+        point = to_unit_vectors([latitude], [longitude])[0]
+        allowed = self._buoy_online if online_only else None
+        chords, rows = self._buoy_tree.query(point, n, allowed)
+        results = []
+        for row, km in zip(rows.tolist(), chord_to_km(chords).tolist()):
+            buoy_id = self._buoy_keys[row]
+            buoy = self.buoys[buoy_id]
+            results.append(
+                {
+                    "id": buoy_id,
+                    "name": buoy.get("name"),
+                    "latitude": buoy["latitude"],
+                    "longitude": buoy["longitude"],
+                    "status": buoy.get("status"),
+                    "distance_km": km,
+                }
+            )
+        return results
+
+    def observe_buoys(self, response: NearbyResponse):
+        """Record buoys and their status from an upstream nearby response."""
+        added = False
+        for buoy in response.data:
+            known = self.buoys.get(buoy.id)
+            if known is None:
+                self.buoys[buoy.id] = known = {}
+                added = True
+            known.update(
+                name=buoy.name,
+                source_id=buoy.sourceId,
+                latitude=buoy.latitude,
+                longitude=buoy.longitude,
+                timezone=buoy.abbrTimezone,
+                status=buoy.status,
+            )
+        if added:
+            self._buoy_tree = None
+        elif self._buoy_tree is not None:
+            self._refresh_buoy_status()
+
+
+catalog = Catalog(REGIONS, SPOTS, BUOYS)
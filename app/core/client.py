@@ -0,0 +1,51 @@
+import logging
+import os
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    pool_size = int(os.environ.get("SURFLINE_POOL_SIZE", 20))
+    keepalive = int(os.environ.get("SURFLINE_KEEPALIVE_CONNECTIONS", pool_size))
+    keepalive_expiry = float(os.environ.get("SURFLINE_KEEPALIVE_EXPIRY", 30.0))
+    timeout = httpx.Timeout(
+        connect=float(os.environ.get("SURFLINE_CONNECT_TIMEOUT", 3.0)),
+        read=float(os.environ.get("SURFLINE_READ_TIMEOUT", 10.0)),
+        write=float(os.environ.get("SURFLINE_WRITE_TIMEOUT", 10.0)),
+        pool=float(os.environ.get("SURFLINE_POOL_TIMEOUT", 5.0)),
+    )
+    limits = httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=keepalive,
+        keepalive_expiry=keepalive_expiry,
+    )
+    logger.info("Opening Surfline client (pool=%s, timeout=%s)", pool_size, timeout)
+    return httpx.AsyncClient(timeout=timeout, limits=limits)
+
+
+async def open_client() -> httpx.AsyncClient:
+    """Open the process-wide Surfline connection pool."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily outside the app lifespan."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
@@ -0,0 +1,118 @@
+import logging
+import os
+from datetime import date
+from typing import Any, Dict, List, Tuple, Type
+
+import orjson
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON
+
+logger = logging.getLogger(__name__)
+
+# "validate" runs full pydantic validation on every upstream payload, "fast"
+# trusts the upstream schema and builds models directly from the decoded JSON.
+DECODE_MODES = ("validate", "fast")
+DECODE_MODE = os.environ.get("SURFLINE_DECODE_MODE", "validate")
+
+if DECODE_MODE not in DECODE_MODES:
+    raise ValueError(f"SURFLINE_DECODE_MODE must be one of {DECODE_MODES}")
+
+_MODEL, _MODEL_LIST, _SCALAR = range(3)
+
+# Field name, JSON key, kind, target type, required, default
+Plan = List[Tuple[str, str, int, Any, bool, Any]]
+
+_plans: Dict[Type[BaseModel], Plan] = {}
+
+
+def loads(content: bytes) -> Any:
+    return orjson.loads(content)
+
+
+def _coerce(value, type_):
+    # The lossless subset of pydantic's coercions that upstream payloads hit.
+    if type_ is float and type(value) is int:
+        return float(value)
+    if type_ is int and type(value) is float:
+        return int(value)
+    if type_ is str and not isinstance(value, str):
+        return str(value)
+    if type_ is date and isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+def _plan(model: Type[BaseModel]) -> Plan:
+    plan = _plans.get(model)
+    if plan is None:
+        plan = []
+        for name, field in model.__fields__.items():
+            is_model = isinstance(field.type_, type) and issubclass(
+                field.type_, BaseModel
+            )
+            if is_model and field.shape == SHAPE_LIST:
+                kind = _MODEL_LIST
+            elif is_model and field.shape == SHAPE_SINGLETON:
+                kind = _MODEL
+            else:
+                kind = _SCALAR
+            plan.append(
+                (
+                    name,
+                    field.alias,
+                    kind,
+                    field.type_,
+                    field.required,
+                    field.get_default(),
+                )
+            )
+        _plans[model] = plan
+    return plan
+
+
+def construct(model: Type[BaseModel], data: dict) -> BaseModel:
+    """Build `model` from trusted JSON data without running validators.
+
+    Nested models and lists of models are built recursively, unknown keys
+    are dropped and missing optional fields get their defaults, matching
+    what `parse_obj` produces for well-formed upstream payloads.
+    """
+    values = {}
+    fields_set = set()
+    for name, key, kind, type_, required, default in _plan(model):
+        if key not in data:
+            if required:
+                raise KeyError(key)
+            values[name] = default
+            continue
+        fields_set.add(name)
+        value = data[key]
+        if value is None:
+            values[name] = None
+        elif kind == _MODEL:
+            values[name] = construct(type_, value)
+        elif kind == _MODEL_LIST:
+            values[name] = [construct(type_, v) for v in value]
+        else:
+            values[name] = _coerce(value, type_)
+
+    m = model.__new__(model)
+    object.__setattr__(m, "__dict__", values)
+    object.__setattr__(m, "__fields_set__", fields_set)
+    m._init_private_attributes()
+    return m
+
+
+def decode(data: dict, model: Type[BaseModel], mode: str = None) -> BaseModel:
+    """Turn decoded upstream JSON into `model` using the configured mode.
+
+    The fast path falls back to full validation when the payload does not
+    have the expected shape, so malformed data still raises a validation
+    error.
+    """
+    if (mode or DECODE_MODE) == "fast":
+        try:
+            return construct(model, data)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            logger.warning("Fast decode of %s failed: %r", model.__name__, e)
+    return model.parse_obj(data)
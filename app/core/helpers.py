@@ -1,9 +1,23 @@
+import asyncio
 import logging
 from datetime import datetime
 from http import HTTPStatus
-from typing import List, Optional
-from zoneinfo import ZoneInfo
-
+from typing import AsyncIterator, List, Optional
+
+import numpy as np
+
+from app.core.catalog import catalog
+from app.core.metrics import timed
+from app.core.resample import resample_rating, resample_wave, resample_wind
+from app.core.series import (
+    RatingSeries,
+    Series,
+    WaveSeries,
+    WindSeries,
+    align,
+    get_series,
+    nullable,
+)
 from app.core.surfline import (
     get_conditions,
     get_nearby,
@@ -12,16 +26,20 @@ from app.core.surfline import (
     get_wave,
     get_wind,
 )
+from app.core.tides import TideCurve, get_tide_curve
+from app.core.timeconv import local_datetimes, to_local
 from app.db.locations import REGIONS, SPOTS
 from app.models import (
+    Buoy,
+    ConditionsResponse,
     LatestBuoyData,
-    RatingInterval,
+    NearbyResponse,
+    RatingForecast,
     RegionalReport,
     RegionInfo,
-    TideInterval,
-    WaveInterval,
-    WindInterval,
+    WaveForecast,
     WindData,
+    WindResponse,
 )
 
 logger = logging.getLogger(__name__)
@@ -31,8 +49,8 @@ DAYS = 3
 INTERVAL_HOURS = 4
 
 
-def print_conditions(region="oahu_south_shore", days=10):
-    status, data = get_conditions(region=region, days=days)
+async def print_conditions(region="oahu_south_shore", days=10):
+    status, data = await get_conditions(region=region, days=days)
     if status != HTTPStatus.OK:
         print(f"Error when getting data for `{region}`")
 
@@ -44,8 +62,8 @@ def print_conditions(region="oahu_south_shore", days=10):
         print(f"PM: {day.pm.rating}; {day.pm.humanRelation}; {day.pm.observation}")
 
 
-def print_wave(spot=SPOT, days=DAYS, interval_hours=INTERVAL_HOURS):
-    status, data = get_wave(spot=spot, days=days, interval_hours=interval_hours)
+async def print_wave(spot=SPOT, days=DAYS, interval_hours=INTERVAL_HOURS):
+    status, data = await get_wave(spot=spot, days=days, interval_hours=interval_hours)
     if status != HTTPStatus.OK:
         print(f"Error when getting wave data for `{spot}`")
 
@@ -58,8 +76,8 @@ def print_wave(spot=SPOT, days=DAYS, interval_hours=INTERVAL_HOURS):
             print(f"{swell}")
 
 
-def print_rating(spot=SPOT, days=DAYS, interval_hours=INTERVAL_HOURS):
-    status, data = get_rating(spot=spot, days=days, interval_hours=interval_hours)
+async def print_rating(spot=SPOT, days=DAYS, interval_hours=INTERVAL_HOURS):
+    status, data = await get_rating(spot=spot, days=days, interval_hours=interval_hours)
     if status != HTTPStatus.OK:
         print(f"Error when getting wave data for `{spot}`")
 
@@ -70,8 +88,8 @@ def print_rating(spot=SPOT, days=DAYS, interval_hours=INTERVAL_HOURS):
         print(interval.rating)
 
 
-def print_wind(spot=SPOT, days=DAYS, interval_hours=INTERVAL_HOURS):
-    status, data = get_wind(spot=spot, days=days, interval_hours=interval_hours)
+async def print_wind(spot=SPOT, days=DAYS, interval_hours=INTERVAL_HOURS):
+    status, data = await get_wind(spot=spot, days=days, interval_hours=interval_hours)
     if status != HTTPStatus.OK:
         print(f"Error when getting wave data for `{spot}`")
 
@@ -82,8 +100,8 @@ def print_wind(spot=SPOT, days=DAYS, interval_hours=INTERVAL_HOURS):
         print(interval.speed, interval.direction, interval.directionType)
 
 
-def print_tide(spot=SPOT, days=DAYS):
-    status, data = get_tide(spot=spot, days=days)
+async def print_tide(spot=SPOT, days=DAYS):
+    status, data = await get_tide(spot=spot, days=days)
     if status != HTTPStatus.OK:
         print(f"Error when getting wave data for `{spot}`")
 
@@ -94,55 +112,6 @@ def print_tide(spot=SPOT, days=DAYS):
         print(interval.height, interval.type)
 
 
-def get_wave_data_intervals(intervals: List[WaveInterval]) -> dict:
-    out = {}
-    for i in intervals:
-        dt_object = datetime.fromtimestamp(i.timestamp)
-        dt_key = dt_object.strftime("%m/%d/%Y %H:%M:%S")
-        out[dt_key] = {
-            "surf": i.surf,
-            "swells": i.swells,
-        }
-    return out
-
-
-def get_wind_data_intervals(intervals: List[WindInterval]) -> dict:
-    out = {}
-    for i in intervals:
-        dt_object = datetime.fromtimestamp(i.timestamp)
-        dt_key = dt_object.strftime("%m/%d/%Y %H:%M:%S")
-        out[dt_key] = {
-            "speed": i.speed,
-            "direction": i.direction,
-            "direction_type": i.directionType,
-            "optimal_score": i.optimalScore,
-        }
-    return out
-
-
-def get_rating_data_intervals(intervals: List[RatingInterval]) -> dict:
-    out = {}
-    for i in intervals:
-        dt_object = datetime.fromtimestamp(i.timestamp)
-        dt_key = dt_object.strftime("%m/%d/%Y %H:%M:%S")
-        out[dt_key] = {
-            "rating": i.rating,
-        }
-    return out
-
-
-def get_full_report(spot, days):
-    status, wave_data = get_wave(spot, days, interval_hours=3)
-    status, wind_data = get_wind(spot, days, interval_hours=3)
-    # status, rating_data = get_rating(spot, days, interval_hours=3)
-    # status, tide_data = get_tide(spot, days)
-    wave_intervals = get_wave_data_intervals(wave_data.data.wave)
-    wind_intervals = get_wind_data_intervals(wind_data.data.wind)
-    # rating_intervals = get_rating_data_intervals(rating_data.data.rating)
-    # wave_intervals.update(rating_intervals)
-    return wave_intervals, wave_data.associated.units
-
-
 def get_region_info(spot: str) -> Optional[RegionInfo]:
     spot_data = SPOTS.get(spot)
     if not spot_data:
@@ -150,62 +119,117 @@ def get_region_info(spot: str) -> Optional[RegionInfo]:
 
     region = spot_data["region"]
     region_data = REGIONS.get(region)
-    if not region_data:
+    if not isinstance(region_data, dict):
         return None
 
-    region_data["region_name"] = region
-    return RegionInfo.parse_obj(region_data)
+    return RegionInfo.parse_obj({**region_data, "region_name": region})
 
 
+@timed("local_buoy_datetime")
 def get_local_buoy_datetime(timestamp: int, timezone: str) -> datetime:
-    utc = ZoneInfo("UTC")
-    utc_dt = datetime.fromtimestamp(timestamp).replace(tzinfo=utc)
-    local_tz = ZoneInfo(timezone)
-    return utc_dt.astimezone(local_tz)
+    return to_local(timestamp, timezone)
 
 
-def get_buoy_reading(spot: str) -> Optional[LatestBuoyData]:
+async def get_buoy_reading(spot: str) -> Optional[LatestBuoyData]:
     reg_info = get_region_info(spot)
     if not reg_info:
         logger.warning("Did not find region info for %s", spot)
         return None
 
-    status, nearby_data = get_nearby(reg_info.latitude, reg_info.longitude)
+    status, nearby_data = await get_nearby(reg_info.latitude, reg_info.longitude)
     if status != HTTPStatus.OK:
         return None
 
-    spot_buoy = next((b for b in nearby_data.data if b.id == reg_info.buoy_id), None)
+    return build_buoy_reading(reg_info, nearby_data)
+
+
+def pick_buoy(reg_info: RegionInfo, nearby_data: NearbyResponse) -> Optional[Buoy]:
+    """The region's own buoy, or the nearest online one when it is unavailable."""
+    buoys = {b.id: b for b in nearby_data.data}
+    preferred = buoys.get(reg_info.buoy_id) if reg_info.buoy_id else None
+    if preferred is not None and preferred.status == "ONLINE":
+        return preferred
+
+    candidates = catalog.nearest_buoys(
+        reg_info.latitude, reg_info.longitude, n=len(buoys), online_only=True
+    )
+    for candidate in candidates:
+        if candidate["id"] in buoys:
+            if reg_info.buoy_id:
+                logger.info(
+                    "Buoy %s unavailable, using %s",
+                    reg_info.buoy_id,
+                    candidate["id"],
+                )
+            return buoys[candidate["id"]]
+    return preferred
+
+
+def resolve_buoy(reg_info: RegionInfo) -> Optional[str]:
+    """Id of the region's buoy, or of the nearest online one if it is not usable."""
+    known = catalog.buoys.get(reg_info.buoy_id) if reg_info.buoy_id else None
+    if known is not None and known.get("status") != "OFFLINE":
+        return reg_info.buoy_id
+
+    nearest = catalog.nearest_buoys(
+        reg_info.latitude, reg_info.longitude, n=1, online_only=True
+    )
+    return nearest[0]["id"] if nearest else reg_info.buoy_id
+
+
+@timed("build_buoy_reading")
+def build_buoy_reading(
+    reg_info: RegionInfo, nearby_data: NearbyResponse
+) -> Optional[LatestBuoyData]:
+    spot_buoy = pick_buoy(reg_info, nearby_data)
+    if not spot_buoy:
+        logger.warning("No buoy found near %s", reg_info.region_name)
+        return None
     if spot_buoy.status != "ONLINE":
         logger.warning("Buoy %s is not online", spot_buoy.id)
 
+    return buoy_reading(spot_buoy)
+
+
+def buoy_reading(buoy: Buoy) -> LatestBuoyData:
     local_buoy_datetime = get_local_buoy_datetime(
-        spot_buoy.latestData.timestamp, spot_buoy.abbrTimezone
+        buoy.latestData.timestamp, buoy.abbrTimezone
     )
     data = {
-        "name": spot_buoy.name,
-        "source_id": spot_buoy.sourceId,
+        "name": buoy.name,
+        "source_id": buoy.sourceId,
         "buoy_local_datetime": local_buoy_datetime,
-        "wave_height": spot_buoy.latestData.height,
-        "wave_period": spot_buoy.latestData.period,
-        "swells": spot_buoy.latestData.swells,
+        "wave_height": buoy.latestData.height,
+        "wave_period": buoy.latestData.period,
+        "swells": buoy.latestData.swells,
     }
     return LatestBuoyData.parse_obj(data)
 
 
-def get_region_conditions(spot: str, days: int, now: bool) -> Optional[RegionalReport]:
+async def get_region_conditions(
+    spot: str, days: int, now: bool
+) -> Optional[RegionalReport]:
     reg_info = get_region_info(spot)
     if not reg_info:
         logger.warning("Did not find region info for %s", spot)
         return None
 
-    status, cond = get_conditions(reg_info.region_name, days)
+    status, cond = await get_conditions(reg_info.region_name, days)
     if status != HTTPStatus.OK:
         return None
 
+    return build_region_report(reg_info, cond)
+
+
+@timed("build_region_report")
+def build_region_report(
+    reg_info: RegionInfo, cond: ConditionsResponse
+) -> Optional[RegionalReport]:
     day_cond = cond.data.conditions[0]
-    reg_dttm = get_local_buoy_datetime(day_cond.timestamp, reg_info.timezone)
-    am_cond_dttm = get_local_buoy_datetime(day_cond.am.timestamp, reg_info.timezone)
-    pm_cond_dttm = get_local_buoy_datetime(day_cond.pm.timestamp, reg_info.timezone)
+    reg_dttm, am_cond_dttm, pm_cond_dttm = local_datetimes(
+        [day_cond.timestamp, day_cond.am.timestamp, day_cond.pm.timestamp],
+        day_cond.utcOffset,
+    )
     data = {
         "region_name": reg_info.full_name,
         "report_local_datetime": reg_dttm,
@@ -230,33 +254,336 @@ def get_region_conditions(spot: str, days: int, now: bool) -> Optional[RegionalR
     return data
 
 
-def get_wind_data(spot: str, days: int) -> Optional[WindData]:
+async def get_wind_data(
+    spot: str, days: int, resolution: Optional[str] = None
+) -> Optional[WindData]:
     reg_info = get_region_info(spot)
     if not reg_info:
         logger.warning("Did not find region info for %s", spot)
         return None
 
-    status, data = get_wind(spot, days, interval_hours=1)
+    status, data = await get_wind(spot, days, interval_hours=1)
     if status != HTTPStatus.OK:
         return None
 
-    logger.info(data)
-
-    intervals = []
-    for i in data.data.wind:
-        i_dttm = get_local_buoy_datetime(i.timestamp, reg_info.timezone)
-        intervals.append(
-            {
-                "interval_local_datetime": i_dttm,
-                "speed": i.speed,
-                "direction": i.direction,
-                "direction_type": i.directionType,
-                "gust": i.gust,
-                "optimal_score": i.optimalScore,
-            }
-        )
+    return build_wind_data(spot, reg_info, data, resolution)
+
+
+async def get_wave_data(
+    spot: str, days: int, resolution: Optional[str] = None
+) -> Optional[WaveForecast]:
+    if spot not in SPOTS:
+        logger.warning("Unknown spot %s", spot)
+        return None
+
+    status, data = await get_wave(spot, days, interval_hours=1)
+    if status != HTTPStatus.OK:
+        return None
+
+    return build_forecast_data(
+        spot, get_series(data), wave_intervals, resample_wave, resolution
+    )
+
+
+async def get_rating_data(
+    spot: str, days: int, resolution: Optional[str] = None
+) -> Optional[RatingForecast]:
+    if spot not in SPOTS:
+        logger.warning("Unknown spot %s", spot)
+        return None
+
+    status, data = await get_rating(spot, days, interval_hours=1)
+    if status != HTTPStatus.OK:
+        return None
+
+    return build_forecast_data(
+        spot, get_series(data), rating_intervals, resample_rating, resolution
+    )
+
+
+@timed("build_forecast_data")
+def build_forecast_data(
+    spot: str, series: Series, hourly, resample, resolution: Optional[str]
+) -> dict:
+    """Hourly intervals, or buckets of them when a `resolution` is given.
+
+    Every resolution is computed from the same cached hourly fetch.
+    """
+    if resolution is None:
+        intervals = hourly(series)
+    else:
+        intervals = resample(series, resolution)
     return {
         "spot_name": spot,
         "report_local_datetime": datetime.utcnow(),
+        "resolution": resolution or "1h",
+        "intervals": intervals,
+    }
+
+
+def wind_intervals(wind: WindSeries) -> List[dict]:
+    columns = zip(
+        wind.local_datetimes(),
+        wind.speed.tolist(),
+        wind.direction.tolist(),
+        wind.direction_type.tolist(),
+        wind.gust.tolist(),
+        wind.optimal_score.tolist(),
+    )
+    return [
+        {
+            "interval_local_datetime": i_dttm,
+            "speed": speed,
+            "direction": direction,
+            "direction_type": direction_type,
+            "gust": gust,
+            "optimal_score": optimal_score,
+        }
+        for i_dttm, speed, direction, direction_type, gust, optimal_score in columns
+    ]
+
+
+def wave_intervals(wave: WaveSeries) -> List[dict]:
+    columns = zip(
+        wave.local_datetimes(),
+        nullable(wave.surf_min),
+        nullable(wave.surf_max),
+        wave.pick("surf_optimal_score", np.arange(len(wave)), int),
+        wave.swells.tolist(),
+    )
+    return [
+        {
+            "interval_local_datetime": i_dttm,
+            "surf_min": surf_min,
+            "surf_max": surf_max,
+            "surf_optimal_score": optimal_score,
+            "swells": swells,
+        }
+        for i_dttm, surf_min, surf_max, optimal_score, swells in columns
+    ]
+
+
+def rating_intervals(rating: RatingSeries) -> List[dict]:
+    columns = zip(
+        rating.local_datetimes(),
+        rating.rating_key.tolist(),
+        nullable(rating.rating_value),
+    )
+    return [
+        {
+            "interval_local_datetime": i_dttm,
+            "rating_key": rating_key,
+            "rating_value": rating_value,
+        }
+        for i_dttm, rating_key, rating_value in columns
+    ]
+
+
+def build_wind_data(
+    spot: str,
+    reg_info: RegionInfo,
+    data: WindResponse,
+    resolution: Optional[str] = None,
+) -> WindData:
+    return build_forecast_data(
+        spot, get_series(data), wind_intervals, resample_wind, resolution
+    )
+
+
+async def _stream_days(series: Series, transform) -> AsyncIterator[List[dict]]:
+    for day in series.split_days():
+        yield transform(day)
+        # Let other requests run between days of a long horizon.
+        await asyncio.sleep(0)
+
+
+async def stream_wind_data(
+    spot: str, days: int, interval_hours: int = 1
+) -> Optional[AsyncIterator[List[dict]]]:
+    """Wind intervals for `spot`, produced one local day at a time.
+
+    Returns None when the forecast could not be loaded, so callers can
+    fail the request before any of the stream has been sent.
+    """
+    if spot not in SPOTS:
+        logger.warning("Unknown spot %s", spot)
+        return None
+
+    status, data = await get_wind(spot, days, interval_hours=interval_hours)
+    if status != HTTPStatus.OK:
+        return None
+    return _stream_days(get_series(data), wind_intervals)
+
+
+async def stream_wave_data(
+    spot: str, days: int, interval_hours: int = 1
+) -> Optional[AsyncIterator[List[dict]]]:
+    """Wave intervals for `spot`, produced one local day at a time."""
+    if spot not in SPOTS:
+        logger.warning("Unknown spot %s", spot)
+        return None
+
+    status, data = await get_wave(spot, days, interval_hours=interval_hours)
+    if status != HTTPStatus.OK:
+        return None
+    return _stream_days(get_series(data), wave_intervals)
+
+
+async def get_batch_report(spots: List[str], include: List[str], days: int) -> dict:
+    """Build conditions, wind and buoy data for many spots at once.
+
+    Spots are grouped by region so conditions and nearby buoys are fetched
+    once per region, wind once per spot, and all upstream calls run
+    concurrently. Failures are reported per spot instead of failing the batch.
+    """
+    results = {
+        spot: {"conditions": None, "wind": None, "buoy": None, "errors": {}}
+        for spot in spots
+    }
+    regions = {}
+    for spot in spots:
+        reg_info = get_region_info(spot)
+        if not reg_info:
+            results[spot]["errors"]["spot"] = f"No region info for {spot}."
+            continue
+        regions.setdefault(reg_info.region_name, (reg_info, []))[1].append(spot)
+
+    calls = {}
+    for region_name, (reg_info, region_spots) in regions.items():
+        if "conditions" in include:
+            calls[("conditions", region_name)] = get_conditions(region_name, days)
+        if "buoy" in include:
+            calls[("buoy", region_name)] = get_nearby(
+                reg_info.latitude, reg_info.longitude
+            )
+        if "wind" in include:
+            for spot in region_spots:
+                calls[("wind", spot)] = get_wind(spot, days, interval_hours=1)
+
+    responses = await asyncio.gather(*calls.values(), return_exceptions=True)
+    fetched = dict(zip(calls.keys(), responses))
+
+    builders = {
+        "conditions": lambda spot, reg_info, data: build_region_report(reg_info, data),
+        "buoy": lambda spot, reg_info, data: build_buoy_reading(reg_info, data),
+        "wind": lambda spot, reg_info, data: build_wind_data(spot, reg_info, data),
+    }
+    for region_name, (reg_info, region_spots) in regions.items():
+        for spot in region_spots:
+            for kind in include:
+                key = (kind, spot if kind == "wind" else region_name)
+                response = fetched[key]
+                if isinstance(response, Exception):
+                    logger.error(
+                        "Batch %s fetch for %s failed: %r", kind, spot, response
+                    )
+                    results[spot]["errors"][kind] = f"Could not load {kind} data."
+                    continue
+
+                status, data = response
+                if status != HTTPStatus.OK:
+                    results[spot]["errors"][kind] = f"Upstream returned {status.value}."
+                    continue
+
+                results[spot][kind] = builders[kind](spot, reg_info, data)
+                if results[spot][kind] is None:
+                    results[spot]["errors"][kind] = f"No {kind} data for {spot}."
+
+    return {"spots": results}
+
+
+async def get_full_report(
+    spot: str, days: int, interval_hours: int = 3
+) -> Optional[dict]:
+    """Fetch wave, wind, rating and tide concurrently and join them by time."""
+    if spot not in SPOTS:
+        logger.warning("Unknown spot %s", spot)
+        return None
+
+    sources = {
+        "wave": get_wave(spot, days, interval_hours=interval_hours),
+        "wind": get_wind(spot, days, interval_hours=interval_hours),
+        "rating": get_rating(spot, days, interval_hours=interval_hours),
+        "tide": get_tide(spot, days),
+    }
+    responses = await asyncio.gather(*sources.values(), return_exceptions=True)
+
+    fetched, errors = {}, {}
+    for kind, response in zip(sources, responses):
+        if isinstance(response, Exception):
+            logger.error("Report %s fetch for %s failed: %r", kind, spot, response)
+            errors[kind] = f"Could not load {kind} data."
+            continue
+        status, data = response
+        if status != HTTPStatus.OK:
+            errors[kind] = f"Upstream returned {status.value}."
+            continue
+        fetched[kind] = data
+
+    if not fetched:
+        return None
+
+    return build_full_report(spot, fetched, errors)
+
+
+@timed("build_full_report")
+def build_full_report(spot: str, fetched: dict, errors: dict) -> dict:
+    """Join fetched responses into one interval per timestamp.
+
+    Wave, wind and rating series are aligned on their integer timestamps
+    with a vectorized search and tide heights are read off the tide curve
+    at the same timestamps.
+    """
+    series_types = {
+        "wave": WaveSeries,
+        "wind": WindSeries,
+        "rating": RatingSeries,
+    }
+    wave, wind, rating = (
+        get_series(fetched[kind]) if kind in fetched else series_type.empty()
+        for kind, series_type in series_types.items()
+    )
+    tide = get_tide_curve(fetched["tide"]) if "tide" in fetched else TideCurve.empty()
+
+    timeline = np.union1d(np.union1d(wave.timestamp, wind.timestamp), rating.timestamp)
+    wave_idx = align(timeline, wave)
+    wind_idx = align(timeline, wind)
+    rating_idx = align(timeline, rating)
+    offsets = zip(
+        wave.pick("utc_offset", wave_idx),
+        wind.pick("utc_offset", wind_idx),
+        rating.pick("utc_offset", rating_idx),
+    )
+
+    fields = {
+        "timestamp": timeline.tolist(),
+        "utc_offset": [next(o for o in offs if o is not None) for offs in offsets],
+        "surf_min": wave.pick("surf_min", wave_idx),
+        "surf_max": wave.pick("surf_max", wave_idx),
+        "surf_optimal_score": wave.pick("surf_optimal_score", wave_idx, int),
+        "swells": [s or [] for s in wave.pick("swells", wave_idx)],
+        "wind_speed": wind.pick("speed", wind_idx),
+        "wind_gust": wind.pick("gust", wind_idx),
+        "wind_direction": wind.pick("direction", wind_idx),
+        "wind_direction_type": wind.pick("direction_type", wind_idx),
+        "wind_optimal_score": wind.pick("optimal_score", wind_idx),
+        "rating_key": rating.pick("rating_key", rating_idx),
+        "rating_value": rating.pick("rating_value", rating_idx),
+        "tide_height": nullable(tide.heights(timeline)),
+        "tide_state": tide.states(timeline),
+    }
+    names = list(fields)
+    intervals = [dict(zip(names, row)) for row in zip(*fields.values())]
+
+    units = None
+    if "wave" in fetched:
+        units = fetched["wave"].associated.units
+    elif "wind" in fetched:
+        units = fetched["wind"].associated.units.dict()
+
+    return {
+        "spot_name": SPOTS[spot]["name"],
+        "units": units,
         "intervals": intervals,
+        "errors": errors,
     }
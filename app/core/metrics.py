@@ -0,0 +1,277 @@
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Bucket upper bounds in seconds for request and stage latencies.
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+SIZE_BUCKETS = tuple(2**i for i in range(10, 24, 2))
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """Base for metrics kept in process memory and rendered on scrape.
+
+    Updates are plain dict and list operations on the event loop thread, so
+    recording costs a few hundred nanoseconds and all formatting happens
+    in `render`.
+    """
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        ...
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in self._values.items():
+            lines.append(
+                f"{self.name}{_format_labels(self.labels, labels)} "
+                f"{_format_value(value)}"
+            )
+        return lines
+
+
+class Gauge(Metric):
+    """Gauge whose values are read from `collect` at scrape time.
+
+    `collect` returns a mapping of label value tuples to numbers, which
+    lets existing stats (cache counters, queue sizes) be exported without
+    touching the code that maintains them.
+    """
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        collect: Optional[Callable[[], Dict[Labels, float]]] = None,
+    ):
+        super().__init__(name, documentation, labels)
+        self.collect = collect or (lambda: {})
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in self.collect().items():
+            lines.append(
+                f"{self.name}{_format_labels(self.labels, labels)} "
+                f"{_format_value(value)}"
+            )
+        return lines
+
+
+class CounterFunc(Gauge):
+    """Counter read from `collect` at scrape time, for existing totals."""
+
+    type = "counter"
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: one count per bucket, one for +Inf, then the sum.
+        self._series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        bounds = self.buckets + (float("inf"),)
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labels, labels, le)} "
+                    f"{cumulative}"
+                )
+            label_str = _format_labels(self.labels, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(
+    Counter(
+        "surf_http_requests_total",
+        "HTTP requests handled, by route template, method and status.",
+        ("route", "method", "status"),
+    )
+)
+http_request_seconds = registry.register(
+    Histogram(
+        "surf_http_request_duration_seconds",
+        "HTTP request latency by route template and method.",
+        ("route", "method"),
+    )
+)
+upstream_requests = registry.register(
+    Counter(
+        "surf_upstream_requests_total",
+        "Surfline requests by upstream path and response status.",
+        ("path", "status"),
+    )
+)
+upstream_request_seconds = registry.register(
+    Histogram(
+        "surf_upstream_request_duration_seconds",
+        "Surfline request latency by upstream path, including retries.",
+        ("path",),
+    )
+)
+upstream_response_bytes = registry.register(
+    Histogram(
+        "surf_upstream_response_bytes",
+        "Size of Surfline response bodies by upstream path.",
+        ("path",),
+        buckets=SIZE_BUCKETS,
+    )
+)
+stage_seconds = registry.register(
+    Histogram(
+        "surf_stage_duration_seconds",
+        "Time spent parsing upstream payloads and building responses.",
+        ("stage",),
+    )
+)
+
+
+# Stage timings of the request being profiled; None when it is not profiled,
+# which leaves one context variable lookup per stage as the only cost.
+stage_trace: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "stage_trace", default=None
+)
+
+
+def record_stage(stage: str, seconds: float):
+    """Add a timing to the stage breakdown of the request being profiled."""
+    trace = stage_trace.get()
+    if trace is not None:
+        trace.append((stage, seconds))
+
+
+def observe_stage(stage: str, seconds: float):
+    stage_seconds.observe(seconds, stage)
+    record_stage(stage, seconds)
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block under stage `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - start)
+
+
+def timed(stage: str):
+    """Record the run time of a synchronous function under `stage`."""
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe_stage(stage, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
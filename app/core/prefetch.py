@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import os
+import time
+from http import HTTPStatus
+from typing import Hashable, Optional
+
+from app.core.cache import ResponseCache, refresh, response_cache
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_INTERVAL = float(os.environ.get("SURFLINE_PREFETCH_INTERVAL", 30))
+PREFETCH_LEAD = float(os.environ.get("SURFLINE_PREFETCH_LEAD", 120))
+PREFETCH_TOP_N = int(os.environ.get("SURFLINE_PREFETCH_TOP_N", 50))
+PREFETCH_CONCURRENCY = int(os.environ.get("SURFLINE_PREFETCH_CONCURRENCY", 4))
+# Popularity is multiplied by this every tick, a half-life of ~10 ticks.
+PREFETCH_DECAY = float(os.environ.get("SURFLINE_PREFETCH_DECAY", 0.93))
+
+
+class PrefetchScheduler:
+    """Refresh the most requested cache entries shortly before they expire.
+
+    Every `interval` seconds the `top_n` most popular keys are checked, and
+    those expiring within `lead` seconds (or already stale) are re-fetched
+    with at most `concurrency` upstream requests at a time. Cache expiry
+    already follows the expected arrival of the next model run, so popular
+    forecasts are refreshed as new runs land.
+    """
+
+    def __init__(
+        self,
+        cache: ResponseCache,
+        interval: float = PREFETCH_INTERVAL,
+        lead: float = PREFETCH_LEAD,
+        top_n: int = PREFETCH_TOP_N,
+        concurrency: int = PREFETCH_CONCURRENCY,
+        decay: float = PREFETCH_DECAY,
+    ):
+        self.cache = cache
+        self.interval = interval
+        self.lead = lead
+        self.top_n = top_n
+        self.concurrency = concurrency
+        self.decay = decay
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.failures = 0
+
+    async def start(self):
+        if self._task or self.interval <= 0:
+            return
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("Prefetch tick failed")
+
+    async def tick(self):
+        now = time.time()
+        due = []
+        for key, _ in self.cache.popularity.most_common(self.top_n):
+            entry = self.cache.peek(key)
+            if entry and entry.refresh and entry.expires_at - now <= self.lead:
+                due.append(key)
+        if due:
+            logger.debug("Prefetching %s cache entries", len(due))
+            await asyncio.gather(*(self._refresh(key) for key in due))
+        self.cache.decay_popularity(self.decay)
+
+    async def _refresh(self, key: Hashable):
+        async with self._semaphore:
+            try:
+                result = await refresh(key)
+            except Exception as e:
+                self.failures += 1
+                logger.warning("Prefetch of %s failed: %r", key, e)
+                return
+            status, data = result or (None, None)
+            if status == HTTPStatus.OK and data is not None:
+                self.refreshes += 1
+            else:
+                self.failures += 1
+                logger.warning("Prefetch of %s failed: %s", key, status)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "tracked_keys": len(self.cache.popularity),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+
+prefetcher = PrefetchScheduler(response_cache)
@@ -0,0 +1,233 @@
+import asyncio
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+workdir = os.getcwd()
+
+# Fraction of `/surf` requests profiled without being asked to, 0 to 1.
+PROFILE_SAMPLE_RATE = float(os.environ.get("SURF_PROFILE_SAMPLE_RATE", 0))
+# Seconds between two stack samples of the event loop thread.
+PROFILE_INTERVAL = float(os.environ.get("SURF_PROFILE_INTERVAL", 0.001))
+# Requests profiled at the same time; others are served unprofiled.
+PROFILE_MAX_CONCURRENT = int(os.environ.get("SURF_PROFILE_MAX_CONCURRENT", 2))
+# Where speedscope files are written, and how many of them are kept.
+PROFILE_DIR = os.environ.get("SURF_PROFILE_DIR", f"{workdir}/.surf_profiles")
+PROFILE_KEEP = int(os.environ.get("SURF_PROFILE_KEEP", 100))
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+PROFILE_SUFFIX = ".speedscope.json"
+PROFILE_NAME = re.compile(r"^[\w.-]+\.speedscope\.json$")
+
+Stack = Tuple[int, ...]
+
+
+class Sampler(threading.Thread):
+    """Sample the call stack of one thread at a fixed interval.
+
+    The sampled thread keeps running untouched: stacks are read through
+    `sys._current_frames` from this thread, and frames are interned into
+    the shared frame table of the speedscope format as they are seen.
+    """
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        super().__init__(name="surf-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames: List[dict] = []
+        self.samples: List[Stack] = []
+        self.weights: List[float] = []
+        self._frame_index: Dict[tuple, int] = {}
+        self._stopped = threading.Event()
+
+    def run(self):
+        last = time.perf_counter()
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is not None:
+                self.samples.append(self._stack(frame))
+                self.weights.append(now - last)
+            last = now
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def _stack(self, frame) -> Stack:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_filename, code.co_firstlineno, code.co_name)
+            index = self._frame_index.get(key)
+            if index is None:
+                index = self._frame_index[key] = len(self.frames)
+                self.frames.append(
+                    {
+                        "name": getattr(code, "co_qualname", code.co_name),
+                        "file": code.co_filename,
+                        "line": code.co_firstlineno,
+                    }
+                )
+            stack.append(index)
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+
+class Profile:
+    """Stack samples and stage timings captured for one request."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.name = "%s-%s-%s%s" % (
+            time.strftime("%Y%m%dT%H%M%S"),
+            re.sub(r"\W+", "_", label).strip("_") or "root",
+            uuid.uuid4().hex[:6],
+            PROFILE_SUFFIX,
+        )
+        self.stages: List[Tuple[str, float]] = []
+        self.started = time.perf_counter()
+        self.elapsed: Optional[float] = None
+        self.sampler = Sampler(threading.get_ident())
+
+    def start(self):
+        self.sampler.start()
+
+    def stop(self):
+        if self.elapsed is None:
+            self.elapsed = time.perf_counter() - self.started
+        self.sampler.stop()
+
+    def breakdown(self) -> Dict[str, Tuple[float, int]]:
+        """Total seconds and count per stage, in order of first appearance."""
+        totals: Dict[str, Tuple[float, int]] = {}
+        for name, seconds in self.stages:
+            total, count = totals.get(name, (0.0, 0))
+            totals[name] = (total + seconds, count + 1)
+        return totals
+
+    def server_timing(self) -> str:
+        """Server-Timing header value with the stages recorded so far."""
+        parts = [
+            f'{name};dur={total * 1000:.3f};desc="{count}x"'
+            for name, (total, count) in self.breakdown().items()
+        ]
+        elapsed = time.perf_counter() - self.started
+        parts.append(f"total;dur={elapsed * 1000:.3f}")
+        return ", ".join(parts)
+
+    def speedscope(self) -> dict:
+        sampler = self.sampler
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": self.label,
+            "exporter": "surf-log",
+            "activeProfileIndex": 0,
+            "shared": {"frames": sampler.frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": self.label,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(sampler.weights),
+                    "samples": sampler.samples,
+                    "weights": sampler.weights,
+                }
+            ],
+            # Not part of the speedscope format; viewers ignore it.
+            "stages": {
+                name: {"seconds": total, "count": count}
+                for name, (total, count) in self.breakdown().items()
+            },
+            "elapsed": self.elapsed,
+        }
+
+
+class Profiler:
+    """Decide which requests to profile and store their profiles on disk."""
+
+    def __init__(
+        self,
+        directory: str = PROFILE_DIR,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        max_concurrent: int = PROFILE_MAX_CONCURRENT,
+        keep: int = PROFILE_KEEP,
+    ):
+        self.directory = Path(directory)
+        self.sample_rate = sample_rate
+        self.max_concurrent = max_concurrent
+        self.keep = keep
+        self.active = 0
+        self.profiled = 0
+        self.skipped = 0
+
+    def sampled(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def begin(self, label: str) -> Optional[Profile]:
+        """A started profile, or None when enough requests are profiled already."""
+        if self.active >= self.max_concurrent:
+            self.skipped += 1
+            return None
+        self.active += 1
+        profile = Profile(label)
+        profile.start()
+        return profile
+
+    async def end(self, profile: Profile):
+        """Stop sampling and write the profile to disk."""
+        profile.elapsed = time.perf_counter() - profile.started
+        try:
+            await asyncio.to_thread(self._store, profile)
+        finally:
+            self.active -= 1
+        self.profiled += 1
+
+    def _store(self, profile: Profile):
+        profile.stop()
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / profile.name
+            path.write_bytes(orjson.dumps(profile.speedscope()))
+            self._prune()
+        except OSError as e:
+            logger.warning("Could not store profile %s: %r", profile.name, e)
+            return
+        logger.info("Stored profile %s (%.1f ms)", path, profile.elapsed * 1000)
+
+    def _prune(self):
+        profiles = sorted(
+            self.directory.glob(f"*{PROFILE_SUFFIX}"), key=lambda p: p.name
+        )
+        for path in profiles[: max(0, len(profiles) - self.keep)]:
+            path.unlink(missing_ok=True)
+
+    def path(self, name: str) -> Optional[Path]:
+        """Path of a stored profile, None for names that are not profiles."""
+        if not PROFILE_NAME.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+    def stats(self) -> dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "active": self.active,
+            "profiled": self.profiled,
+            "skipped": self.skipped,
+        }
+
+
+profiler = Profiler()
@@ -0,0 +1,170 @@
+import logging
+from typing import List, Tuple
+
+import numpy as np
+
+from app.core.series import (
+    DAY,
+    HOUR,
+    RatingSeries,
+    Series,
+    WaveSeries,
+    WindSeries,
+    nullable,
+)
+from app.core.timeconv import local_datetimes
+
+logger = logging.getLogger(__name__)
+
+# Bucket width in seconds of local wall time. "ampm" splits each day at noon.
+RESOLUTIONS = {
+    "3h": 3 * HOUR,
+    "6h": 6 * HOUR,
+    "day": DAY,
+    "ampm": 12 * HOUR,
+}
+
+
+def _buckets(series: Series, resolution: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Start row of each bucket and the bucket number of every row.
+
+    Rows are sorted by time, so each bucket is a contiguous run of rows and
+    can be reduced with `ufunc.reduceat`.
+    """
+    bucket = series.local_timestamps() // RESOLUTIONS[resolution]
+    starts = np.flatnonzero(np.diff(bucket, prepend=bucket[:1] - 1))
+    return starts, np.cumsum(np.diff(bucket, prepend=bucket[:1]) != 0)
+
+
+def _mean(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    present = ~np.isnan(values)
+    total = np.add.reduceat(np.where(present, values, 0), starts)
+    count = np.add.reduceat(present, starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+
+def _first_by(key: np.ndarray, groups: np.ndarray, n_groups: int) -> np.ndarray:
+    """Row with the largest `key` in every group, NaN keys ranked last."""
+    key = np.where(np.isnan(key), -np.inf, key)
+    order = np.lexsort((-key, groups))
+    first = np.flatnonzero(np.diff(groups[order], prepend=-1))
+    return order[first][:n_groups]
+
+
+def _mode(values: np.ndarray, groups: np.ndarray, n_groups: int) -> list:
+    """Most common value per group, ties broken alphabetically."""
+    labels, codes = np.unique(values.astype(str), return_inverse=True)
+    counts = np.zeros((n_groups, len(labels)), dtype=np.int64)
+    np.add.at(counts, (groups, codes), 1)
+    return labels[counts.argmax(axis=1)].tolist()
+
+
+def _header(series: Series, starts: np.ndarray, resolution: str) -> dict:
+    counts = np.diff(np.append(starts, len(series)))
+    first = series.take(starts)
+    header = {
+        "interval_local_datetime": local_datetimes(
+            first.timestamp - first.local_timestamps() % RESOLUTIONS[resolution],
+            first.utc_offset,
+        ),
+        "samples": counts.tolist(),
+    }
+    if resolution == "ampm":
+        noon = first.local_timestamps() % DAY >= 12 * HOUR
+        header["period"] = np.where(noon, "PM", "AM").tolist()
+    else:
+        header["period"] = [None] * len(starts)
+    return header
+
+
+def _rows(columns: dict) -> List[dict]:
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def _optional_int(values: np.ndarray) -> list:
+    return [None if v != v else int(v) for v in values.tolist()]
+
+
+def resample_wind(wind: WindSeries, resolution: str) -> List[dict]:
+    """Speed range and mean, peak gust and prevailing direction per bucket.
+
+    The direction is the speed-weighted vector mean of the hourly
+    directions, so 350° and 10° average to 0°, not 180°.
+    """
+    if not len(wind):
+        return []
+    starts, groups = _buckets(wind, resolution)
+    radians = np.radians(wind.direction.astype(np.float64))
+    weight = np.nan_to_num(wind.speed, nan=0.0) + 1e-9
+    east = np.add.reduceat(weight * np.sin(radians), starts)
+    north = np.add.reduceat(weight * np.cos(radians), starts)
+    direction = np.round(np.degrees(np.arctan2(east, north))) % 360
+
+    return _rows(
+        {
+            **_header(wind, starts, resolution),
+            "speed_min": nullable(np.fmin.reduceat(wind.speed, starts)),
+            "speed_max": nullable(np.fmax.reduceat(wind.speed, starts)),
+            "speed_mean": nullable(np.round(_mean(wind.speed, starts), 2)),
+            "gust_max": nullable(np.fmax.reduceat(wind.gust, starts)),
+            "direction": direction.astype(np.int64).tolist(),
+            "direction_type": _mode(wind.direction_type, groups, len(starts)),
+            "optimal_score": np.maximum.reduceat(wind.optimal_score, starts).tolist(),
+        }
+    )
+
+
+def resample_wave(wave: WaveSeries, resolution: str) -> List[dict]:
+    """Surf height range, best score and the biggest swell per bucket."""
+    if not len(wave):
+        return []
+    starts, groups = _buckets(wave, resolution)
+
+    # Biggest swell of every row, then the row holding the biggest per bucket.
+    rows = np.arange(len(wave))
+    if wave.swell_height.shape[1]:
+        heights = np.where(np.isnan(wave.swell_height), -np.inf, wave.swell_height)
+        column = heights.argmax(axis=1)
+        row_height = wave.swell_height[rows, column]
+    else:
+        column = np.zeros(len(wave), dtype=np.int64)
+        row_height = np.full(len(wave), np.nan)
+    best = _first_by(row_height, groups, len(starts))
+
+    def swell(matrix: np.ndarray) -> np.ndarray:
+        if not matrix.shape[1]:
+            return np.full(len(best), np.nan)
+        return matrix[best, column[best]]
+
+    return _rows(
+        {
+            **_header(wave, starts, resolution),
+            "surf_min": nullable(np.fmin.reduceat(wave.surf_min, starts)),
+            "surf_max": nullable(np.fmax.reduceat(wave.surf_max, starts)),
+            "surf_optimal_score": _optional_int(
+                np.fmax.reduceat(wave.surf_optimal_score, starts)
+            ),
+            "swell_height": nullable(swell(wave.swell_height)),
+            "swell_period": _optional_int(swell(wave.swell_period)),
+            "swell_direction": nullable(swell(wave.swell_direction)),
+        }
+    )
+
+
+def resample_rating(rating: RatingSeries, resolution: str) -> List[dict]:
+    """Rating range and mean per bucket, keyed by the best rating."""
+    if not len(rating):
+        return []
+    starts, groups = _buckets(rating, resolution)
+    best = _first_by(rating.rating_value, groups, len(starts))
+    return _rows(
+        {
+            **_header(rating, starts, resolution),
+            "rating_key": rating.rating_key[best].tolist(),
+            "rating_min": nullable(np.fmin.reduceat(rating.rating_value, starts)),
+            "rating_max": nullable(np.fmax.reduceat(rating.rating_value, starts)),
+            "rating_mean": nullable(np.round(_mean(rating.rating_value, starts), 2)),
+        }
+    )
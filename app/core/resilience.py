@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from http import HTTPStatus
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRY_ATTEMPTS = int(os.environ.get("SURFLINE_RETRY_ATTEMPTS", 2))
+RETRY_BASE_DELAY = float(os.environ.get("SURFLINE_RETRY_BASE_DELAY", 0.2))
+RETRY_MAX_DELAY = float(os.environ.get("SURFLINE_RETRY_MAX_DELAY", 2.0))
+BREAKER_FAILURES = int(os.environ.get("SURFLINE_BREAKER_FAILURES", 5))
+BREAKER_RESET_AFTER = float(os.environ.get("SURFLINE_BREAKER_RESET_AFTER", 30))
+# Upper bound on upstream requests in flight across all fetchers, and how
+# long a request may wait for a slot before failing.
+UPSTREAM_BUDGET = int(os.environ.get("SURFLINE_UPSTREAM_BUDGET", 32))
+UPSTREAM_BUDGET_WAIT = float(os.environ.get("SURFLINE_UPSTREAM_BUDGET_WAIT", 2.0))
+
+RETRY_STATUSES = {
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+}
+
+
+class UpstreamError(Exception):
+    """An upstream call that failed without a usable response."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class CircuitBreaker:
+    """Fail fast on an endpoint after repeated consecutive failures.
+
+    After `failure_threshold` failures the breaker opens and rejects calls
+    for `reset_after` seconds, then lets a single trial call through. A
+    successful trial closes it again, a failed one re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURES,
+        reset_after: float = BREAKER_RESET_AFTER,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def abandon(self):
+        """Forget a trial call that ended without an answer, e.g. cancelled."""
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_running or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._trial_running:
+                logger.warning("Circuit for %s opened", self.name)
+            self.opened_at = time.monotonic()
+        self._trial_running = False
+
+    def stats(self) -> dict:
+        return {"state": self.state, "failures": self.failures}
+
+
+class Upstream:
+    """Shared resilience policy for upstream calls.
+
+    Every call goes through the per-endpoint circuit breaker and the global
+    concurrency budget. Timeouts, transport errors and retryable statuses
+    are retried up to `attempts` times with full-jitter exponential backoff.
+    Only idempotent requests should be sent through `call`.
+    """
+
+    def __init__(
+        self,
+        attempts: int = RETRY_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+        budget: int = UPSTREAM_BUDGET,
+        budget_wait: float = UPSTREAM_BUDGET_WAIT,
+    ):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.budget_wait = budget_wait
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.retries = 0
+        self.rejected = 0
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            breaker = self.breakers[name] = CircuitBreaker(name)
+        return breaker
+
+    def _backoff(self, attempt: int, resp: Optional[httpx.Response]) -> float:
+        retry_after = resp.headers.get("retry-after") if resp is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    async def _send_within_budget(self, send: Callable[[], Awaitable[httpx.Response]]):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.budget)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.budget_wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise UpstreamError(
+                HTTPStatus.SERVICE_UNAVAILABLE, "Upstream request budget exhausted"
+            )
+        try:
+            return await send()
+        finally:
+            self._semaphore.release()
+
+    async def call(
+        self, name: str, send: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        breaker = self.breaker(name)
+        for attempt in range(self.attempts + 1):
+            if not breaker.allow():
+                raise UpstreamError(
+                    HTTPStatus.SERVICE_UNAVAILABLE, f"Circuit for {name} is open"
+                )
+
+            resp, error = None, None
+            try:
+                resp = await self._send_within_budget(send)
+            except httpx.TimeoutException as e:
+                error = UpstreamError(HTTPStatus.GATEWAY_TIMEOUT, repr(e))
+            except httpx.TransportError as e:
+                error = UpstreamError(HTTPStatus.BAD_GATEWAY, repr(e))
+            except (asyncio.CancelledError, UpstreamError):
+                # Cancelled, or the local budget ran out: nothing is known
+                # about upstream, so a half-open trial is just given back.
+                breaker.abandon()
+                raise
+            except BaseException:
+                # Unexpected errors are not retried, but they settle a
+                # half-open trial so the breaker cannot get stuck.
+                breaker.record_failure()
+                raise
+
+            if resp is not None and resp.status_code not in RETRY_STATUSES:
+                breaker.record_success()
+                return resp
+
+            breaker.record_failure()
+            if attempt == self.attempts:
+                break
+            self.retries += 1
+            delay = self._backoff(attempt, resp)
+            logger.warning(
+                "Retrying %s in %.2fs after %s",
+                name,
+                delay,
+                error or resp.status_code,
+            )
+            await asyncio.sleep(delay)
+
+        if error is not None:
+            raise error
+        return resp
+
+    def stats(self) -> dict:
+        return {
+            "retries": self.retries,
+            "budget_rejections": self.rejected,
+            "breakers": {name: b.stats() for name, b in self.breakers.items()},
+        }
+
+
+upstream = Upstream()
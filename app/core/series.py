@@ -0,0 +1,222 @@
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.core.timeconv import local_datetimes
+from app.models import RatingResponse, TideResponse, WaveResponse, WindResponse
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def forecast_days(hours: int) -> int:
+    """Forecast days to fetch to cover the next `hours` from the current hour.
+
+    Forecasts start at local midnight, so one extra day covers the horizon.
+    Everything that needs a spot's near term forecast asks for the same
+    days, so it is fetched and cached once.
+    """
+    return (hours + DAY // HOUR - 1) // (DAY // HOUR) + 1
+
+
+def _column(values, dtype=np.float64) -> np.ndarray:
+    """Build a column, mapping missing values to NaN for float columns."""
+    if dtype is np.float64:
+        return np.array([np.nan if v is None else v for v in values], dtype=dtype)
+    return np.array(values, dtype=dtype)
+
+
+def nullable(values: np.ndarray) -> list:
+    """Convert a float column back to a list with None for missing values."""
+    return [None if v != v else v for v in values.tolist()]
+
+
+class Series:
+    """Columnar view over forecast intervals, one numpy array per field.
+
+    Every series has `timestamp` (UTC seconds) and `utc_offset` (hours)
+    columns sorted by timestamp. Subclasses list their other columns in
+    `columns` and build themselves from a parsed upstream response.
+    """
+
+    columns: Tuple[str, ...] = ("timestamp", "utc_offset")
+
+    def __init__(self, **columns):
+        for name in self.columns:
+            setattr(self, name, columns[name])
+
+    @classmethod
+    def empty(cls) -> "Series":
+        columns = {name: np.empty(0) for name in cls.columns}
+        columns["timestamp"] = np.empty(0, dtype=np.int64)
+        columns["utc_offset"] = np.empty(0, dtype=np.int64)
+        return cls(**columns)
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def pick(self, name: str, index: np.ndarray, convert=None) -> list:
+        """Values of column `name` at row `index`, None where index is -1."""
+        if not len(self):
+            return [None] * len(index)
+        values = getattr(self, name)[index].tolist()
+        missing = (index < 0).tolist()
+        return [
+            None if m or v != v else convert(v) if convert else v
+            for v, m in zip(values, missing)
+        ]
+
+    def take(self, index) -> "Series":
+        """Return a new series with rows selected by a slice, mask or indices."""
+        return type(self)(**{name: getattr(self, name)[index] for name in self.columns})
+
+    def where(self, mask: np.ndarray) -> "Series":
+        """Rows where the boolean `mask` is set."""
+        return self.take(mask)
+
+    def between(
+        self, start: Optional[int] = None, end: Optional[int] = None
+    ) -> "Series":
+        """Rows with `start <= timestamp < end`, found by binary search."""
+        lo = 0 if start is None else np.searchsorted(self.timestamp, start, "left")
+        hi = len(self) if end is None else np.searchsorted(self.timestamp, end, "left")
+        return self.take(slice(lo, hi))
+
+    def local_timestamps(self) -> np.ndarray:
+        """Timestamps shifted by the upstream utcOffset, as local wall time."""
+        return self.timestamp + self.utc_offset * HOUR
+
+    def local_datetimes(self) -> List[datetime]:
+        """Aware local datetimes built from the upstream utcOffset column."""
+        return local_datetimes(self.timestamp, self.utc_offset)
+
+    def split_days(self) -> List["Series"]:
+        """Consecutive sub-series each covering one local calendar day."""
+        if not len(self):
+            return []
+        day = self.local_timestamps() // DAY
+        bounds = [0] + (np.flatnonzero(np.diff(day)) + 1).tolist() + [len(self)]
+        return [self.take(slice(lo, hi)) for lo, hi in zip(bounds, bounds[1:])]
+
+
+class WindSeries(Series):
+    columns = Series.columns + (
+        "speed",
+        "direction",
+        "direction_type",
+        "gust",
+        "optimal_score",
+    )
+
+    @classmethod
+    def from_response(cls, response: WindResponse) -> "WindSeries":
+        wind = response.data.wind
+        return cls(
+            timestamp=_column([i.timestamp for i in wind], np.int64),
+            utc_offset=_column([i.utcOffset for i in wind], np.int64),
+            speed=_column([i.speed for i in wind]),
+            direction=_column([i.direction for i in wind], np.int64),
+            direction_type=_column([i.directionType for i in wind], object),
+            gust=_column([i.gust for i in wind]),
+            optimal_score=_column([i.optimalScore for i in wind], np.int64),
+        )
+
+
+class WaveSeries(Series):
+    """Wave intervals with swell fields as `(intervals, swells)` matrices."""
+
+    columns = Series.columns + (
+        "surf_min",
+        "surf_max",
+        "surf_optimal_score",
+        "swell_height",
+        "swell_period",
+        "swell_direction",
+        "swells",
+    )
+
+    @classmethod
+    def from_response(cls, response: WaveResponse) -> "WaveSeries":
+        wave = response.data.wave
+        width = max((len(i.swells) for i in wave), default=0)
+
+        def swell_matrix(field):
+            out = np.full((len(wave), width), np.nan)
+            for row, interval in enumerate(wave):
+                for col, swell in enumerate(interval.swells):
+                    value = getattr(swell, field)
+                    if value is not None:
+                        out[row, col] = value
+            return out
+
+        swells = np.empty(len(wave), dtype=object)
+        swells[:] = [i.swells for i in wave]
+        return cls(
+            timestamp=_column([i.timestamp for i in wave], np.int64),
+            utc_offset=_column([i.utcOffset for i in wave], np.int64),
+            surf_min=_column([i.surf.min for i in wave]),
+            surf_max=_column([i.surf.max for i in wave]),
+            surf_optimal_score=_column([i.surf.optimalScore for i in wave]),
+            swell_height=swell_matrix("height"),
+            swell_period=swell_matrix("period"),
+            swell_direction=swell_matrix("direction"),
+            swells=swells,
+        )
+
+
+class RatingSeries(Series):
+    columns = Series.columns + ("rating_key", "rating_value")
+
+    @classmethod
+    def from_response(cls, response: RatingResponse) -> "RatingSeries":
+        rating = response.data.rating
+        return cls(
+            timestamp=_column([i.timestamp for i in rating], np.int64),
+            utc_offset=_column([i.utcOffset for i in rating], np.int64),
+            rating_key=_column([i.rating.key for i in rating], object),
+            rating_value=_column([i.rating.value for i in rating]),
+        )
+
+
+class TideSeries(Series):
+    columns = Series.columns + ("type", "height")
+
+    @classmethod
+    def from_response(cls, response: TideResponse) -> "TideSeries":
+        tides = response.data.tides
+        return cls(
+            timestamp=_column([i.timestamp for i in tides], np.int64),
+            utc_offset=_column([i.utcOffset for i in tides], np.int64),
+            type=_column([i.type for i in tides], object),
+            height=_column([i.height for i in tides]),
+        )
+
+
+SERIES_TYPES = {
+    WindResponse: WindSeries,
+    WaveResponse: WaveSeries,
+    RatingResponse: RatingSeries,
+    TideResponse: TideSeries,
+}
+
+
+def get_series(response) -> Series:
+    """Columnar series for a parsed response, built once and kept on it."""
+    series = response._series
+    if series is None:
+        series = SERIES_TYPES[type(response)].from_response(response)
+        response._series = series
+    return series
+
+
+def align(timeline: np.ndarray, series: Series) -> np.ndarray:
+    """Row index into `series` for each timeline timestamp, -1 when missing."""
+    if not len(series):
+        return np.full(len(timeline), -1)
+    index = np.searchsorted(series.timestamp, timeline)
+    index = np.minimum(index, len(series) - 1)
+    return np.where(series.timestamp[index] == timeline, index, -1)
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+from http import HTTPStatus
+from typing import Dict, List
+
+import numpy as np
+
+from app.core.metrics import timed
+from app.core.series import DAY, HOUR, Series, align, forecast_days, get_series
+from app.core.surfline import get_rating, get_tide, get_wave, get_wind
+from app.core.tides import get_tide_curve
+from app.core.timeconv import local_datetimes
+from app.db.locations import SPOTS
+
+logger = logging.getLogger(__name__)
+
+# Relative weight of each score component. Components with no data for a
+# window are left out of its weighted mean instead of counting as zero.
+WEIGHTS = {"surf": 3.0, "swell": 2.0, "wind": 2.0, "rating": 3.0, "tide": 1.0}
+
+# Values that earn a full component score, in the upstream default units
+# (surf in feet, wind in knots, rating on Surfline's 0-6 scale).
+SURF_TARGET = 6.0
+SWELL_POWER_TARGET = 150.0  # height² × period of the biggest swell, ft² s
+WIND_LIMIT = 25.0  # speed at which the wind speed term reaches zero
+RATING_MAX = 6.0
+DIRECTION_SCORES = {"Offshore": 1.0, "Cross-shore": 0.5, "Onshore": 0.0}
+
+TIDE_PREFERENCES = ("low", "mid", "high", "any")
+# Local hours [start, end) counted as daylight.
+DAYLIGHT_HOURS = (6, 19)
+
+FORECASTS = {
+    "wave": lambda spot, days: get_wave(spot, days, interval_hours=1),
+    "wind": lambda spot, days: get_wind(spot, days, interval_hours=1),
+    "rating": lambda spot, days: get_rating(spot, days, interval_hours=1),
+    "tide": lambda spot, days: get_tide(spot, days),
+}
+
+
+async def get_best_sessions(
+    spots: List[str],
+    start: int,
+    hours: int,
+    top: int,
+    tide: str = "mid",
+    daylight: bool = True,
+) -> dict:
+    """Top `top` spot and hour windows between `start` and `start + hours`.
+
+    Forecasts for every spot are fetched concurrently through the response
+    cache; missing data is reported per spot and never fails the request.
+    """
+    days = forecast_days(hours)
+    errors: Dict[str, Dict[str, str]] = {}
+    known = []
+    for spot in spots:
+        if spot in SPOTS:
+            known.append(spot)
+        else:
+            errors[spot] = {"spot": f"Unknown spot {spot}."}
+
+    calls = {
+        (spot, kind): fetch(spot, days)
+        for spot in known
+        for kind, fetch in FORECASTS.items()
+    }
+    responses = await asyncio.gather(*calls.values(), return_exceptions=True)
+
+    fetched: Dict[str, Dict[str, Series]] = {spot: {} for spot in known}
+    for (spot, kind), response in zip(calls, responses):
+        if isinstance(response, Exception):
+            logger.error("Sessions %s fetch for %s failed: %r", kind, spot, response)
+            errors.setdefault(spot, {})[kind] = f"Could not load {kind} data."
+            continue
+        status, data = response
+        if status != HTTPStatus.OK:
+            errors.setdefault(spot, {})[kind] = f"Upstream returned {status.value}."
+            continue
+        fetched[spot][kind] = (
+            get_tide_curve(data) if kind == "tide" else get_series(data)
+        )
+
+    sessions = score_sessions(fetched, start, start + hours * HOUR, top, tide, daylight)
+    for session in sessions:
+        session["spot_name"] = SPOTS[session["spot"]]["name"]
+    return {"start": start, "hours": hours, "sessions": sessions, "errors": errors}
+
+
+def _matrix(
+    fetched: Dict[str, Dict[str, Series]], kind: str, timeline: np.ndarray, column
+) -> np.ndarray:
+    """`(spots, timeline)` matrix of `column(series)`, NaN where missing."""
+    out = np.full((len(fetched), len(timeline)), np.nan)
+    for row, series in enumerate(fetched.values()):
+        series = series.get(kind)
+        if series is None or not len(series):
+            continue
+        index = align(timeline, series)
+        values = np.asarray(column(series), dtype=np.float64)
+        out[row] = np.where(index >= 0, values[index], np.nan)
+    return out
+
+
+def _swell_power(wave) -> np.ndarray:
+    if not wave.swell_height.shape[1]:
+        return np.full(len(wave), np.nan)
+    return np.fmax.reduce(wave.swell_height**2 * wave.swell_period, axis=1)
+
+
+def _tide_position(heights: np.ndarray) -> np.ndarray:
+    """Tide height as 0 (lowest) to 1 (highest) within each spot's horizon."""
+    low = np.fmin.reduce(heights, axis=1, keepdims=True)
+    high = np.fmax.reduce(heights, axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.clip((heights - low) / (high - low), 0, 1)
+
+
+@timed("score_sessions")
+def score_sessions(
+    fetched: Dict[str, Dict[str, Series]],
+    start: int,
+    end: int,
+    top: int,
+    tide: str = "mid",
+    daylight: bool = True,
+) -> List[dict]:
+    """Score every spot × hour window in one pass and return the best `top`.
+
+    Each forecast field is aligned into a `(spots, hours)` matrix, the
+    component scores are computed on whole matrices and combined into a
+    weighted mean, and the best windows are picked with `argpartition`.
+    Windows without wave data are never returned.
+    """
+    spots = list(fetched)
+    stamps = [
+        series.timestamp
+        for kinds in fetched.values()
+        for kind, series in kinds.items()
+        if kind != "tide"
+    ]
+    if not spots or not stamps:
+        return []
+    timeline = np.unique(np.concatenate(stamps))
+    timeline = timeline[(timeline >= start) & (timeline < end)]
+    if not len(timeline):
+        return []
+
+    def matrix(kind, column):
+        return _matrix(fetched, kind, timeline, column)
+
+    surf_min = matrix("wave", lambda s: s.surf_min)
+    surf_max = matrix("wave", lambda s: s.surf_max)
+    surf_optimal = matrix("wave", lambda s: s.surf_optimal_score)
+    swell_power = matrix("wave", _swell_power)
+    wind_speed = matrix("wind", lambda s: s.speed)
+    wind_optimal = matrix("wind", lambda s: s.optimal_score)
+    wind_direction = matrix(
+        "wind",
+        lambda s: [DIRECTION_SCORES.get(t, np.nan) for t in s.direction_type],
+    )
+    rating = matrix("rating", lambda s: s.rating_value)
+    tide_height = np.full(surf_min.shape, np.nan)
+    for row, kinds in enumerate(fetched.values()):
+        if "tide" in kinds:
+            tide_height[row] = kinds["tide"].heights(timeline)
+    utc_offset = matrix("wave", lambda s: s.utc_offset)
+
+    surf_mean = (surf_min + surf_max) / 2
+    components = {
+        "surf": np.clip(surf_mean / SURF_TARGET, 0, 1) / 2
+        + np.nan_to_num(surf_optimal) / 4,
+        "swell": np.clip(swell_power / SWELL_POWER_TARGET, 0, 1),
+        "wind": (
+            wind_direction
+            + wind_optimal / 2
+            + np.clip(1 - wind_speed / WIND_LIMIT, 0, 1)
+        )
+        / 3,
+        "rating": np.clip(rating / RATING_MAX, 0, 1),
+    }
+    if tide != "any":
+        position = _tide_position(tide_height)
+        components["tide"] = {
+            "low": 1 - position,
+            "mid": 1 - np.abs(position - 0.5) * 2,
+            "high": position,
+        }[tide]
+
+    stacked = np.stack(list(components.values()))
+    weights = np.array([WEIGHTS[name] for name in components])[:, None, None]
+    present = ~np.isnan(stacked)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        score = (weights * np.nan_to_num(stacked)).sum(axis=0) / (
+            weights * present
+        ).sum(axis=0)
+
+    valid = ~np.isnan(surf_mean)
+    if daylight:
+        local_hour = (timeline + np.nan_to_num(utc_offset) * HOUR) % DAY // HOUR
+        valid &= (local_hour >= DAYLIGHT_HOURS[0]) & (local_hour < DAYLIGHT_HOURS[1])
+    flat = np.where(valid, score, -np.inf).ravel()
+    k = min(top, int(valid.sum()))
+    if k <= 0:
+        return []
+    best = np.argpartition(-flat, k - 1)[:k]
+    best = best[np.lexsort((best, -flat[best]))]
+    rows, cols = np.divmod(best, len(timeline))
+
+    def picked(m: np.ndarray) -> list:
+        return [None if v != v else round(v, 3) for v in m[rows, cols].tolist()]
+
+    columns = {
+        "spot": [spots[row] for row in rows.tolist()],
+        "timestamp": timeline[cols].tolist(),
+        "local_datetime": local_datetimes(
+            timeline[cols], utc_offset[rows, cols].astype(np.int64)
+        ),
+        "score": picked(score),
+        "surf_min": picked(surf_min),
+        "surf_max": picked(surf_max),
+        "wind_speed": picked(wind_speed),
+        "rating_value": picked(rating),
+        "tide_height": picked(tide_height),
+    }
+    breakdown = {name: picked(m) for name, m in components.items()}
+    names = list(columns)
+    return [
+        {**dict(zip(names, row)), "components": dict(zip(breakdown, parts))}
+        for row, parts in zip(zip(*columns.values()), zip(*breakdown.values()))
+    ]
@@ -0,0 +1,368 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Hashable, Optional, Tuple
+from urllib.parse import urlparse
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Where workers share parsed upstream responses: "sqlite:///path/to/file.db",
+# "redis://host:port/db" (needs the optional redis package) or "memory://"
+# (one process only, for tests). Empty disables the shared tier.
+SHARED_CACHE_URL = os.environ.get("SURF_SHARED_CACHE", "")
+# Seconds a worker may hold the refresh lease for a key before another
+# worker is allowed to take over.
+LEASE_TTL = float(os.environ.get("SURF_SHARED_LEASE_TTL", 30))
+# Seconds a worker that lost the lease waits for the holder's result before
+# fetching upstream itself.
+LEASE_WAIT = float(os.environ.get("SURF_SHARED_LEASE_WAIT", 10))
+LEASE_POLL = float(os.environ.get("SURF_SHARED_LEASE_POLL", 0.05))
+# Seconds entries are kept after they expire before they are deleted.
+KEEP_AFTER_EXPIRY = float(os.environ.get("SURF_SHARED_KEEP_AFTER_EXPIRY", 10 * 60))
+
+
+class SharedBackend(ABC):
+    """Key-value store with expiring entries and leases, shared by workers.
+
+    Values are opaque bytes. `acquire` must be atomic across processes:
+    of all workers asking for the same key while no lease is held, exactly
+    one gets it. Methods are blocking and called from a worker thread.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, keep_for: float):
+        ...
+
+    @abstractmethod
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        ...
+
+    @abstractmethod
+    def release(self, key: str, owner: str):
+        ...
+
+    def close(self):
+        pass
+
+
+class MemoryBackend(SharedBackend):
+    """In-process backend; shares nothing between workers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[bytes, float]] = {}
+        self._leases: Dict[str, Tuple[str, float]] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                return None
+            return entry[0]
+
+    def set(self, key: str, value: bytes, keep_for: float):
+        with self._lock:
+            self._entries[key] = (value, time.time() + keep_for)
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is not None and lease[1] > now and lease[0] != owner:
+                return False
+            self._leases[key] = (owner, now + ttl)
+            return True
+
+    def release(self, key: str, owner: str):
+        with self._lock:
+            if self._leases.get(key, (None,))[0] == owner:
+                del self._leases[key]
+
+
+class SQLiteBackend(SharedBackend):
+    """Backend in a SQLite file, shared by every worker on the host.
+
+    WAL mode lets readers run alongside a writer, and leases are taken in
+    an IMMEDIATE transaction so two workers can never both hold one. Put
+    the file on a local (ideally tmpfs) filesystem.
+    """
+
+    PURGE_EVERY = 256
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=5, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries"
+            " (key TEXT PRIMARY KEY, value BLOB NOT NULL, keep_until REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases"
+            " (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE key = ? AND keep_until > ?",
+                (key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, keep_for: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                (key, value, now + keep_for),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM entries WHERE keep_until <= ?", (now,))
+                self._conn.execute("DELETE FROM leases WHERE expires_at <= ?", (now,))
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "DELETE FROM leases WHERE key = ? AND (expires_at <= ? OR owner = ?)",
+                    (key, now, owner),
+                )
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO leases VALUES (?, ?, ?)",
+                    (key, owner, now + ttl),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return cursor.rowcount == 1
+
+    def release(self, key: str, owner: str):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisBackend(SharedBackend):
+    """Backend on a redis-py compatible client, so workers on many hosts share it.
+
+    Any object with redis-py's `get`, `set(..., nx=, px=)` and `delete`
+    works, which lets tests pass an in-memory stand-in. Releasing checks the
+    owner before deleting; the lease TTL covers the short gap in between.
+    """
+
+    def __init__(self, client, prefix: str = "surf:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, keep_for: float):
+        self.client.set(self.prefix + key, value, px=max(1, int(keep_for * 1000)))
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        lease = f"{self.prefix}lease:{key}"
+        return bool(self.client.set(lease, owner, nx=True, px=int(ttl * 1000)))
+
+    def release(self, key: str, owner: str):
+        lease = f"{self.prefix}lease:{key}"
+        held = self.client.get(lease)
+        if (
+            held is not None
+            and (held.decode() if isinstance(held, bytes) else held) == owner
+        ):
+            self.client.delete(lease)
+
+    def close(self):
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
+
+
+def open_backend(url: str) -> Optional[SharedBackend]:
+    """Backend for a `SURF_SHARED_CACHE` URL, None when the URL is empty."""
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemoryBackend()
+    if parsed.scheme == "sqlite":
+        return SQLiteBackend(parsed.path or ":memory:")
+    if parsed.scheme in ("redis", "rediss"):
+        import redis
+
+        return RedisBackend(redis.Redis.from_url(url))
+    raise ValueError(f"Unsupported shared cache URL: {url}")
+
+
+class Shared:
+    """A shared tier entry: the encoded value and its cache metadata."""
+
+    __slots__ = ("body", "expires_at", "run_init", "version")
+
+    def __init__(self, body: bytes, expires_at: float, run_init, version):
+        self.body = body
+        self.expires_at = expires_at
+        self.run_init = run_init
+        self.version = version
+
+    def encode(self) -> bytes:
+        header = orjson.dumps([self.expires_at, self.run_init, self.version])
+        return header + b"\n" + self.body
+
+    @classmethod
+    def decode(cls, blob: bytes) -> "Shared":
+        header, _, body = blob.partition(b"\n")
+        expires_at, run_init, version = orjson.loads(header)
+        return cls(body, expires_at, run_init, version)
+
+
+class SharedCache:
+    """Async front for a `SharedBackend`, the tier behind each worker's cache.
+
+    A worker that misses its own cache first looks here. Only the worker
+    holding a key's lease fetches it upstream; the others wait for its
+    result to show up, so N workers make one upstream request per key.
+    """
+
+    def __init__(self, backend: Optional[SharedBackend]):
+        self.backend = backend
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.wait_timeouts = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return repr(key)
+
+    async def _call(self, method: str, *args) -> Any:
+        try:
+            return await asyncio.to_thread(getattr(self.backend, method), *args)
+        except Exception as e:
+            # The shared tier is an optimization; never fail a request on it.
+            self.errors += 1
+            logger.warning("Shared cache %s failed: %r", method, e)
+            return None
+
+    async def _fresh(
+        self, key: Hashable, newer_than: Optional[float] = None
+    ) -> Optional[Shared]:
+        blob = await self._call("get", self._key(key))
+        if blob is not None:
+            entry = Shared.decode(blob)
+            if entry.expires_at > max(time.time(), newer_than or 0):
+                return entry
+        return None
+
+    async def _take_lease(
+        self, key: Hashable, newer_than: Optional[float] = None
+    ) -> Tuple[bool, Optional[Shared]]:
+        # A backend error counts as holding the lease, so the worker falls
+        # back to fetching upstream itself.
+        acquired = await self._call("acquire", self._key(key), self.owner, LEASE_TTL)
+        if acquired is not None and not acquired:
+            return False, None
+        # The previous holder may have stored its result just before
+        # releasing the lease.
+        entry = await self._fresh(key, newer_than)
+        if entry is not None:
+            await self.release(key)
+        return True, entry
+
+    async def get_or_lease(
+        self, key: Hashable, newer_than: Optional[float] = None
+    ) -> Optional[Shared]:
+        """The fresh shared entry for `key`, waiting for another worker if needed.
+
+        With `newer_than`, only an entry expiring after it is returned, so a
+        refresh is not answered with the copy it is replacing. Returns None
+        when this worker should fetch upstream: it then holds the lease (or
+        waited `LEASE_WAIT` seconds in vain) and must call `set` with the
+        result and `release` when done.
+        """
+        entry = await self._fresh(key, newer_than)
+        if entry is None:
+            acquired, entry = await self._take_lease(key, newer_than)
+            if not acquired:
+                entry = await self._wait(key, newer_than)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    async def _wait(
+        self, key: Hashable, newer_than: Optional[float] = None
+    ) -> Optional[Shared]:
+        # Poll for the holder's result, taking the lease over if the holder
+        # released it without storing anything or let it lapse.
+        self.waits += 1
+        deadline = time.monotonic() + LEASE_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LEASE_POLL)
+            entry = await self._fresh(key, newer_than)
+            if entry is not None:
+                return entry
+            acquired, entry = await self._take_lease(key, newer_than)
+            if acquired:
+                return entry
+        self.wait_timeouts += 1
+        return None
+
+    async def set(self, key: Hashable, entry: Shared):
+        keep_for = entry.expires_at - time.time() + KEEP_AFTER_EXPIRY
+        if keep_for > 0:
+            await self._call("set", self._key(key), entry.encode(), keep_for)
+
+    async def release(self, key: Hashable):
+        await self._call("release", self._key(key), self.owner)
+
+    def close(self):
+        if self.backend is not None:
+            self.backend.close()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "waits": self.waits,
+            "wait_timeouts": self.wait_timeouts,
+            "errors": self.errors,
+        }
+
+
+shared_cache = SharedCache(open_backend(SHARED_CACHE_URL))
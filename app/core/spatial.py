@@ -0,0 +1,106 @@
+import heapq
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_unit_vectors(latitudes, longitudes) -> np.ndarray:
+    """Map latitude/longitude in degrees to points on the unit sphere."""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    """Great-circle distance for a straight-line distance on the unit sphere."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / 2, 1.0))
+
+
+class KDTree:
+    """Static k-d tree for k-nearest-neighbour queries on 3D points.
+
+    Latitude/longitude pairs are indexed as unit vectors, so straight-line
+    distance orders points exactly like great-circle distance and there is
+    no special casing at the poles or the antimeridian. Points are
+    reordered into contiguous leaves of up to `leaf_size` rows, which are
+    scanned with numpy.
+    """
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 16):
+        self.leaf_size = leaf_size
+        self.index = np.arange(len(points))
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        # (start, end, axis, split, left, right); axis -1 marks a leaf.
+        self._nodes: List[Tuple[int, int, int, float, int, int]] = []
+        if len(points):
+            self._build(points, 0, len(points))
+        self.points = points[self.index]
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _build(self, points: np.ndarray, start: int, end: int) -> int:
+        node = len(self._nodes)
+        self._nodes.append((start, end, -1, 0.0, -1, -1))
+        if end - start <= self.leaf_size:
+            return node
+
+        rows = self.index[start:end]
+        block = points[rows]
+        axis = int(np.argmax(block.max(axis=0) - block.min(axis=0)))
+        mid = (end - start) // 2
+        order = np.argpartition(block[:, axis], mid)
+        self.index[start:end] = rows[order]
+        split = float(points[self.index[start + mid], axis])
+        left = self._build(points, start, start + mid)
+        right = self._build(points, start + mid, end)
+        self._nodes[node] = (start, end, axis, split, left, right)
+        return node
+
+    def query(
+        self, point: np.ndarray, k: int = 1, allowed: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Distances and original row numbers of the `k` nearest points.
+
+        `allowed` is an optional boolean mask over the original rows; rows
+        where it is False are never returned.
+        """
+        if not len(self) or k <= 0:
+            return np.empty(0), np.empty(0, dtype=np.int64)
+
+        point = np.asarray(point, dtype=np.float64).reshape(3)
+        allowed_sorted = allowed[self.index] if allowed is not None else None
+        best: List[Tuple[float, int]] = []  # max-heap of (-distance², position)
+
+        def visit(node: int):
+            start, end, axis, split, left, right = self._nodes[node]
+            if axis < 0:
+                dist = ((self.points[start:end] - point) ** 2).sum(axis=1)
+                if allowed_sorted is not None:
+                    dist[~allowed_sorted[start:end]] = np.inf
+                for offset in np.argsort(dist)[:k].tolist():
+                    d = dist[offset]
+                    if d == np.inf:
+                        break
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, start + offset))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, start + offset))
+                    else:
+                        break
+                return
+
+            gap = point[axis] - split
+            near, far = (left, right) if gap < 0 else (right, left)
+            visit(near)
+            if len(best) < k or gap * gap < -best[0][0]:
+                visit(far)
+
+        visit(0)
+        best.sort(reverse=True)
+        distances = np.sqrt([-d for d, _ in best])
+        rows = self.index[[position for _, position in best]]
+        return distances, rows.astype(np.int64)
@@ -1,12 +1,28 @@
 import logging
 import os
+import time
 from http import HTTPStatus
 from typing import Optional, Tuple
 
-import requests
+import httpx
 from dotenv import load_dotenv
 
-from app.db.locations import REGIONS, SPOTS
+from app.core.auth import TokenManager
+from app.core.cache import cached, get_ttl
+from app.core.catalog import catalog
+from app.core.client import get_client
+from app.core.decoding import decode, loads
+from app.core.metrics import (
+    record_stage,
+    stage,
+    upstream_request_seconds,
+    upstream_requests,
+    upstream_response_bytes,
+)
+from app.core.resilience import UpstreamError, upstream
+from app.db.diskcache import disk_cache
+from app.db.locations import REGIONS
+from app.db.store import snapshot_store
 from app.models import (
     ConditionsResponse,
     NearbyResponse,
@@ -35,8 +51,22 @@ WIND_PATH = os.environ.get("WIND_PATH")
 TIDES_PATH = os.environ.get("TIDES_PATH")
 NEARBY_PATH = os.environ.get("NEARBY_PATH")
 
+# Data type of each upstream path, for the disk cache TTLs.
+PATH_KINDS = {
+    CONDITIONS_PATH: "conditions",
+    WAVE_PATH: "wave",
+    RATING_PATH: "rating",
+    WIND_PATH: "wind",
+    TIDES_PATH: "tide",
+    NEARBY_PATH: "nearby",
+}
+
+TOKEN_PARAM = "accesstoken,omitempty"
+# Response extension set on bodies served from the disk cache.
+FROM_DISK_CACHE = "surf_from_disk_cache"
 
-def get_access_token() -> int:
+
+async def _login() -> Optional[Tuple[str, Optional[float]]]:
     body = {
         "authorizationString": AUTH_STRING,
         "device_id": "Chrome-109.0.0.0",
@@ -48,139 +78,240 @@ def get_access_token() -> int:
     }
     params = {"isShortLived": False}
     url = f"{BASE_URL}{LOGIN_PATH}"
-    resp = requests.post(url, params=params, json=body)
+    resp = await get_client().post(url, params=params, json=body)
     if resp.status_code != 200:
-        print(f"{resp} {resp.text}")
-        return -1
+        logger.error("Login failed: %s %s", resp, resp.text)
+        return None
 
     r_json = resp.json()
-    logger.info(f"New access token: {r_json['access_token']}")
-    return 1
+    return r_json["access_token"], r_json.get("expires_in")
+
+
+token_manager = TokenManager(_login, token=ACCESS_TOKEN)
+
+
+async def get_access_token() -> int:
+    refreshed = await token_manager.refresh(force=True)
+    return 1 if refreshed else -1
+
+
+async def _send(path: str, url: str, params: dict, token: str) -> httpx.Response:
+    """One GET through the shared retry, circuit breaker and budget policy.
+
+    Failures that leave no upstream response (open circuit, timeouts,
+    connection errors) come back as a local 5xx response so fetchers can
+    treat them like any other failed request.
+    """
+
+    def send():
+        return get_client().get(url, params={**params, TOKEN_PARAM: token})
+
+    start = time.perf_counter()
+    try:
+        resp = await upstream.call(path, send)
+    except UpstreamError as e:
+        logger.error("GET %s failed: %s", url, e)
+        resp = httpx.Response(e.status, text=str(e), request=httpx.Request("GET", url))
+    elapsed = time.perf_counter() - start
+    upstream_request_seconds.observe(elapsed, path)
+    record_stage("upstream", elapsed)
+    upstream_requests.inc(path, str(resp.status_code))
+    upstream_response_bytes.observe(len(resp.content), path)
+    return resp
+
 
+async def _get(path: str, params: dict) -> httpx.Response:
+    """GET an upstream path with the current token, re-authenticating once on 401.
 
-def get_conditions(
+    Bodies stored in the disk cache are served without going upstream,
+    marked with `FROM_DISK_CACHE`, and successful responses are added to
+    it. In replay mode a request that was never recorded fails with a 503
+    instead of reaching the network.
+    """
+    url = f"{BASE_URL}{path}"
+    request = httpx.Request("GET", url, params=params)
+    body = await disk_cache.load(path, params)
+    if body is not None:
+        return httpx.Response(
+            HTTPStatus.OK,
+            content=body,
+            request=request,
+            extensions={FROM_DISK_CACHE: True},
+        )
+    if disk_cache.replay:
+        message = "Not recorded in the disk cache (replay mode)"
+        return httpx.Response(
+            HTTPStatus.SERVICE_UNAVAILABLE, text=message, request=request
+        )
+
+    token = await token_manager.get_token()
+    resp = await _send(path, url, params, token)
+    if resp.status_code == HTTPStatus.UNAUTHORIZED:
+        logger.warning("Unauthorized GET %s, refreshing access token", url)
+        if await token_manager.handle_unauthorized(token):
+            token = token_manager.token
+            resp = await _send(path, url, params, token)
+    if resp.status_code == HTTPStatus.OK:
+        ttl = get_ttl(PATH_KINDS.get(path, "nearby"))
+        await disk_cache.store(path, params, resp.content, ttl)
+    return resp
+
+
+@cached("conditions", ConditionsResponse)
+async def get_conditions(
     region: str = "oahu_north_shore", days: int = 8
 ) -> Tuple[HTTPStatus, Optional[ConditionsResponse]]:
     params = {
         "subregionId": REGIONS[region]["region_id"],
         "days": days,
-        "accesstoken,omitempty": ACCESS_TOKEN,
     }
-    url = f"{BASE_URL}{CONDITIONS_PATH}"
-    resp = requests.get(url, params=params)
+    resp = await _get(CONDITIONS_PATH, params)
     if resp.status_code != 200:
         return _handle_failure(resp)
 
-    r_json = resp.json()
+    r_json = loads(resp.content)
     r_json["region"] = region
-    return _parse_response(r_json, ConditionsResponse)
+    status, data = _parse_response(r_json, ConditionsResponse)
+    if data and _from_upstream(resp):
+        snapshot_store.record_conditions(region, data)
+    return status, data
 
 
-def get_wave(
+@cached("wave", WaveResponse)
+async def get_wave(
     spot: str, days: int = 3, interval_hours: int = 8, max_heights: bool = False
 ) -> Tuple[HTTPStatus, Optional[WaveResponse]]:
-    spot_data = SPOTS.get(spot)
+    spot, spot_data = _spot(spot)
     params = {
         "spotId": spot_data.get("spot_id"),
         "days": days,
         "intervalHours": interval_hours,
         "maxHeights": max_heights,
-        "accesstoken,omitempty": ACCESS_TOKEN,
     }
-    url = f"{BASE_URL}{WAVE_PATH}"
-    resp = requests.get(url, params=params)
+    resp = await _get(WAVE_PATH, params)
     if resp.status_code != 200:
         return _handle_failure(resp)
 
-    r_json = resp.json()
+    r_json = loads(resp.content)
     r_json["spot"] = spot_data.get("name")
-    return _parse_response(r_json, WaveResponse)
+    status, data = _parse_response(r_json, WaveResponse)
+    if data and _from_upstream(resp):
+        snapshot_store.record_forecast("wave", spot, data)
+    return status, data
 
 
-def get_rating(
+@cached("rating", RatingResponse)
+async def get_rating(
     spot: str, days: int = 3, interval_hours: int = 8
 ) -> Tuple[HTTPStatus, Optional[RatingResponse]]:
-    spot_data = SPOTS.get(spot)
+    spot, spot_data = _spot(spot)
     params = {
         "spotId": spot_data.get("spot_id"),
         "days": days,
         "intervalHours": interval_hours,
-        "accesstoken,omitempty": ACCESS_TOKEN,
     }
-    url = f"{BASE_URL}{RATING_PATH}"
-    resp = requests.get(url, params=params)
+    resp = await _get(RATING_PATH, params)
     if resp.status_code != 200:
         return _handle_failure(resp)
 
-    r_json = resp.json()
+    r_json = loads(resp.content)
     r_json["spot"] = spot_data.get("name")
-    return _parse_response(r_json, RatingResponse)
+    status, data = _parse_response(r_json, RatingResponse)
+    if data and _from_upstream(resp):
+        snapshot_store.record_forecast("rating", spot, data)
+    return status, data
 
 
-def get_wind(
+@cached("wind", WindResponse)
+async def get_wind(
     spot: str, days: int = 3, interval_hours: int = 8
 ) -> Tuple[HTTPStatus, Optional[WindResponse]]:
-    spot_data = SPOTS.get(spot)
+    spot, spot_data = _spot(spot)
     params = {
         "spotId": spot_data.get("spot_id"),
         "days": days,
         "intervalHours": interval_hours,
         "corrected": True,
-        "accesstoken,omitempty": ACCESS_TOKEN,
     }
-    url = f"{BASE_URL}{WIND_PATH}"
-    resp = requests.get(url, params=params)
+    resp = await _get(WIND_PATH, params)
     if resp.status_code != 200:
         return _handle_failure(resp)
 
-    r_json = resp.json()
+    r_json = loads(resp.content)
     r_json["spot"] = spot_data.get("name")
-    return _parse_response(r_json, WindResponse)
+    status, data = _parse_response(r_json, WindResponse)
+    if data and _from_upstream(resp):
+        snapshot_store.record_forecast("wind", spot, data)
+    return status, data
 
 
-def get_tide(spot: str, days: int = 3) -> Tuple[HTTPStatus, Optional[TideResponse]]:
-    spot_data = SPOTS.get(spot)
+@cached("tide", TideResponse)
+async def get_tide(
+    spot: str, days: int = 3
+) -> Tuple[HTTPStatus, Optional[TideResponse]]:
+    spot, spot_data = _spot(spot)
     params = {
         "spotId": spot_data.get("spot_id"),
         "days": days,
-        "accesstoken,omitempty": ACCESS_TOKEN,
     }
-    url = f"{BASE_URL}{TIDES_PATH}"
-    resp = requests.get(url, params=params)
+    resp = await _get(TIDES_PATH, params)
     if resp.status_code != 200:
         return _handle_failure(resp)
 
-    r_json = resp.json()
+    r_json = loads(resp.content)
     r_json["spot"] = spot_data.get("name")
-    return _parse_response(r_json, TideResponse)
+    status, data = _parse_response(r_json, TideResponse)
+    if data and _from_upstream(resp):
+        snapshot_store.record_forecast("tide", spot, data)
+    return status, data
 
 
-def get_nearby(lat: float, long: float) -> Tuple[HTTPStatus, Optional[NearbyResponse]]:
+@cached("nearby", NearbyResponse)
+async def get_nearby(
+    lat: float, long: float
+) -> Tuple[HTTPStatus, Optional[NearbyResponse]]:
     params = {
         "latitude": lat,
         "longitude": long,
-        "accesstoken,omitempty": ACCESS_TOKEN,
     }
-    url = f"{BASE_URL}{NEARBY_PATH}"
-    resp = requests.get(url, params=params)
+    resp = await _get(NEARBY_PATH, params)
     if resp.status_code != 200:
-        logger.error("Failed GET %s", url)
         return _handle_failure(resp)
 
-    r_json = resp.json()
-    return _parse_response(r_json, NearbyResponse)
+    r_json = loads(resp.content)
+    status, data = _parse_response(r_json, NearbyResponse)
+    if data:
+        catalog.observe_buoys(data)
+        if _from_upstream(resp):
+            snapshot_store.record_buoys(data)
+    return status, data
+
+
+def _spot(spot: str) -> Tuple[str, dict]:
+    """Slug and catalog entry of a spot given by slug, spot id or name."""
+    slug = catalog.get_spot(spot)
+    if slug is None:
+        raise ValueError(f"Unknown spot {spot}")
+    return slug, catalog.spots[slug]
+
+
+def _from_upstream(resp: httpx.Response) -> bool:
+    """False for disk cache hits, which were recorded when first fetched."""
+    return not resp.extensions.get(FROM_DISK_CACHE)
 
 
-def _handle_failure(resp):
-    logger.error(resp)
-    logger.error(resp.json())
+def _handle_failure(resp: httpx.Response):
+    # Error bodies are not always JSON (proxies, gateways, local failures),
+    # so only log a bounded slice of the raw text.
+    logger.error("Failed GET %s: %s %.500s", resp.request.url, resp, resp.text)
     return HTTPStatus(resp.status_code), None
 
 
 def _parse_response(resp_json, resp_model):
     r_data = None
     try:
-        r_data = resp_model.parse_obj(resp_json)
+        with stage(f"parse_{resp_model.__name__}"):
+            r_data = decode(resp_json, resp_model)
     except Exception as e:
         logger.error(str(e))
         return HTTPStatus.INTERNAL_SERVER_ERROR, r_data
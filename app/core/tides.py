@@ -0,0 +1,193 @@
+import logging
+import time
+from http import HTTPStatus
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.cache import response_cache
+from app.core.metrics import timed
+from app.core.series import HOUR, TideSeries, forecast_days, get_series, nullable
+from app.core.surfline import get_tide
+from app.core.timeconv import local_datetimes
+from app.db.locations import SPOTS
+from app.models import TideResponse
+
+logger = logging.getLogger(__name__)
+
+EXTREME_TYPES = ("HIGH", "LOW")
+# Widest cached tide forecast worth looking for, /tide at its 16 day horizon.
+MAX_TIDE_DAYS = forecast_days(16 * 24)
+
+
+class TideCurve:
+    """Tide height at any time, built from the highs and lows of a forecast.
+
+    Between two consecutive extremes the height follows half a cosine
+    wave, which has the slack water at the turn of the tide that a straight
+    line misses. The half cycles next to the first and last extremes are
+    mirrored outwards, so the curve covers every time the forecast covers
+    and is NaN outside of it. Heights are clamped to the tide station's
+    `min` and `max`. With fewer than two extremes the forecast points are
+    joined with straight lines instead.
+
+    All queries take whole timestamp arrays.
+    """
+
+    def __init__(
+        self,
+        series: TideSeries,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+    ):
+        self.low = low
+        self.high = high
+        known = ~np.isnan(series.height)
+        times = series.timestamp[known].astype(np.float64)
+        heights = series.height[known]
+        self.start = times[0] if len(times) else np.nan
+        self.end = times[-1] if len(times) else np.nan
+
+        extremes = np.isin(series.type[known], EXTREME_TYPES)
+        self.cosine = int(extremes.sum()) >= 2
+        if self.cosine:
+            times, heights = times[extremes], heights[extremes]
+            times = np.concatenate(([2 * times[0] - times[1]], times))
+            times = np.concatenate((times, [2 * times[-1] - times[-2]]))
+            heights = np.concatenate(([heights[1]], heights, [heights[-2]]))
+        # Repeated timestamps would make zero length segments.
+        keep = np.diff(times, prepend=-np.inf) > 0
+        self._times = times[keep]
+        self._heights = heights[keep]
+        self._offsets = series.timestamp, series.utc_offset
+
+    @classmethod
+    def from_response(cls, response: TideResponse) -> "TideCurve":
+        location = response.associated.tideLocation
+        return cls(get_series(response), location.min, location.max)
+
+    @classmethod
+    def empty(cls) -> "TideCurve":
+        return cls(TideSeries.empty())
+
+    def query(self, timestamps: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Heights and rates of change per hour at `timestamps`.
+
+        Both are NaN where the forecast has no data. The rate is zero at
+        the turns of the tide; `rising` tells which way it goes next.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if len(self._times) < 2:
+            nans = np.full(len(timestamps), np.nan)
+            return nans, nans.copy()
+        i = np.searchsorted(self._times, timestamps, side="right") - 1
+        i = np.clip(i, 0, len(self._times) - 2)
+        t0, t1 = self._times[i], self._times[i + 1]
+        h0, h1 = self._heights[i], self._heights[i + 1]
+        span = t1 - t0
+        if self.cosine:
+            phase = np.pi * (timestamps - t0) / span
+            heights = h0 + (h1 - h0) * (1 - np.cos(phase)) / 2
+            rates = (h1 - h0) * np.pi * np.sin(phase) / (2 * span) * HOUR
+        else:
+            heights = h0 + (h1 - h0) * (timestamps - t0) / span
+            rates = (h1 - h0) / span * HOUR
+        outside = self._outside(timestamps)
+        heights[outside] = np.nan
+        rates[outside] = np.nan
+        return self._clamp(heights), rates
+
+    def heights(self, timestamps: Sequence[int]) -> np.ndarray:
+        return self.query(timestamps)[0]
+
+    def rising(self, timestamps: Sequence[int]) -> np.ndarray:
+        """True where the tide is rising, from the segment each time falls in."""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if len(self._times) < 2:
+            return np.zeros(len(timestamps), dtype=bool)
+        i = np.searchsorted(self._times, timestamps, side="right") - 1
+        i = np.clip(i, 0, len(self._times) - 2)
+        return self._heights[i + 1] > self._heights[i]
+
+    def states(self, timestamps: Sequence[int]) -> List[Optional[str]]:
+        """ "rising" or "falling" at each timestamp, None where not covered."""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        outside = self._outside(timestamps).tolist()
+        return [
+            None if out else "rising" if up else "falling"
+            for out, up in zip(outside, self.rising(timestamps).tolist())
+        ]
+
+    def utc_offsets(self, timestamps: Sequence[int]) -> np.ndarray:
+        """Upstream utcOffset in force at each timestamp."""
+        stamps, offsets = self._offsets
+        if not len(stamps):
+            return np.zeros(len(timestamps), dtype=np.int64)
+        i = np.searchsorted(stamps, timestamps, side="right") - 1
+        return offsets[np.clip(i, 0, len(stamps) - 1)]
+
+    def _outside(self, timestamps: np.ndarray) -> np.ndarray:
+        return ~((timestamps >= self.start) & (timestamps <= self.end))
+
+    def _clamp(self, heights: np.ndarray) -> np.ndarray:
+        if self.low is not None or self.high is not None:
+            heights = np.clip(heights, self.low, self.high)
+        return heights
+
+
+def get_tide_curve(response: TideResponse) -> TideCurve:
+    """Tide curve for a parsed response, built once and kept on it."""
+    curve = response._curve
+    if curve is None:
+        curve = response._curve = TideCurve.from_response(response)
+    return curve
+
+
+def _cached_days(spot: str, days: int) -> int:
+    """Days of the narrowest fresh cached tide forecast covering `days`.
+
+    Any wider forecast already fetched for a report or sessions covers the
+    requested times, which are looked up on it; without one, `days` is
+    what /best-sessions fetches for the same horizon.
+    """
+    now = time.time()
+    for wider in range(days, MAX_TIDE_DAYS + 1):
+        entry = response_cache.peek(("tide", spot, wider))
+        if entry is not None and entry.is_fresh(now):
+            return wider
+    return days
+
+
+async def get_tide_heights(spot: str, timestamps: Sequence[int]) -> Optional[dict]:
+    """Tide height and direction at each timestamp, from the cached forecast."""
+    if spot not in SPOTS:
+        logger.warning("Unknown spot %s", spot)
+        return None
+    start = int(time.time()) // HOUR * HOUR
+    days = forecast_days(max(1, (max(timestamps) - start) // HOUR + 1))
+    status, data = await get_tide(spot, _cached_days(spot, days))
+    if status != HTTPStatus.OK or not data:
+        return None
+    return build_tide_heights(spot, data, timestamps)
+
+
+@timed("build_tide_heights")
+def build_tide_heights(spot: str, data: TideResponse, timestamps: Sequence[int]):
+    curve = get_tide_curve(data)
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    heights, rates = curve.query(timestamps)
+
+    columns = {
+        "timestamp": timestamps.tolist(),
+        "local_datetime": local_datetimes(timestamps, curve.utc_offsets(timestamps)),
+        "height": nullable(np.round(heights, 3)),
+        "rate": nullable(np.round(rates, 3)),
+        "state": curve.states(timestamps),
+    }
+    names = list(columns)
+    return {
+        "spot_name": SPOTS[spot]["name"],
+        "units": data.associated.units.tideHeight,
+        "location": data.associated.tideLocation,
+        "points": [dict(zip(names, row)) for row in zip(*columns.values())],
+    }
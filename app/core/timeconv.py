@@ -0,0 +1,54 @@
+import logging
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from itertools import repeat
+from typing import List, Optional, Sequence, Union
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> tzinfo:
+    """Cached tz database zone, so each name is only loaded once."""
+    if name.upper() == "UTC":
+        return timezone.utc
+    return ZoneInfo(name)
+
+
+@lru_cache(maxsize=None)
+def get_fixed_zone(utc_offset: float) -> timezone:
+    """Cached fixed-offset zone for an upstream utcOffset in hours."""
+    return timezone(timedelta(hours=utc_offset))
+
+
+def to_local(timestamp: int, zone: str) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=get_zone(zone))
+
+
+def local_datetimes(
+    timestamps: Sequence[int],
+    utc_offsets: Union[Sequence[float], float, None] = None,
+    zone: Optional[str] = None,
+) -> List[datetime]:
+    """Convert a whole timestamp array to aware local datetimes in one pass.
+
+    With `utc_offsets` (hours, as supplied on every upstream interval) each
+    timestamp gets a cached fixed-offset zone and the tz database is never
+    consulted. Otherwise all timestamps are converted in the cached `zone`,
+    which handles DST transitions and repeated wall times.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64).tolist()
+    if utc_offsets is None:
+        zones = repeat(get_zone(zone), len(timestamps))
+    elif np.ndim(utc_offsets) == 0:
+        zones = repeat(get_fixed_zone(float(utc_offsets)), len(timestamps))
+    else:
+        offsets = np.asarray(utc_offsets, dtype=np.float64)
+        if len(offsets) and offsets.min() == offsets.max():
+            zones = repeat(get_fixed_zone(float(offsets[0])), len(timestamps))
+        else:
+            zones = map(get_fixed_zone, offsets.tolist())
+    return list(map(datetime.fromtimestamp, timestamps, zones))
@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+workdir = os.getcwd()
+
+# Directory of the on-disk cache of raw upstream responses; an empty value
+# disables it.
+DISK_CACHE_DIR = os.environ.get("SURF_DISK_CACHE_DIR", f"{workdir}/.surf_cache")
+DISK_CACHE_MAX_BYTES = int(os.environ.get("SURF_DISK_CACHE_MAX_BYTES", 256 * 2**20))
+# "normal" serves fresh entries and stores new responses, "record" always
+# goes upstream and stores what it gets, "replay" serves stored responses
+# whatever their age and never goes upstream.
+DISK_CACHE_MODES = ("normal", "record", "replay")
+DISK_CACHE_MODE = os.environ.get("SURF_DISK_CACHE_MODE", "normal")
+COMPRESS_LEVEL = int(os.environ.get("SURF_DISK_CACHE_COMPRESS_LEVEL", 6))
+
+if DISK_CACHE_MODE not in DISK_CACHE_MODES:
+    raise ValueError(f"SURF_DISK_CACHE_MODE must be one of {DISK_CACHE_MODES}")
+
+# Expiry of the disk entry the current fetch was answered from, None when it
+# went upstream. The response cache reads it so a body loaded from disk
+# keeps its remaining lifetime instead of getting a fresh one.
+disk_hit_expiry: ContextVar[Optional[float]] = ContextVar(
+    "disk_hit_expiry", default=None
+)
+
+_bypass: ContextVar[bool] = ContextVar("disk_cache_bypass", default=False)
+
+MAGIC = b"SRC1"
+# expires_at, stored_at, length of the key that follows the header
+HEADER = struct.Struct("<ddI")
+
+
+def cache_key(path: str, params: dict) -> bytes:
+    return orjson.dumps([path, sorted((k, str(v)) for k, v in params.items())])
+
+
+@contextmanager
+def bypass_disk_cache():
+    """Send fetches made in the block upstream; their responses are still stored.
+
+    Refreshes use it, since a stored body is never newer than the entry
+    being refreshed, and so do pollers that need the latest data.
+    """
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+class DiskCache:
+    """Compressed raw upstream responses on disk, one file per request.
+
+    Each file holds a small header (expiry, store time, request key) and
+    the zlib compressed body. Reads map the file and decompress straight
+    from the mapping. Files are written to a temporary name and renamed,
+    so several workers can share the directory. When the directory grows
+    past `max_bytes`, expired entries and then the least recently used
+    ones are deleted. Nothing is read at startup; the directory size is
+    only measured on the first write.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, mode: str = "normal"):
+        self.directory = Path(directory) if directory else None
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self._size: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    @property
+    def replay(self) -> bool:
+        return self.enabled and self.mode == "replay"
+
+    def _path(self, key: bytes) -> Path:
+        return self.directory / (hashlib.sha1(key).hexdigest() + ".zz")
+
+    def _read(self, key: bytes) -> Optional[Tuple[float, bytes]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mm:
+                if mm[: len(MAGIC)] != MAGIC:
+                    return None
+                expires_at, _, key_length = HEADER.unpack_from(mm, len(MAGIC))
+                start = len(MAGIC) + HEADER.size
+                if mm[start : start + key_length] != key:
+                    return None
+                with memoryview(mm)[start + key_length :] as compressed:
+                    body = zlib.decompress(compressed)
+            os.utime(path)
+        except (OSError, ValueError, struct.error, zlib.error) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning("Unreadable disk cache entry %s: %r", path, e)
+            return None
+        return expires_at, body
+
+    def _write(self, key: bytes, body: bytes, ttl: float):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self._size is None:
+            self._size = self._measure()
+        now = time.time()
+        data = b"".join(
+            (
+                MAGIC,
+                HEADER.pack(now + ttl, now, len(key)),
+                key,
+                zlib.compress(body, COMPRESS_LEVEL),
+            )
+        )
+        path = self._path(key)
+        # Writes of the same key from other threads and workers each get
+        # their own temp file, so only a complete body is renamed into place.
+        with tempfile.NamedTemporaryFile(
+            dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False
+        ) as tmp:
+            tmp.write(data)
+        try:
+            os.replace(tmp.name, path)
+        except OSError:
+            os.remove(tmp.name)
+            raise
+        self._size += len(data)
+        self.writes += 1
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _measure(self) -> int:
+        return sum(
+            entry.stat().st_size
+            for entry in os.scandir(self.directory)
+            if entry.name.endswith(".zz")
+        )
+
+    def _evict(self):
+        # Other workers write to the same directory, so start from the real
+        # contents rather than this worker's running total.
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".zz"):
+                continue
+            stat = entry.stat()
+            expired = self._expires_at(entry.path) <= now
+            entries.append((not expired, stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        size = sum(e[2] for e in entries)
+        target = self.max_bytes * 0.9
+        for _, _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+            self.evictions += 1
+        self._size = size
+
+    @staticmethod
+    def _expires_at(path: str) -> float:
+        try:
+            with open(path, "rb") as f:
+                head = f.read(len(MAGIC) + HEADER.size)
+            return HEADER.unpack_from(head, len(MAGIC))[0]
+        except (OSError, struct.error):
+            return 0.0
+
+    async def load(self, path: str, params: dict) -> Optional[bytes]:
+        """Stored body for the request, if fresh (or stored at all in replay).
+
+        Outside replay mode a hit sets `disk_hit_expiry` to the entry's expiry.
+        """
+        if not self.enabled or self.mode == "record":
+            return None
+        if _bypass.get() and not self.replay:
+            return None
+        entry = await asyncio.to_thread(self._read, cache_key(path, params))
+        if entry is None or (not self.replay and entry[0] <= time.time()):
+            self.misses += 1
+            return None
+        self.hits += 1
+        if not self.replay:
+            disk_hit_expiry.set(entry[0])
+        return entry[1]
+
+    async def store(self, path: str, params: dict, body: bytes, ttl: float):
+        if not self.enabled or self.replay:
+            return
+        try:
+            await asyncio.to_thread(self._write, cache_key(path, params), body, ttl)
+        except OSError as e:
+            logger.warning("Could not write disk cache entry for %s: %r", path, e)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "mode": self.mode,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "bytes": self._size,
+        }
+
+
+disk_cache = DiskCache(DISK_CACHE_DIR, DISK_CACHE_MAX_BYTES, DISK_CACHE_MODE)
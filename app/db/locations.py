@@ -1,44 +1,25 @@
-REGIONS = {
-    "oahu_north_shore": {
-        "region_id": "58581a836630e24c44878fcb",
-        "full_name": "North Shore Oahu",
-        "latitude": 21.604,
-        "longitude": -158.109,
-        "timezone": "HST",
-        "buoy_id": "44448078-cecd-11eb-94ae-024238d3b313",
-    },
-    "oahu_south_shore": "58581a836630e24c44878fcd",
-    "san_francisco": "58581a836630e24c44879010",
-    "costa_rica_north": "58581a836630e24c4487901e",
-    "costa_rica_central": "58581a836630e24c44878fea",
-    "costa_rica_south": "58581a836630e24c4487904a",
-    "costa_rica_caribbean": "58581a836630e24c4487901f",
-    "fiji_south": "58581a836630e24c44878ffa",
-}
+import os
+from pathlib import Path
 
-SPOTS = {
-    "pipeline": {
-        "spot_id": "5842041f4e65fad6a7708890",
-        "country": "US",
-        "name": "Pipeline",
-        "region": "oahu_north_shore",
-    },
-    "laniakea": {
-        "spot_id": "5842041f4e65fad6a7708898",
-        "country": "US",
-        "name": "Laniakea",
-        "region": "oahu_north_shore",
-    },
-    "haleiwa": {
-        "spot_id": "5842041f4e65fad6a7708df5",
-        "country": "US",
-        "name": "Haleiwa",
-        "region": "oahu_north_shore",
-    },
-    "bowls": {
-        "spot_id": "5842041f4e65fad6a7708b42",
-        "country": "US",
-        "name": "Ala Moana Bowls",
-        "region": "oahu_south_shore",
-    },
-}
+import orjson
+
+# JSON file with "regions", "spots" and "buoys" maps. Point this at a larger
+# export to serve a bigger catalog; the bundled file covers the default spots.
+CATALOG_PATH = os.environ.get(
+    "SURF_CATALOG_PATH", str(Path(__file__).parent / "catalog.json")
+)
+
+
+def load_catalog(path: str) -> dict:
+    with open(path, "rb") as f:
+        catalog = orjson.loads(f.read())
+    for section in ("regions", "spots", "buoys"):
+        catalog.setdefault(section, {})
+    return catalog
+
+
+_catalog = load_catalog(CATALOG_PATH)
+
+REGIONS = _catalog["regions"]
+SPOTS = _catalog["spots"]
+BUOYS = _catalog["buoys"]
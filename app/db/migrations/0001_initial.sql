@@ -0,0 +1,38 @@
+CREATE TABLE IF NOT EXISTS forecast_intervals (
+    spot TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    run_init INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    utc_offset INTEGER,
+    fetched_at INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (spot, kind, run_init, timestamp)
+);
+
+CREATE INDEX IF NOT EXISTS ix_forecast_intervals_spot_timestamp
+    ON forecast_intervals (spot, timestamp);
+
+CREATE INDEX IF NOT EXISTS ix_forecast_intervals_spot_run_init
+    ON forecast_intervals (spot, run_init);
+
+CREATE TABLE IF NOT EXISTS condition_reports (
+    region TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    forecast_day TEXT NOT NULL,
+    fetched_at INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (region, timestamp)
+);
+
+CREATE TABLE IF NOT EXISTS buoy_readings (
+    buoy_id TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    source_id TEXT NOT NULL,
+    height REAL,
+    period INTEGER,
+    direction INTEGER,
+    fetched_at INTEGER NOT NULL,
+    swells TEXT NOT NULL,
+    PRIMARY KEY (buoy_id, timestamp)
+);
@@ -0,0 +1,4 @@
+DROP INDEX IF EXISTS ix_forecast_intervals_spot_timestamp;
+
+CREATE INDEX IF NOT EXISTS ix_forecast_intervals_kind_spot_timestamp
+    ON forecast_intervals (kind, spot, timestamp);
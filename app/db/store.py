@@ -0,0 +1,306 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import List, Optional
+
+import orjson
+
+from app.models import ConditionsResponse, NearbyResponse
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+workdir = os.getcwd()
+
+# Path of the snapshot database; an empty value disables persistence.
+DB_PATH = os.environ.get("SURF_DB_PATH", f"{workdir}/surf_log.db")
+BATCH_SIZE = int(os.environ.get("SURF_DB_BATCH_SIZE", 500))
+FLUSH_INTERVAL = float(os.environ.get("SURF_DB_FLUSH_INTERVAL", 1.0))
+MAX_PENDING = int(os.environ.get("SURF_DB_MAX_PENDING", 10000))
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _statements(script: str) -> List[str]:
+    """Split an SQL script into its complete statements."""
+    statements, pending = [], ""
+    for line in script.splitlines(keepends=True):
+        pending += line
+        if sqlite3.complete_statement(pending):
+            statements.append(pending.strip())
+            pending = ""
+    if pending.strip():
+        statements.append(pending.strip())
+    return statements
+
+
+def migrate(conn: sqlite3.Connection):
+    """Apply numbered SQL files from migrations/ newer than user_version.
+
+    Every worker migrates at startup. Each file runs with its version bump
+    in an IMMEDIATE transaction, and the version is read again once the
+    write lock is held, so concurrent workers apply each file once.
+    """
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        number = int(path.name.split("_", 1)[0])
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if number > version:
+                logger.info("Applying migration %s", path.name)
+                for statement in _statements(path.read_text()):
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {number}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def _forecast_rows(item, fetched_at: int) -> list:
+    _, kind, spot, response = item
+    run_init = getattr(response.associated, "runInitializationTimestamp", None) or 0
+    intervals = getattr(response.data, {"tide": "tides"}.get(kind, kind))
+    return [
+        (
+            spot,
+            kind,
+            run_init,
+            i.timestamp,
+            i.utcOffset,
+            fetched_at,
+            orjson.dumps(i.dict()).decode(),
+        )
+        for i in intervals
+    ]
+
+
+def _condition_rows(item, fetched_at: int) -> list:
+    _, region, response = item
+    return [
+        (
+            region,
+            day.timestamp,
+            day.forecastDay.isoformat(),
+            fetched_at,
+            orjson.dumps(day.dict()).decode(),
+        )
+        for day in response.data.conditions
+    ]
+
+
+def _buoy_rows(item, fetched_at: int) -> list:
+    _, response = item
+    return [
+        (
+            b.id,
+            b.latestData.timestamp,
+            b.name,
+            b.sourceId,
+            b.latestData.height,
+            b.latestData.period,
+            b.latestData.direction,
+            fetched_at,
+            orjson.dumps([s.dict() for s in b.latestData.swells]).decode(),
+        )
+        for b in response.data
+    ]
+
+
+class SnapshotStore:
+    """Local SQLite log of every forecast run, condition report and buoy reading.
+
+    Fetchers hand parsed responses to the `record_*` methods, which only
+    enqueue them. A background task turns them into rows and writes them
+    in batches from a worker thread, keeping database work off the request
+    path.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    async def start(self):
+        if not self.enabled or self._task:
+            return
+        await asyncio.to_thread(self._migrate)
+        self._queue = asyncio.Queue(maxsize=MAX_PENDING)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self._task:
+            return
+        # The writer stores the batch it is collecting when it sees the
+        # sentinel, then anything enqueued after it is flushed here.
+        await self._queue.put(None)
+        await self._task
+        await self._flush()
+        self._task = None
+        self._queue = None
+
+    def _migrate(self):
+        with closing(connect(self.path)) as conn:
+            migrate(conn)
+
+    def _put(self, item):
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("Snapshot queue full, dropped %s", item[0])
+
+    def record_forecast(self, kind: str, spot: str, response):
+        self._put(("forecast", kind, spot, response))
+
+    def record_conditions(self, region: str, response: ConditionsResponse):
+        self._put(("conditions", region, response))
+
+    def record_buoys(self, response: NearbyResponse):
+        self._put(("buoys", response))
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(batch) < BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._write(batch)
+
+    async def _flush(self):
+        batch = []
+        while self._queue and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        if batch:
+            await self._write(batch)
+
+    async def _write(self, batch: list):
+        try:
+            await asyncio.to_thread(self._write_batch, batch)
+        except Exception:
+            logger.exception("Failed to write %s snapshots", len(batch))
+
+    def _write_batch(self, batch: list):
+        fetched_at = int(time.time())
+        forecasts, conditions, buoys = [], [], []
+        for item in batch:
+            if item[0] == "forecast":
+                forecasts.extend(_forecast_rows(item, fetched_at))
+            elif item[0] == "conditions":
+                conditions.extend(_condition_rows(item, fetched_at))
+            else:
+                buoys.extend(_buoy_rows(item, fetched_at))
+
+        with closing(connect(self.path)) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO forecast_intervals VALUES (?, ?, ?, ?, ?, ?, ?)",
+                forecasts,
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO condition_reports VALUES (?, ?, ?, ?, ?)",
+                conditions,
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO buoy_readings "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                buoys,
+            )
+        logger.debug(
+            "Stored %s forecast, %s condition and %s buoy rows",
+            len(forecasts),
+            len(conditions),
+            len(buoys),
+        )
+
+    async def _query(self, sql: str, params: tuple) -> List[sqlite3.Row]:
+        def run():
+            with closing(connect(self.path)) as conn:
+                conn.row_factory = sqlite3.Row
+                return conn.execute(sql, params).fetchall()
+
+        return await asyncio.to_thread(run)
+
+    async def get_forecast_history(
+        self,
+        spot: str,
+        kind: str,
+        start: int,
+        end: int,
+        run_init: Optional[int] = None,
+    ) -> List[dict]:
+        """Stored intervals in `[start, end)`, all runs or only `run_init`."""
+        sql = (
+            "SELECT run_init, data FROM forecast_intervals "
+            "WHERE spot = ? AND kind = ? AND timestamp >= ? AND timestamp < ?"
+        )
+        params = (spot, kind, start, end)
+        if run_init is not None:
+            sql += " AND run_init = ?"
+            params += (run_init,)
+        sql += " ORDER BY timestamp, run_init"
+        rows = await self._query(sql, params)
+        return [
+            {"run_init": row["run_init"], **orjson.loads(row["data"])} for row in rows
+        ]
+
+    async def get_forecast_runs(self, spot: str, kind: str) -> List[dict]:
+        rows = await self._query(
+            "SELECT run_init, COUNT(*) AS intervals, MIN(timestamp) AS start, "
+            "MAX(timestamp) AS end, MAX(fetched_at) AS fetched_at "
+            "FROM forecast_intervals WHERE spot = ? AND kind = ? "
+            "GROUP BY run_init ORDER BY run_init DESC",
+            (spot, kind),
+        )
+        return [dict(row) for row in rows]
+
+    async def get_condition_history(
+        self, region: str, start: int, end: int
+    ) -> List[dict]:
+        rows = await self._query(
+            "SELECT data FROM condition_reports "
+            "WHERE region = ? AND timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+            (region, start, end),
+        )
+        return [orjson.loads(row["data"]) for row in rows]
+
+    async def get_buoy_history(self, buoy_id: str, start: int, end: int) -> List[dict]:
+        rows = await self._query(
+            "SELECT * FROM buoy_readings "
+            "WHERE buoy_id = ? AND timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+            (buoy_id, start, end),
+        )
+        return [{**dict(row), "swells": orjson.loads(row["swells"])} for row in rows]
+
+
+snapshot_store = SnapshotStore(DB_PATH)
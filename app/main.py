@@ -1,14 +1,52 @@
 import logging
+import os
 
 from fastapi import FastAPI
 
 from app.api.api import api_router
+from app.api.middleware import (
+    CompressionMiddleware,
+    MetricsMiddleware,
+    ProfilingMiddleware,
+)
+from app.api.responses import FastJSONResponse
+from app.core.buoyfeed import buoy_feeds
+from app.core.client import close_client, open_client
+from app.core.prefetch import prefetcher
+from app.core.shared import shared_cache
+from app.core.surfline import token_manager
+from app.db.store import snapshot_store
 
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
 
 
 PROJECT_NAME: str = "surf-api"
 
-app = FastAPI(title=PROJECT_NAME, openapi_url=f"/openapi.json")
+app = FastAPI(
+    title=PROJECT_NAME,
+    openapi_url=f"/openapi.json",
+    default_response_class=FastJSONResponse,
+)
 
 app.include_router(api_router)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+
+@app.on_event("startup")
+async def startup():
+    await open_client()
+    await token_manager.start()
+    await snapshot_store.start()
+    await prefetcher.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await buoy_feeds.stop()
+    await prefetcher.stop()
+    await snapshot_store.stop()
+    await token_manager.stop()
+    await close_client()
+    shared_cache.close()
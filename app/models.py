@@ -1,7 +1,7 @@
 from datetime import date, datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 ## SUBMODELS
 
@@ -54,6 +54,7 @@ class ConditionsData(BaseModel):
 class WaveAssociated(BaseModel):
     units: dict
     utcOffset: int
+    runInitializationTimestamp: Optional[int]
 
 
 class Surf(BaseModel):
@@ -197,24 +198,33 @@ class RatingResponse(BaseModel):
     data: RatingData
     spot: str
 
+    _series: Any = PrivateAttr(default=None)
+
 
 class TideResponse(BaseModel):
     associated: TideAssociated
     data: TideData
     spot: str
 
+    _series: Any = PrivateAttr(default=None)
+    _curve: Any = PrivateAttr(default=None)
+
 
 class WaveResponse(BaseModel):
     associated: WaveAssociated
     data: WaveData
     spot: str
 
+    _series: Any = PrivateAttr(default=None)
+
 
 class WindResponse(BaseModel):
     associated: WindAssociated
     data: WindData
     spot: str
 
+    _series: Any = PrivateAttr(default=None)
+
 
 ## OTHER MODELS
 
@@ -226,7 +236,7 @@ class RegionInfo(BaseModel):
     latitude: float
     longitude: float
     timezone: str
-    buoy_id: str
+    buoy_id: Optional[str]
 
 
 class LatestBuoyData(BaseModel):
@@ -264,7 +274,158 @@ class WindDataInterval(BaseModel):
     optimal_score: int
 
 
+class ResampledInterval(BaseModel):
+    interval_local_datetime: datetime
+    period: Optional[str]
+    samples: int
+
+
+class ResampledWindInterval(ResampledInterval):
+    speed_min: Optional[float]
+    speed_max: Optional[float]
+    speed_mean: Optional[float]
+    gust_max: Optional[float]
+    direction: int
+    direction_type: str
+    optimal_score: int
+
+
 class WindData(BaseModel):
     spot_name: str
     report_local_datetime: datetime
-    intervals: List[WindDataInterval]
+    resolution: str = "1h"
+    intervals: Union[List[WindDataInterval], List[ResampledWindInterval]]
+
+
+class WaveDataInterval(BaseModel):
+    interval_local_datetime: datetime
+    surf_min: Optional[float]
+    surf_max: Optional[float]
+    surf_optimal_score: Optional[int]
+    swells: List[Swell]
+
+
+class ResampledWaveInterval(ResampledInterval):
+    surf_min: Optional[float]
+    surf_max: Optional[float]
+    surf_optimal_score: Optional[int]
+    swell_height: Optional[float]
+    swell_period: Optional[int]
+    swell_direction: Optional[float]
+
+
+class WaveForecast(BaseModel):
+    spot_name: str
+    report_local_datetime: datetime
+    resolution: str = "1h"
+    intervals: Union[List[WaveDataInterval], List[ResampledWaveInterval]]
+
+
+class RatingDataInterval(BaseModel):
+    interval_local_datetime: datetime
+    rating_key: Optional[str]
+    rating_value: Optional[float]
+
+
+class ResampledRatingInterval(ResampledInterval):
+    rating_key: Optional[str]
+    rating_min: Optional[float]
+    rating_max: Optional[float]
+    rating_mean: Optional[float]
+
+
+class RatingForecast(BaseModel):
+    spot_name: str
+    report_local_datetime: datetime
+    resolution: str = "1h"
+    intervals: Union[List[RatingDataInterval], List[ResampledRatingInterval]]
+
+
+class SpotBatchResult(BaseModel):
+    conditions: Optional[RegionalReport]
+    wind: Optional[WindData]
+    buoy: Optional[LatestBuoyData]
+    errors: Dict[str, str]
+
+
+class BatchReport(BaseModel):
+    spots: Dict[str, SpotBatchResult]
+
+
+class ReportInterval(BaseModel):
+    timestamp: int
+    utc_offset: int
+    surf_min: Optional[float]
+    surf_max: Optional[float]
+    surf_optimal_score: Optional[int]
+    swells: List[Swell]
+    wind_speed: Optional[float]
+    wind_gust: Optional[float]
+    wind_direction: Optional[int]
+    wind_direction_type: Optional[str]
+    wind_optimal_score: Optional[int]
+    rating_key: Optional[str]
+    rating_value: Optional[float]
+    tide_height: Optional[float]
+    tide_state: Optional[str]
+
+
+class SpotReport(BaseModel):
+    spot_name: str
+    units: Optional[dict]
+    intervals: List[ReportInterval]
+    errors: Dict[str, str]
+
+
+class NearbyPlace(BaseModel):
+    id: str
+    name: Optional[str]
+    latitude: float
+    longitude: float
+    distance_km: float
+    region: Optional[str]
+    status: Optional[str]
+
+
+class SessionComponents(BaseModel):
+    surf: Optional[float]
+    swell: Optional[float]
+    wind: Optional[float]
+    rating: Optional[float]
+    tide: Optional[float]
+
+
+class Session(BaseModel):
+    spot: str
+    spot_name: str
+    timestamp: int
+    local_datetime: datetime
+    score: float
+    components: SessionComponents
+    surf_min: Optional[float]
+    surf_max: Optional[float]
+    wind_speed: Optional[float]
+    rating_value: Optional[float]
+    tide_height: Optional[float]
+
+
+class BestSessions(BaseModel):
+    start: int
+    hours: int
+    sessions: List[Session]
+    errors: Dict[str, Dict[str, str]]
+
+
+class TidePoint(BaseModel):
+    timestamp: int
+    local_datetime: datetime
+    height: Optional[float]
+    rate: Optional[float]
+    state: Optional[str]
+
+
+class TideHeights(BaseModel):
+    spot_name: str
+    units: str
+    location: TideLocation
+    points: List[TidePoint]
@@ -0,0 +1,123 @@
+"""Correctness check and benchmark for the spatial catalog index.
+
+Run with `python -m bench.bench_catalog`. Builds a catalog of synthetic
+spots and buoys spread over the globe, checks k-d tree answers against a
+brute-force haversine scan and times nearest-N queries.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.core.catalog import Catalog
+from app.core.spatial import EARTH_RADIUS_KM
+
+
+def synthetic_catalog(spots: int, buoys: int, seed: int = 0) -> Catalog:
+    rng = np.random.default_rng(seed)
+
+    def coordinates(n):
+        # Uniform over the sphere, not clustered at the poles.
+        lat = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+        lon = rng.uniform(-180, 180, n)
+        return lat.tolist(), lon.tolist()
+
+    lats, lons = coordinates(spots)
+    spot_data = {
+        f"spot_{i}": {
+            "spot_id": f"{i:024x}",
+            "name": f"Spot {i}",
+            "region": None,
+            "latitude": lat,
+            "longitude": lon,
+        }
+        for i, (lat, lon) in enumerate(zip(lats, lons))
+    }
+    lats, lons = coordinates(buoys)
+    buoy_data = {
+        f"buoy_{i}": {
+            "name": f"Buoy {i}",
+            "latitude": lat,
+            "longitude": lon,
+            "status": "ONLINE" if i % 3 else "OFFLINE",
+        }
+        for i, (lat, lon) in enumerate(zip(lats, lons))
+    }
+    return Catalog({}, spot_data, buoy_data)
+
+
+def haversine_km(lat, lon, lats, lons) -> np.ndarray:
+    lat, lon, lats, lons = map(np.radians, (lat, lon, np.asarray(lats), lons))
+    a = (
+        np.sin((lats - lat) / 2) ** 2
+        + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def check(catalog: Catalog, queries: int, n: int, seed: int) -> int:
+    rng = np.random.default_rng(seed + 1)
+    spots = list(catalog.spots.values())
+    lats = np.array([s["latitude"] for s in spots])
+    lons = np.array([s["longitude"] for s in spots])
+    buoys = list(catalog.buoys.items())
+    online = np.array([b["status"] == "ONLINE" for _, b in buoys])
+    buoy_lats = np.array([b["latitude"] for _, b in buoys])
+    buoy_lons = np.array([b["longitude"] for _, b in buoys])
+
+    failures = 0
+    for _ in range(queries):
+        lat, lon = rng.uniform(-90, 90), rng.uniform(-180, 180)
+        expected = np.sort(haversine_km(lat, lon, lats, lons))[:n]
+        got = [s["distance_km"] for s in catalog.nearest_spots(lat, lon, n)]
+        failures += not np.allclose(expected, got, atol=1e-6)
+
+        dist = haversine_km(lat, lon, buoy_lats, buoy_lons)
+        expected = np.sort(dist[online])[:n]
+        got = catalog.nearest_buoys(lat, lon, n, online_only=True)
+        failures += not np.allclose(expected, [b["distance_km"] for b in got])
+        failures += any(b["status"] != "ONLINE" for b in got)
+    return failures
+
+
+def benchmark(catalog: Catalog, queries: int, n: int):
+    rng = np.random.default_rng(2)
+    points = rng.uniform([-90, -180], [90, 180], (queries, 2)).tolist()
+    for name, query in (
+        ("nearest_spots", lambda lat, lon: catalog.nearest_spots(lat, lon, n)),
+        (
+            "nearest_buoys(online)",
+            lambda lat, lon: catalog.nearest_buoys(lat, lon, n, online_only=True),
+        ),
+    ):
+        start = time.perf_counter()
+        for lat, lon in points:
+            query(lat, lon)
+        per_query = (time.perf_counter() - start) / queries * 1e6
+        print(f"{name:<24}{per_query:>10.1f} us/query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--spots", type=int, default=10000)
+    parser.add_argument("--buoys", type=int, default=2000)
+    parser.add_argument("--n", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    catalog = synthetic_catalog(args.spots, args.buoys)
+    catalog.nearest_buoys(0, 0)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"Built {args.spots} spots and {args.buoys} buoys in {build_ms:.0f} ms")
+
+    failures = check(catalog, 200, args.n, 0)
+    if failures:
+        sys.exit(f"{failures} mismatches against brute force")
+    print("Nearest results match brute force")
+    benchmark(catalog, args.queries, args.n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Parse-time benchmark for upstream response decoding.
+
+Run with `python -m bench.bench_decode`. Times the validating and the fast
+decode path for every response type; `tests/test_decoding.py` checks that
+both build the same models.
+"""
+import argparse
+import timeit
+
+from app.core.decoding import decode, loads
+from bench.payloads import DECODE_CASES, raw_response
+
+
+def benchmark(repeat: int):
+    print(f"{'type':<12}{'bytes':>10}{'validate ms':>14}{'fast ms':>10}{'speedup':>9}")
+    for name, (model, _) in DECODE_CASES.items():
+        raw = raw_response(name)
+        times = {}
+        for mode in ("validate", "fast"):
+            runs = timeit.repeat(
+                lambda: decode(loads(raw), model, mode=mode), number=1, repeat=repeat
+            )
+            times[mode] = min(runs) * 1000
+        speedup = times["validate"] / times["fast"]
+        print(
+            f"{name:<12}{len(raw):>10}{times['validate']:>14.3f}"
+            f"{times['fast']:>10.3f}{speedup:>8.1f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    benchmark(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
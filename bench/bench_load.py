@@ -0,0 +1,124 @@
+"""Load test for the /surf endpoints against the fake upstream.
+
+Run with `python -m bench.bench_load`. The service app and the fake
+Surfline API both run in-process over ASGI transports, so the numbers cover
+routing, caching, upstream coalescing, parsing and rendering without any
+network. For each endpoint, `--requests` calls are spread over
+`--concurrency` workers. The test reports throughput, latency percentiles,
+errors and how many upstream calls were made.
+
+`--cold` disables the response and rendered caches so that every request
+goes upstream.
+"""
+import argparse
+import asyncio
+import os
+import time
+from collections import Counter
+
+import httpx
+import numpy as np
+
+from bench import fake_surfline
+
+fake_surfline.configure_env()
+os.environ.setdefault("SURF_DB_PATH", "")
+os.environ.setdefault("MAIN_API_KEY", "bench")
+
+SPOTS = ["pipeline", "laniakea", "haleiwa"]
+
+ENDPOINTS = {
+    "conditions": lambda spot: f"/surf/conditions?spot={spot}&days=1",
+    "buoy": lambda spot: f"/surf/buoy?spot={spot}",
+    "wind": lambda spot: f"/surf/wind?spot={spot}&days=1",
+    "batch": lambda spot: f"/surf/batch?spots={','.join(SPOTS)}&days=1",
+    "report": lambda spot: f"/surf/report?spot={spot}&days=3",
+    "wave": lambda spot: f"/surf/wave?spot={spot}&days=1",
+    "rating": lambda spot: f"/surf/rating?spot={spot}&days=1",
+    "tide": lambda spot: f"/surf/tide?spot={spot}&hours=24",
+    "best-sessions": lambda spot: f"/surf/best-sessions?spots={','.join(SPOTS)}",
+}
+
+
+async def run_endpoint(client, name: str, requests: int, concurrency: int, cold: bool):
+    from app.api.responses import rendered_cache
+    from app.core.cache import response_cache
+
+    latencies, statuses = [], Counter()
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(ENDPOINTS[name](SPOTS[i % len(SPOTS)]))
+
+    async def worker():
+        while not queue.empty():
+            url = queue.get_nowait()
+            if cold:
+                response_cache.clear()
+                rendered_cache.clear()
+            start = time.perf_counter()
+            resp = await client.get(url)
+            latencies.append(time.perf_counter() - start)
+            statuses[resp.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return np.array(latencies) * 1000, statuses, elapsed
+
+
+async def main_async(args):
+    from app.core.cache import response_cache
+    from app.main import app, shutdown, startup
+
+    upstream = fake_surfline.create_app(
+        args.latency, args.jitter, args.error_rate, args.error_status
+    )
+    fake_surfline.install(upstream)
+    await startup()
+
+    headers = {"x-api-key": os.environ["MAIN_API_KEY"]}
+    transport = httpx.ASGITransport(app=app)
+    print(
+        f"{'endpoint':<15}{'reqs':>6}{'errors':>8}{'req/s':>9}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'upstream':>10}"
+    )
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://surf", headers=headers
+        ) as client:
+            for name in args.endpoints:
+                response_cache.clear()
+                before = sum(upstream.state.calls.values())
+                latencies, statuses, elapsed = await run_endpoint(
+                    client, name, args.requests, args.concurrency, args.cold
+                )
+                upstream_calls = sum(upstream.state.calls.values()) - before
+                errors = sum(n for status, n in statuses.items() if status >= 400)
+                p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+                print(
+                    f"{name:<15}{len(latencies):>6}{errors:>8}"
+                    f"{len(latencies) / elapsed:>9.0f}"
+                    f"{p50:>9.2f}{p95:>9.2f}{p99:>9.2f}{upstream_calls:>10}"
+                )
+    finally:
+        await shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--cold", action="store_true")
+    parser.add_argument(
+        "--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS)
+    )
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
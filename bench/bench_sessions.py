@@ -0,0 +1,161 @@
+"""Correctness check and benchmark for the best-session scorer.
+
+Run with `python -m bench.bench_sessions`. Builds hourly forecasts for many
+synthetic spots, checks the vectorized `score_sessions` against a
+window-by-window reference and times both.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+from bench import fake_surfline, payloads
+
+fake_surfline.configure_env()
+os.environ.setdefault("SURF_DB_PATH", "")
+
+from app.core import sessions  # noqa: E402
+from app.core.series import DAY, HOUR, get_series  # noqa: E402
+from app.core.surfline import _parse_response  # noqa: E402
+from app.core.tides import get_tide_curve  # noqa: E402
+from app.models import (  # noqa: E402
+    RatingResponse,
+    TideResponse,
+    WaveResponse,
+    WindResponse,
+)
+
+
+def synthetic_spots(spots: int, days: int) -> dict:
+    builders = {
+        "wave": (WaveResponse, payloads.wave),
+        "wind": (WindResponse, payloads.wind),
+        "rating": (RatingResponse, payloads.rating),
+    }
+    fetched = {}
+    for seed in range(spots):
+        kinds = {}
+        for kind, (model, build) in builders.items():
+            data = build(days, 1, seed=seed)
+            data["spot"] = f"Spot {seed}"
+            kinds[kind] = get_series(_parse_response(data, model)[1])
+        data = payloads.tides(days, seed=seed)
+        data["spot"] = f"Spot {seed}"
+        kinds["tide"] = get_tide_curve(_parse_response(data, TideResponse)[1])
+        fetched[f"spot_{seed}"] = kinds
+    return fetched
+
+
+def reference(fetched: dict, start: int, end: int, tide: str, daylight: bool):
+    """Score of every window, one window at a time in plain Python."""
+    scores = {}
+    for spot, kinds in fetched.items():
+        wave, wind, rating = kinds["wave"], kinds["wind"], kinds["rating"]
+        tide_series = kinds["tide"]
+        rows = {
+            kind: dict(zip(series.timestamp.tolist(), range(len(series))))
+            for kind, series in (("wave", wave), ("wind", wind), ("rating", rating))
+        }
+        window = [t for t in sorted(set().union(*rows.values())) if start <= t < end]
+        heights = tide_series.heights(window).tolist() if window else []
+        present = [h for h in heights if h == h]
+        low, high = (min(present), max(present)) if present else (None, None)
+
+        for t, height in zip(window, heights):
+            i = rows["wave"].get(t)
+            if i is None:
+                continue
+            surf_mean = (wave.surf_min[i] + wave.surf_max[i]) / 2
+            if surf_mean != surf_mean:
+                continue
+            offset = int(wave.utc_offset[i])
+            hour = (t + offset * HOUR) % DAY // HOUR
+            if daylight and not (
+                sessions.DAYLIGHT_HOURS[0] <= hour < sessions.DAYLIGHT_HOURS[1]
+            ):
+                continue
+
+            optimal = wave.surf_optimal_score[i]
+            parts = {
+                "surf": min(max(surf_mean / sessions.SURF_TARGET, 0), 1) / 2
+                + (0 if optimal != optimal else optimal) / 4
+            }
+            power = [
+                h * h * p
+                for h, p in zip(wave.swell_height[i], wave.swell_period[i])
+                if h == h and p == p
+            ]
+            if power:
+                parts["swell"] = min(max(power) / sessions.SWELL_POWER_TARGET, 1)
+            j = rows["wind"].get(t)
+            if j is not None:
+                direction = sessions.DIRECTION_SCORES.get(wind.direction_type[j])
+                speed = wind.speed[j]
+                if direction is not None and speed == speed:
+                    speed_part = min(max(1 - speed / sessions.WIND_LIMIT, 0), 1)
+                    optimal = wind.optimal_score[j] / 2
+                    parts["wind"] = (direction + optimal + speed_part) / 3
+            k = rows["rating"].get(t)
+            if k is not None and rating.rating_value[k] == rating.rating_value[k]:
+                value = rating.rating_value[k] / sessions.RATING_MAX
+                parts["rating"] = min(max(value, 0), 1)
+            if tide != "any" and height == height and high > low:
+                position = (height - low) / (high - low)
+                parts["tide"] = {
+                    "low": 1 - position,
+                    "mid": 1 - abs(position - 0.5) * 2,
+                    "high": position,
+                }[tide]
+
+            total = sum(sessions.WEIGHTS[name] for name in parts)
+            score = sum(sessions.WEIGHTS[name] * v for name, v in parts.items())
+            scores[(spot, t)] = score / total
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--spots", type=int, default=50)
+    parser.add_argument("--days", type=int, default=8)
+    parser.add_argument("--hours", type=int, default=7 * 24)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--tide", default="mid", choices=sessions.TIDE_PREFERENCES)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    fetched = synthetic_spots(args.spots, args.days)
+    start = int(time.time()) // HOUR * HOUR
+    end = start + args.hours * HOUR
+
+    began = time.perf_counter()
+    expected = reference(fetched, start, end, args.tide, daylight=True)
+    reference_ms = (time.perf_counter() - began) * 1000
+
+    runs = []
+    for _ in range(args.repeat):
+        began = time.perf_counter()
+        found = sessions.score_sessions(fetched, start, end, args.top, args.tide)
+        runs.append(time.perf_counter() - began)
+
+    best = sorted(expected.values(), reverse=True)[: args.top]
+    failures = 0
+    if len(found) != len(best) or not all(
+        math.isclose(s["score"], score, abs_tol=1e-3) for s, score in zip(found, best)
+    ):
+        failures += 1
+    for session in found:
+        score = expected.get((session["spot"], session["timestamp"]))
+        if score is None or not math.isclose(session["score"], score, abs_tol=1e-3):
+            failures += 1
+
+    windows = sum(len(kinds["wave"].between(start, end)) for kinds in fetched.values())
+    print(f"{args.spots} spots, {windows} windows, top {args.top}")
+    print(f"reference      {reference_ms:>10.3f} ms")
+    print(f"score_sessions {min(runs) * 1000:>10.3f} ms (best of {args.repeat})")
+    print(f"mismatches     {failures:>10}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Benchmark for local-time conversion.
+
+Run with `python -m bench.bench_timeconv`. Times the vectorized helpers
+against the per-interval conversion they replaced; `tests/test_timeconv.py`
+checks them across DST transitions.
+"""
+import timeit
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from app.core.timeconv import local_datetimes
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def _original(timestamps, zone):
+    # The per-interval conversion helpers.get_local_buoy_datetime used to do.
+    out = []
+    for ts in timestamps.tolist():
+        utc_dt = datetime.fromtimestamp(ts).replace(tzinfo=ZoneInfo("UTC"))
+        out.append(utc_dt.astimezone(ZoneInfo(zone)))
+    return out
+
+
+def benchmark():
+    timestamps = np.arange(1_700_000_000, 1_700_000_000 + 16 * DAY, HOUR)
+    offsets = np.full(len(timestamps), -10)
+    cases = {
+        "original per-interval": lambda: _original(timestamps, "Pacific/Honolulu"),
+        "vectorized zone": lambda: local_datetimes(timestamps, zone="Pacific/Honolulu"),
+        "vectorized utcOffset": lambda: local_datetimes(timestamps, offsets),
+    }
+    print(f"{len(timestamps)} hourly timestamps")
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=10, repeat=5)) / 10
+        print(f"{name:<24}{best * 1000:>8.3f} ms")
+
+
+def main():
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
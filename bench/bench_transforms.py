@@ -0,0 +1,133 @@
+"""Micro-benchmarks for response parsing and the helper transforms.
+
+Run with `python -m bench.bench_transforms`. Times `_parse_response` for
+every upstream type and the `app.core.helpers` builders on synthetic
+payloads, then the full report and batch joins against a warm cache served
+by the fake upstream.
+"""
+import argparse
+import asyncio
+import os
+import time
+import timeit
+
+import numpy as np
+
+from bench import fake_surfline, payloads
+
+fake_surfline.configure_env()
+os.environ.setdefault("SURF_DB_PATH", "")
+
+from app.core import helpers  # noqa: E402
+from app.core.resample import RESOLUTIONS  # noqa: E402
+from app.core.surfline import _parse_response  # noqa: E402
+from app.core.tides import build_tide_heights  # noqa: E402
+from app.models import (  # noqa: E402
+    ConditionsResponse,
+    NearbyResponse,
+    RatingResponse,
+    TideResponse,
+    WaveResponse,
+    WindResponse,
+)
+
+PARSE_CASES = {
+    "conditions": (ConditionsResponse, lambda days: payloads.conditions(days)),
+    "wave": (WaveResponse, lambda days: payloads.wave(days)),
+    "rating": (RatingResponse, lambda days: payloads.rating(days)),
+    "wind": (WindResponse, lambda days: payloads.wind(days)),
+    "tide": (TideResponse, lambda days: payloads.tides(days)),
+    "nearby": (NearbyResponse, lambda days: payloads.nearby(50)),
+}
+
+
+def _report(name: str, runs: list):
+    best = min(runs) * 1000
+    mean = sum(runs) / len(runs) * 1000
+    print(f"{name:<32}{best:>10.3f}{mean:>10.3f}")
+
+
+def _parsed(kind: str, days: int):
+    model, build = PARSE_CASES[kind]
+    data = build(days)
+    data.setdefault("spot", "Pipeline")
+    data.setdefault("region", "oahu_north_shore")
+    return _parse_response(data, model)[1]
+
+
+def bench_parse(days: int, repeat: int):
+    for kind, (model, build) in PARSE_CASES.items():
+        data = build(days)
+        data["spot"] = "Pipeline"
+        data["region"] = "oahu_north_shore"
+        runs = timeit.repeat(
+            lambda: _parse_response(data, model), number=1, repeat=repeat
+        )
+        _report(f"_parse_response[{kind}]", runs)
+
+
+def bench_builders(days: int, repeat: int):
+    reg_info = helpers.get_region_info("pipeline")
+    conditions = _parsed("conditions", days)
+    nearby = _parsed("nearby", days)
+    wind = _parsed("wind", days)
+    tide = _parsed("tide", days)
+    minutes = tide.data.tides[0].timestamp + np.arange(days * 24 * 60) * 60
+
+    def build_wind(reuse_series: bool):
+        if not reuse_series:
+            wind._series = None
+        return helpers.build_wind_data("pipeline", reg_info, wind)
+
+    cases = {
+        "build_region_report": lambda: helpers.build_region_report(
+            reg_info, conditions
+        ),
+        "build_buoy_reading": lambda: helpers.build_buoy_reading(reg_info, nearby),
+        "build_wind_data (cold series)": lambda: build_wind(False),
+        "build_wind_data (warm series)": lambda: build_wind(True),
+    }
+    cases["build_tide_heights (1 min)"] = lambda: build_tide_heights(
+        "pipeline", tide, minutes
+    )
+    for resolution in RESOLUTIONS:
+        cases[f"build_wind_data ({resolution})"] = lambda r=resolution: (
+            helpers.build_wind_data("pipeline", reg_info, wind, r)
+        )
+    for name, fn in cases.items():
+        _report(name, timeit.repeat(fn, number=1, repeat=repeat))
+
+
+async def bench_joins(days: int, repeat: int):
+    fake_surfline.install(fake_surfline.create_app())
+    spots = list(helpers.SPOTS)
+    cases = {
+        "get_full_report": lambda: helpers.get_full_report("pipeline", days),
+        "get_batch_report": lambda: helpers.get_batch_report(
+            spots, ["conditions", "wind", "buoy"], days
+        ),
+    }
+    for name, build in cases.items():
+        await build()
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await build()
+            runs.append(time.perf_counter() - start)
+        _report(f"{name} (warm cache)", runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'case':<32}{'best ms':>10}{'mean ms':>10}")
+    bench_parse(args.days, args.repeat)
+    bench_builders(args.days, args.repeat)
+    asyncio.run(bench_joins(args.days, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
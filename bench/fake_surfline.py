@@ -0,0 +1,153 @@
+"""Local stand-in for the Surfline API used by the benchmarks.
+
+Serves synthetic payloads from `bench.payloads` (or recorded JSON files) on
+the same paths the service calls, with configurable latency and error
+injection. Use it in-process through `transport()`, or run it as a server
+and point SURFLINE_BASE_URL at it:
+
+    python -m bench.fake_surfline --port 8081 --latency 0.08 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import os
+import random
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+import httpx
+import orjson
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from bench import payloads
+
+BASE_URL = "http://surfline.fake"
+
+# Environment variable, default upstream path and payload kind it serves.
+PATHS = {
+    "LOGIN_PATH": ("/trusted/token", "login"),
+    "CONDITIONS_PATH": ("/kbyg/regions/forecasts/conditions", "conditions"),
+    "WAVE_PATH": ("/kbyg/spots/forecasts/wave", "wave"),
+    "RATING_PATH": ("/kbyg/spots/forecasts/rating", "rating"),
+    "WIND_PATH": ("/kbyg/spots/forecasts/wind", "wind"),
+    "TIDES_PATH": ("/kbyg/spots/forecasts/tides", "tides"),
+    "NEARBY_PATH": ("/kbyg/buoys/nearby", "nearby"),
+}
+
+
+def configure_env(base_url: str = BASE_URL):
+    """Point the service at the fake upstream unless already configured.
+
+    Must run before `app.core.surfline` is imported, which reads the paths
+    at import time.
+    """
+    os.environ.setdefault("SURFLINE_BASE_URL", base_url)
+    os.environ.setdefault("ACCESS_TOKEN", "fake-token")
+    # Benchmarks measure the service against the fake, not the disk cache.
+    os.environ.setdefault("SURF_DISK_CACHE_DIR", "")
+    for name, (path, _) in PATHS.items():
+        os.environ.setdefault(name, path)
+
+
+def _payload(kind: str, params) -> dict:
+    days = int(params.get("days", 3))
+    interval_hours = int(params.get("intervalHours", 1))
+    if kind == "login":
+        return {"access_token": "fake-token", "expires_in": 3600}
+    if kind == "conditions":
+        return payloads.conditions(days)
+    if kind == "tides":
+        return payloads.tides(days)
+    if kind == "nearby":
+        return payloads.nearby()
+    return getattr(payloads, kind)(days, interval_hours)
+
+
+def create_app(
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    error_status: int = 503,
+    record_dir: Optional[str] = None,
+    seed: int = 0,
+) -> Starlette:
+    """Build the fake upstream ASGI app.
+
+    Each request sleeps `latency` plus up to `jitter` seconds, and fails
+    with `error_status` and a non-JSON body at `error_rate`. Files named
+    `<kind>.json` in `record_dir` are served instead of synthetic payloads.
+    Request counts per payload kind are kept in `app.state.calls`.
+    """
+    rng = random.Random(seed)
+    routes = {os.environ.get(name, path): kind for name, (path, kind) in PATHS.items()}
+    recorded = {}
+    if record_dir:
+        for path in Path(record_dir).glob("*.json"):
+            recorded[path.stem] = path.read_bytes()
+    rendered = {}
+
+    async def endpoint(request: Request) -> Response:
+        kind = routes.get(request.url.path)
+        if kind is None:
+            return Response(b"not found", status_code=404)
+        app.state.calls[kind] += 1
+
+        delay = latency + (rng.uniform(0, jitter) if jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+        if error_rate and rng.random() < error_rate:
+            app.state.errors[kind] += 1
+            return Response(b"upstream unavailable", status_code=error_status)
+
+        body = recorded.get(kind)
+        if body is None:
+            key = (kind, request.url.query)
+            body = rendered.get(key)
+            if body is None:
+                body = rendered[key] = orjson.dumps(
+                    _payload(kind, request.query_params)
+                )
+        return Response(body, media_type="application/json")
+
+    app = Starlette(routes=[Route("/{path:path}", endpoint, methods=["GET", "POST"])])
+    app.state.calls = Counter()
+    app.state.errors = Counter()
+    return app
+
+
+def transport(app: Starlette) -> httpx.AsyncBaseTransport:
+    return httpx.ASGITransport(app=app)
+
+
+def install(app: Starlette) -> httpx.AsyncClient:
+    """Route the service's shared Surfline client to `app` in-process."""
+    from app.core import client
+
+    client._client = httpx.AsyncClient(transport=transport(app))
+    return client._client
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--record-dir")
+    args = parser.parse_args()
+
+    app = create_app(
+        args.latency, args.jitter, args.error_rate, args.error_status, args.record_dir
+    )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
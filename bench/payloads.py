@@ -0,0 +1,277 @@
+"""Synthetic Surfline payloads shaped like the real upstream responses.
+
+Payloads carry the extra keys, nulls and integer-valued floats the real API
+returns, so they exercise the same decoding paths as production traffic.
+"""
+import random
+import time
+
+import orjson
+
+from app.models import (
+    ConditionsResponse,
+    NearbyResponse,
+    RatingResponse,
+    TideResponse,
+    WaveResponse,
+    WindResponse,
+)
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+UNITS = {
+    "temperature": "F",
+    "tideHeight": "FT",
+    "swellHeight": "FT",
+    "waveHeight": "FT",
+    "windSpeed": "KTS",
+    "pressure": "MB",
+}
+LOCATION = {"lat": 21.664, "lon": -158.053}
+UTC_OFFSET = -10
+BUOY_ID = "44448078-cecd-11eb-94ae-024238d3b313"
+
+
+def _start(now=None) -> int:
+    now = int(now or time.time())
+    return now - now % DAY
+
+
+def _run_init(start: int) -> int:
+    return start - 6 * HOUR
+
+
+def _timestamps(days: int, interval_hours: int, start: int):
+    step = max(int(interval_hours or 1), 1) * HOUR
+    return range(start, start + days * DAY, step)
+
+
+def _swell(rng: random.Random) -> dict:
+    height = rng.choice([0, round(rng.uniform(0.2, 8.0), 2)])
+    return {
+        "height": height,
+        "period": rng.randint(5, 18),
+        "impact": round(rng.uniform(0, 1), 4),
+        "power": round(rng.uniform(0, 500), 2),
+        "direction": rng.choice([rng.randint(0, 359), round(rng.uniform(0, 360), 2)]),
+        "directionMin": round(rng.uniform(0, 360), 2),
+        "optimalScore": rng.choice([0, 1, 2, None]),
+    }
+
+
+def wave(days=3, interval_hours=1, seed=0, now=None) -> dict:
+    rng = random.Random(seed)
+    start = _start(now)
+    intervals = []
+    for ts in _timestamps(days, interval_hours, start):
+        surf_min = rng.randint(0, 6)
+        intervals.append(
+            {
+                "timestamp": ts,
+                "probability": rng.choice([None, "LOW", "HIGH"]),
+                "utcOffset": UTC_OFFSET,
+                "surf": {
+                    "min": surf_min,
+                    "max": surf_min + rng.choice([1, 1.5, 2]),
+                    "optimalScore": rng.choice([0, 1, 2]),
+                    "plus": False,
+                    "humanRelation": "Waist to chest",
+                    "raw": {"min": 1.2, "max": 2.4},
+                },
+                "power": round(rng.uniform(0, 2000), 2),
+                "swells": [_swell(rng) for _ in range(6)],
+            }
+        )
+    return {
+        "associated": {
+            "units": UNITS,
+            "utcOffset": UTC_OFFSET,
+            "location": LOCATION,
+            "forecastLocation": LOCATION,
+            "offshoreLocation": LOCATION,
+            "runInitializationTimestamp": _run_init(start),
+        },
+        "data": {"wave": intervals},
+        "permissions": {"data": [], "violations": []},
+    }
+
+
+def wind(days=3, interval_hours=1, seed=0, now=None) -> dict:
+    rng = random.Random(seed)
+    start = _start(now)
+    intervals = []
+    for ts in _timestamps(days, interval_hours, start):
+        speed = round(rng.uniform(0, 30), 2)
+        intervals.append(
+            {
+                "timestamp": ts,
+                "utcOffset": UTC_OFFSET,
+                "speed": rng.choice([int(speed), speed]),
+                "direction": rng.randint(0, 359),
+                "directionType": rng.choice(["Offshore", "Onshore", "Cross-shore"]),
+                "gust": round(speed * rng.uniform(1.0, 1.6), 2),
+                "optimalScore": rng.choice([0, 1, 2]),
+            }
+        )
+    return {
+        "associated": {
+            "units": UNITS,
+            "utcOffset": UTC_OFFSET,
+            "location": LOCATION,
+            "runInitializationTimestamp": _run_init(start),
+            "windStation": None,
+        },
+        "data": {"wind": intervals},
+        "permissions": {"data": [], "violations": []},
+    }
+
+
+def rating(days=3, interval_hours=1, seed=0, now=None) -> dict:
+    rng = random.Random(seed)
+    start = _start(now)
+    keys = ["VERY_POOR", "POOR", "POOR_TO_FAIR", "FAIR", "FAIR_TO_GOOD", "GOOD"]
+    intervals = []
+    for ts in _timestamps(days, interval_hours, start):
+        value = rng.randint(0, len(keys) - 1)
+        intervals.append(
+            {
+                "timestamp": ts,
+                "utcOffset": UTC_OFFSET,
+                "rating": {"key": keys[value], "value": value},
+            }
+        )
+    return {
+        "associated": {
+            "location": LOCATION,
+            "runInitializationTimestamp": _run_init(start),
+        },
+        "data": {"rating": intervals},
+    }
+
+
+def tides(days=3, seed=0, now=None) -> dict:
+    rng = random.Random(seed)
+    start = _start(now)
+    # Semi-diurnal tide: extremes roughly every 6h12m, hourly points between.
+    period = 12 * HOUR + 25 * 60
+    extremes = []
+    ts = start + rng.randint(0, 6 * HOUR)
+    high = rng.choice([True, False])
+    while ts < start + days * DAY:
+        extremes.append((ts, "HIGH" if high else "LOW", 1.8 if high else 0.1))
+        ts += period // 2
+        high = not high
+
+    points = [
+        {"timestamp": t, "utcOffset": UTC_OFFSET, "type": kind, "height": height}
+        for t, kind, height in extremes
+    ]
+    for t in range(start, start + days * DAY, HOUR):
+        points.append(
+            {"timestamp": t, "utcOffset": UTC_OFFSET, "type": "NORMAL", "height": 0.9}
+        )
+    points.sort(key=lambda p: p["timestamp"])
+    return {
+        "associated": {
+            "units": UNITS,
+            "utcOffset": UTC_OFFSET,
+            "tideLocation": {
+                "name": "Waimea Bay",
+                "min": -0.49,
+                "max": 2.53,
+                "lon": -158.067,
+                "lat": 21.6417,
+                "mean": 0.98,
+            },
+        },
+        "data": {"tides": points},
+    }
+
+
+def conditions(days=3, seed=0, now=None) -> dict:
+    rng = random.Random(seed)
+    start = _start(now)
+
+    def report(ts):
+        low = rng.randint(1, 8)
+        return {
+            "timestamp": ts,
+            "observation": "Clean conditions with light offshore wind.",
+            "rating": rng.choice([None, "FAIR", "GOOD"]),
+            "minHeight": low,
+            "maxHeight": low + 2,
+            "plus": rng.choice([True, False]),
+            "humanRelation": "Head high",
+            "occasionalHeight": None,
+        }
+
+    days_out = []
+    for day in range(days):
+        ts = start + day * DAY
+        days_out.append(
+            {
+                "id": f"day-{day}",
+                "timestamp": ts,
+                "forecastDay": time.strftime("%Y-%m-%d", time.gmtime(ts)),
+                "forecaster": {"name": "Forecaster", "avatar": None},
+                "human": True,
+                "observation": "NW swell fills in through the day.",
+                "am": report(ts + 6 * HOUR),
+                "pm": report(ts + 12 * HOUR),
+                "utcOffset": UTC_OFFSET,
+            }
+        )
+    return {
+        "associated": {"units": UNITS, "utcOffset": UTC_OFFSET},
+        "data": {"conditions": days_out},
+    }
+
+
+def nearby(buoys=10, seed=0, now=None) -> dict:
+    rng = random.Random(seed)
+    start = int(now or time.time())
+    start -= start % 1800
+    data = []
+    for i in range(buoys):
+        data.append(
+            {
+                "id": BUOY_ID if i == 0 else f"buoy-{i}",
+                "name": f"Buoy {i}",
+                "sourceId": str(51200 + i),
+                "latitude": 21.6 + rng.uniform(-2, 2),
+                "longitude": -158.1 + rng.uniform(-2, 2),
+                "status": "ONLINE" if i % 4 else "OFFLINE",
+                "abbrTimezone": "HST",
+                "latestData": {
+                    "timestamp": start,
+                    "height": round(rng.uniform(1, 10), 2),
+                    "period": rng.randint(6, 18),
+                    "direction": rng.randint(0, 359),
+                    "swells": [_swell(rng) for _ in range(3)],
+                },
+            }
+        )
+    return {"associated": {"units": UNITS}, "data": data}
+
+
+# Full size payload of every response type, by name, with the model it decodes to.
+DECODE_CASES = {
+    "conditions": (ConditionsResponse, lambda seed: conditions(16, seed=seed)),
+    "wave": (WaveResponse, lambda seed: wave(16, 1, seed=seed)),
+    "rating": (RatingResponse, lambda seed: rating(16, 1, seed=seed)),
+    "wind": (WindResponse, lambda seed: wind(16, 1, seed=seed)),
+    "tide": (TideResponse, lambda seed: tides(16, seed=seed)),
+    "nearby": (NearbyResponse, lambda seed: nearby(50, seed=seed)),
+}
+
+
+def raw_response(name: str, seed: int = 0) -> bytes:
+    """Encoded `DECODE_CASES[name]` payload with the keys the client adds."""
+    model, build = DECODE_CASES[name]
+    data = build(seed)
+    if model not in (ConditionsResponse, NearbyResponse):
+        data["spot"] = "Pipeline"
+    if model is ConditionsResponse:
+        data["region"] = "oahu_north_shore"
+    return orjson.dumps(data)
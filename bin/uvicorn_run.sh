@@ -2,9 +2,17 @@
 
 set -eo pipefail
 
+WORKERS="${WORKERS:-1}"
+
 if [[ "${ENV}" = "dev" ]]
 then
     uvicorn --timeout-keep-alive 120 --host 0.0.0.0 --port 8080 app.main:app --reload
 else
-    uvicorn --timeout-keep-alive 120 --host 0.0.0.0 --port 8080 app.main:app
+    if [[ "${WORKERS}" -gt 1 ]]
+    then
+        # Workers share upstream responses so scaling out does not multiply
+        # Surfline traffic.
+        export SURF_SHARED_CACHE="${SURF_SHARED_CACHE:-sqlite:///tmp/surf-shared-cache.db}"
+    fi
+    uvicorn --timeout-keep-alive 120 --host 0.0.0.0 --port 8080 --workers "${WORKERS}" app.main:app
 fi
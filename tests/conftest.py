@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+from bench import fake_surfline
+
+# The service reads its upstream paths and storage settings at import time.
+fake_surfline.configure_env()
+os.environ.setdefault("SURF_DB_PATH", "")
+
+
+@pytest.fixture
+def fake():
+    """The in-process fake upstream, with empty service caches around each test."""
+    from app.core.cache import response_cache
+
+    app = fake_surfline.create_app()
+    fake_surfline.install(app)
+    response_cache.clear()
+    yield app
+    response_cache.clear()
@@ -0,0 +1,181 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core import auth, client, surfline
+from app.core.auth import TokenManager
+
+
+class Login:
+    """Login stand-in counting its calls, optionally slow or failing."""
+
+    def __init__(self, result=("new-token", 3600), delay: float = 0):
+        self.result = result
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.result
+
+
+def test_unauthorized_refreshes_once_and_retries_once(monkeypatch):
+    login = Login()
+    manager = TokenManager(login, token="old-token")
+    monkeypatch.setattr(surfline, "token_manager", manager)
+    tokens = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        token = request.url.params[surfline.TOKEN_PARAM]
+        tokens.append(token)
+        if token != "new-token":
+            return httpx.Response(401, text="expired")
+        return httpx.Response(200, json={})
+
+    monkeypatch.setattr(
+        client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    resp = asyncio.run(surfline._get(surfline.WIND_PATH, {"spotId": "x"}))
+    assert resp.status_code == 200
+    assert tokens == ["old-token", "new-token"]
+    assert login.calls == 1
+
+
+def test_unauthorized_after_a_failed_login_is_not_retried(monkeypatch):
+    login = Login(result=None)
+    manager = TokenManager(login, token="old-token")
+    monkeypatch.setattr(surfline, "token_manager", manager)
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(401, text="expired")
+
+    monkeypatch.setattr(
+        client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    resp = asyncio.run(surfline._get(surfline.WIND_PATH, {"spotId": "x"}))
+    assert resp.status_code == 401
+    assert len(calls) == 1
+    assert login.calls == 1
+
+
+def test_concurrent_refreshes_share_one_login():
+    login = Login(delay=0.05)
+    manager = TokenManager(login)
+
+    async def main():
+        return await asyncio.gather(*(manager.refresh() for _ in range(5)))
+
+    assert asyncio.run(main()) == [True] * 5
+    assert login.calls == 1
+    assert manager.token == "new-token"
+    assert manager.refreshes == 1
+
+
+def test_concurrent_first_requests_share_one_login():
+    login = Login(delay=0.05)
+    manager = TokenManager(login)
+
+    async def main():
+        return await asyncio.gather(*(manager.get_token() for _ in range(5)))
+
+    assert asyncio.run(main()) == ["new-token"] * 5
+    assert login.calls == 1
+
+
+def test_unauthorized_for_a_replaced_token_does_not_log_in():
+    login = Login()
+    manager = TokenManager(login, token="current-token")
+    assert asyncio.run(manager.handle_unauthorized("old-token"))
+    assert login.calls == 0
+    assert manager.token == "current-token"
+
+
+def test_unauthorized_for_the_current_token_logs_in():
+    login = Login()
+    manager = TokenManager(login, token="old-token")
+    assert asyncio.run(manager.handle_unauthorized("old-token"))
+    assert login.calls == 1
+    assert manager.token == "new-token"
+
+
+@pytest.mark.parametrize("result", [None, RuntimeError("down")])
+def test_failed_login_backs_off(monkeypatch, result):
+    async def failing():
+        login.calls += 1
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    login = Login()
+    manager = TokenManager(failing, token="old-token")
+
+    async def main():
+        assert not await manager.refresh()
+        assert not await manager.refresh()
+        assert login.calls == 1
+        # Explicit refreshes ignore the backoff.
+        assert not await manager.refresh(force=True)
+        assert login.calls == 2
+        monkeypatch.setattr(auth, "LOGIN_RETRY_AFTER", 0)
+        assert not await manager.refresh()
+        assert login.calls == 3
+
+    asyncio.run(main())
+    assert manager.failures == 3
+    assert manager.token == "old-token"
+
+
+def test_refresh_loop_refreshes_before_expiry(monkeypatch):
+    login = Login()
+    manager = TokenManager(login, token="old-token", refresh_margin=60)
+    manager.expires_at = time.time() + 30
+    delays = []
+    sleep = asyncio.sleep
+
+    async def fast_sleep(delay):
+        delays.append(delay)
+        await sleep(0)
+
+    async def main():
+        monkeypatch.setattr(auth.asyncio, "sleep", fast_sleep)
+        await manager.start()
+        while len(delays) < 2:
+            await sleep(0)
+        await manager.stop()
+
+    asyncio.run(main())
+    assert manager.token == "new-token"
+    assert login.calls == 1
+    # Already inside the margin: the loop waits its minimum of a second.
+    assert delays[0] == 1.0
+    # Then it sleeps until the new token is about to expire.
+    assert delays[1] == pytest.approx(3600 - 60, abs=5)
+
+
+def test_refresh_loop_leaves_a_fresh_token_alone(monkeypatch):
+    login = Login()
+    manager = TokenManager(login, token="old-token", refresh_margin=60)
+    manager.expires_at = time.time() + 3600
+    delays = []
+    sleep = asyncio.sleep
+
+    async def fast_sleep(delay):
+        delays.append(delay)
+        await sleep(0)
+
+    async def main():
+        monkeypatch.setattr(auth.asyncio, "sleep", fast_sleep)
+        await manager.start()
+        while len(delays) < 3:
+            await sleep(0)
+        await manager.stop()
+
+    asyncio.run(main())
+    assert login.calls == 0
+    assert delays[0] == pytest.approx(3600 - 60, abs=5)
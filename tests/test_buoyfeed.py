@@ -0,0 +1,20 @@
+import asyncio
+
+from app.core import surfline
+from app.core.buoyfeed import BuoyFeed
+from app.db.diskcache import DiskCache
+
+
+def test_poll_skips_the_disk_cache(fake, tmp_path, monkeypatch):
+    disk = DiskCache(str(tmp_path), 2**20)
+    monkeypatch.setattr(surfline, "disk_cache", disk)
+
+    async def main():
+        feed = BuoyFeed("buoy", 21.6, -158.1)
+        await feed.poll()
+        await feed.poll()
+        assert fake.state.calls["nearby"] == 2
+        assert disk.writes == 2
+        assert disk.hits == 0
+
+    asyncio.run(main())
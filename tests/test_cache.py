@@ -0,0 +1,129 @@
+import types
+
+import pytest
+
+from app.core import cache
+from app.core.cache import RUN_INTERVAL, RUN_PUBLISH_DELAY, ResponseCache
+
+NOW = 1_700_000_000.0
+
+
+class Clock:
+    def __init__(self, now: float = NOW):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+def test_entries_expire_after_their_ttl(clock):
+    responses = ResponseCache()
+    responses.set("key", "value", 10)
+    clock.now += 9
+    assert responses.get("key") == "value"
+    clock.now += 2
+    assert responses.get("key") is None
+    assert len(responses) == 0
+    assert (responses.hits, responses.misses) == (1, 1)
+
+
+def test_expired_entries_are_usable_during_the_stale_grace(clock):
+    responses = ResponseCache(stale_grace=5)
+    responses.set("key", "value", 10)
+    clock.now += 12
+    entry = responses.lookup("key")
+    assert entry.value == "value" and not entry.is_fresh(clock.now)
+    assert responses.get("key") is None
+    assert responses.stale_hits == 2
+    clock.now += 4
+    assert responses.lookup("key") is None
+    assert responses.misses == 1
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    responses = ResponseCache(max_size=2, track_popularity=True)
+    responses.set("a", 1, 60)
+    responses.set("b", 2, 60)
+    assert responses.get("a") == 1
+    responses.set("c", 3, 60)
+    assert responses.peek("b") is None
+    assert responses.get("a") == 1 and responses.get("c") == 3
+    assert responses.evictions == 1
+    assert len(responses) == 2
+
+
+def test_peek_does_not_count_or_reorder(clock):
+    responses = ResponseCache(max_size=2, track_popularity=True)
+    responses.set("a", 1, 60)
+    responses.set("b", 2, 60)
+    assert responses.peek("a").value == 1
+    responses.set("c", 3, 60)
+    assert responses.peek("a") is None
+    assert responses.hits == responses.misses == 0
+    assert not responses.popularity
+
+
+def test_a_newer_run_invalidates_older_runs_of_its_group(clock):
+    responses = ResponseCache()
+    run = int(NOW) - 10 * RUN_INTERVAL
+    responses.set(("wind", "pipeline", 1), "old", 60, ("wind", "pipeline"), run)
+    responses.set(("wind", "pipeline", 3), "old", 60, ("wind", "pipeline"), run)
+    responses.set(("wave", "pipeline", 1), "other", 60, ("wave", "pipeline"), run)
+    responses.set(("wind", "pipeline", 2), "old", 60, ("wind", "pipeline"), run)
+    assert responses.invalidations == 0
+
+    newer = run + RUN_INTERVAL
+    responses.set(("wind", "pipeline", 1), "new", 60, ("wind", "pipeline"), newer)
+    assert responses.get(("wind", "pipeline", 1)) == "new"
+    assert responses.peek(("wind", "pipeline", 3)) is None
+    assert responses.peek(("wind", "pipeline", 2)) is None
+    assert responses.get(("wave", "pipeline", 1)) == "other"
+    # Including the entry the new response replaces.
+    assert responses.invalidations == 3
+
+
+def test_expiry_stops_at_the_next_expected_run(clock):
+    responses = ResponseCache()
+    run = int(NOW) - RUN_INTERVAL
+    next_run_at = run + RUN_INTERVAL + RUN_PUBLISH_DELAY
+    responses.set("key", "value", 24 * 3600, "group", run)
+    assert responses.peek("key").expires_at == next_run_at
+
+    # Once the next run is overdue, the plain TTL applies.
+    old_run = int(NOW) - 3 * RUN_INTERVAL - RUN_PUBLISH_DELAY
+    responses.set("late", "value", 60, "other", old_run)
+    assert responses.peek("late").expires_at == NOW + 60
+
+
+def test_counters_and_hit_ratio(clock):
+    responses = ResponseCache(stale_grace=60)
+    assert responses.stats()["hit_ratio"] == 0.0
+    responses.set("key", "value", 10)
+    responses.lookup("key")
+    responses.lookup("missing")
+    clock.now += 20
+    responses.lookup("key")
+    responses.lookup("missing")
+    stats = responses.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"]) == (1, 1, 2)
+    assert stats["hit_ratio"] == 0.5
+    assert stats["size"] == 1
+
+
+def test_popularity_decays_and_forgets_dropped_keys(clock):
+    responses = ResponseCache(track_popularity=True)
+    responses.set("hot", 1, 60)
+    for _ in range(4):
+        responses.lookup("hot")
+    responses.lookup("gone")
+    responses.decay_popularity(0.5)
+    assert responses.popularity == {"hot": 2}
+    responses.decay_popularity(0.2)
+    assert not responses.popularity
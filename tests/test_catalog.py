@@ -0,0 +1,42 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.api import dependencies
+from app.core import surfline
+from app.core.catalog import catalog
+
+PIPELINE_ID = "5842041f4e65fad6a7708890"
+
+
+@pytest.mark.parametrize("key", ["pipeline", "Pipeline ", PIPELINE_ID.upper()])
+def test_get_spot_by_slug_id_or_name(key):
+    assert catalog.get_spot(key) == "pipeline"
+
+
+def test_get_spot_unknown():
+    assert catalog.get_spot("nowhere") is None
+
+
+def test_fetchers_resolve_spot_ids(fake):
+    status, data = asyncio.run(surfline.get_wind(PIPELINE_ID, 1))
+    assert data.spot == "Pipeline"
+
+
+def test_endpoints_resolve_spot_names(fake, monkeypatch):
+    from app.main import app
+
+    monkeypatch.setattr(dependencies, "MAIN_API_KEY", "test")
+
+    async def main():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            return await client.get(
+                "/surf/wave",
+                params={"spot": "Pipeline", "days": 1},
+                headers={"x-api-key": "test"},
+            )
+
+    resp = asyncio.run(main())
+    assert resp.status_code == 200
+    assert resp.json()["spot_name"] == "pipeline"
@@ -0,0 +1,33 @@
+import pytest
+
+from app.core.decoding import decode, loads
+from app.models import TideResponse
+from bench.payloads import DECODE_CASES, raw_response
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("name", DECODE_CASES)
+def test_fast_decode_matches_validation(name, seed):
+    model, _ = DECODE_CASES[name]
+    content = raw_response(name, seed)
+    validated = decode(loads(content), model, mode="validate")
+    fast = decode(loads(content), model, mode="fast")
+    assert fast == validated
+    assert fast.json() == validated.json()
+
+
+def test_fast_decode_fills_missing_optional_fields():
+    data = loads(raw_response("tide"))
+    data["associated"].pop("runInitializationTimestamp", None)
+    validated = decode(data, TideResponse, mode="validate")
+    fast = decode(data, TideResponse, mode="fast")
+    assert fast.associated.runInitializationTimestamp is None
+    assert fast == validated
+
+
+def test_fast_decode_coerces_like_validation():
+    data = loads(raw_response("tide"))
+    data["data"]["tides"][0]["height"] = 1
+    fast = decode(data, TideResponse, mode="fast")
+    assert type(fast.data.tides[0].height) is float
+    assert fast == decode(data, TideResponse, mode="validate")
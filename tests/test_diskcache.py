@@ -0,0 +1,91 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core import cache, surfline
+from app.db import diskcache
+from app.db.diskcache import DiskCache
+
+
+@pytest.fixture
+def disk(tmp_path, monkeypatch):
+    disk = DiskCache(str(tmp_path), 2**20)
+    monkeypatch.setattr(surfline, "disk_cache", disk)
+    return disk
+
+
+def test_disk_hit_keeps_remaining_lifetime(fake, disk, monkeypatch):
+    async def main():
+        monkeypatch.setenv("SURFLINE_CACHE_TTL_WIND", "50")
+        await surfline.get_wind("pipeline", 1)
+        assert fake.state.calls["wind"] == 1
+
+        cache.response_cache.clear()
+        monkeypatch.setenv("SURFLINE_CACHE_TTL_WIND", "3600")
+        status, data = await surfline.get_wind("pipeline", 1)
+        assert data is not None
+        assert fake.state.calls["wind"] == 1
+        assert disk.hits == 1
+        (key,) = cache.response_cache._entries
+        assert cache.response_cache.peek(key).expires_at <= time.time() + 50
+
+        # A refresh wants newer data than the stored copy.
+        await cache.refresh(key)
+        assert fake.state.calls["wind"] == 2
+        assert disk.hits == 1
+
+    asyncio.run(main())
+
+
+def test_replay_serves_expired_entries(fake, disk, monkeypatch):
+    async def main():
+        monkeypatch.setenv("SURFLINE_CACHE_TTL_WIND", "0")
+        await surfline.get_wind("pipeline", 1)
+        cache.response_cache.clear()
+        disk.mode = "replay"
+        status, data = await surfline.get_wind("pipeline", 1)
+        assert data is not None
+        assert fake.state.calls["wind"] == 1
+
+    asyncio.run(main())
+
+
+def test_disk_hits_are_not_recorded_again(fake, disk, monkeypatch):
+    recorded = []
+    monkeypatch.setattr(
+        surfline.snapshot_store,
+        "record_forecast",
+        lambda kind, spot, response: recorded.append((kind, spot)),
+    )
+
+    async def main():
+        await surfline.get_wind("pipeline", 1)
+        cache.response_cache.clear()
+        status, data = await surfline.get_wind("pipeline", 1)
+        assert data is not None
+        assert disk.hits == 1
+
+    asyncio.run(main())
+    assert recorded == [("wind", "pipeline")]
+
+
+def test_concurrent_writes_of_a_key_use_their_own_temp_files(disk, monkeypatch):
+    replaced = []
+    replace = os.replace
+
+    def record(src, dst):
+        replaced.append(src)
+        replace(src, dst)
+
+    monkeypatch.setattr(diskcache.os, "replace", record)
+    key = diskcache.cache_key("/wind", {"spotId": "1"})
+    bodies = [bytes([i]) * 100_000 for i in range(8)]
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda body: disk._write(key, body, 60), bodies))
+
+    assert len(set(replaced)) == len(bodies)
+    assert disk._read(key)[1] in bodies
+    assert not list(disk.directory.glob("*.tmp"))
@@ -0,0 +1,95 @@
+import asyncio
+import json
+from datetime import datetime
+
+import httpx
+import pytest
+
+from app.api import dependencies
+from app.core.helpers import stream_wave_data, stream_wind_data
+from bench import fake_surfline
+
+OUT_OF_RANGE = [
+    ("/surf/batch", {"spots": "pipeline", "days": 0}),
+    ("/surf/batch", {"spots": "pipeline", "days": 17}),
+    ("/surf/report", {"spot": "pipeline", "days": 0}),
+    ("/surf/report", {"spot": "pipeline", "days": 17}),
+    ("/surf/report", {"spot": "pipeline", "days": 1, "interval_hours": 0}),
+    ("/surf/report", {"spot": "pipeline", "days": 1, "interval_hours": 25}),
+    ("/surf/wind", {"spot": "pipeline", "days": 0, "resolution": "day"}),
+    ("/surf/wind", {"spot": "pipeline", "days": 17, "resolution": "day"}),
+    ("/surf/conditions", {"spot": "pipeline", "days": 0}),
+    ("/surf/conditions", {"spot": "pipeline", "days": 17}),
+]
+
+IN_RANGE = [
+    ("/surf/batch", {"spots": "pipeline", "days": 16}),
+    ("/surf/report", {"spot": "pipeline", "days": 16, "interval_hours": 24}),
+    ("/surf/wind", {"spot": "pipeline", "days": 16, "resolution": "day"}),
+    ("/surf/conditions", {"spot": "pipeline", "days": 16}),
+]
+
+
+def _get(monkeypatch, path: str, params: dict) -> httpx.Response:
+    from app.main import app
+
+    monkeypatch.setattr(dependencies, "MAIN_API_KEY", "test")
+
+    async def main():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            return await client.get(path, params=params, headers={"x-api-key": "test"})
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("path, params", OUT_OF_RANGE)
+def test_out_of_range_windows_are_rejected(fake, monkeypatch, path, params):
+    assert _get(monkeypatch, path, params).status_code == 422
+    assert not fake.state.calls
+
+
+@pytest.mark.parametrize("path, params", IN_RANGE)
+def test_widest_windows_are_served(fake, monkeypatch, path, params):
+    assert _get(monkeypatch, path, params).status_code == 200
+
+
+@pytest.mark.parametrize("kind", ["wind", "wave"])
+def test_streams_are_ndjson_split_on_local_days(fake, monkeypatch, kind):
+    response = _get(
+        monkeypatch, f"/surf/{kind}/stream", {"spot": "pipeline", "days": 2}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.text.endswith("\n")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 48
+    assert fake.state.calls[kind] == 1
+
+    async def chunks():
+        stream = {"wind": stream_wind_data, "wave": stream_wave_data}[kind]
+        return [chunk async for chunk in await stream("pipeline", 2)]
+
+    days = asyncio.run(chunks())
+    # The forecast starts at midnight UTC, 14:00 the day before at UTC-10.
+    assert [len(day) for day in days] == [10, 24, 14]
+    starts = [day[0]["interval_local_datetime"] for day in days]
+    assert [start.hour for start in starts] == [14, 0, 0]
+    for day in days:
+        assert len({row["interval_local_datetime"].date() for row in day}) == 1
+    sent = [datetime.fromisoformat(row["interval_local_datetime"]) for row in rows]
+    assert sent == [row["interval_local_datetime"] for day in days for row in day]
+
+
+@pytest.mark.parametrize("kind", ["wind", "wave"])
+def test_stream_errors_are_sent_before_the_stream_opens(fake, monkeypatch, kind):
+    response = _get(monkeypatch, f"/surf/{kind}/stream", {"spot": "nowhere", "days": 1})
+    assert response.status_code == 500
+    assert "application/json" in response.headers["content-type"]
+    assert not fake.state.calls
+
+    fake_surfline.install(fake_surfline.create_app(error_rate=1, error_status=404))
+    response = _get(
+        monkeypatch, f"/surf/{kind}/stream", {"spot": "pipeline", "days": 1}
+    )
+    assert response.status_code == 500
+    assert "application/json" in response.headers["content-type"]
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from app.core.metrics import Histogram, Metric
+
+
+def test_metric_is_abstract():
+    with pytest.raises(TypeError):
+        Metric("surf_test", "Test metric.")
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("surf_test_seconds", "Test.", ("path",), (0.1, 1))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(2, "/a")
+    assert histogram.render()[2:] == [
+        'surf_test_seconds_bucket{path="/a",le="0.1"} 1',
+        'surf_test_seconds_bucket{path="/a",le="1"} 2',
+        'surf_test_seconds_bucket{path="/a",le="+Inf"} 3',
+        'surf_test_seconds_sum{path="/a"} 2.55',
+        'surf_test_seconds_count{path="/a"} 3',
+    ]
+
+
+def test_metrics_render_on_the_event_loop_thread(monkeypatch):
+    from app.core import metrics
+    from app.main import app
+
+    threads = []
+    render = metrics.registry.render
+
+    def tracking_render():
+        threads.append(threading.get_ident())
+        return render()
+
+    monkeypatch.setattr(metrics.registry, "render", tracking_render)
+
+    async def main():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            return await client.get("/metrics")
+
+    resp = asyncio.run(main())
+    assert resp.status_code == 200
+    assert threads == [threading.get_ident()]
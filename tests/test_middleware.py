@@ -0,0 +1,30 @@
+import asyncio
+
+import httpx
+
+from app.api import dependencies, middleware
+from app.core.metrics import http_requests
+from app.core.profiling import profiler
+
+
+def test_profiled_requests_keep_their_route_label(fake, tmp_path, monkeypatch):
+    from app.main import app
+
+    monkeypatch.setattr(dependencies, "MAIN_API_KEY", "test")
+    monkeypatch.setattr(middleware, "MAIN_API_KEY", "test")
+    monkeypatch.setattr(profiler, "directory", tmp_path)
+    label = ("/surf/wave", "GET", "200")
+    before = http_requests._values.get(label, 0)
+
+    async def main():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            return await client.get(
+                "/surf/wave",
+                params={"spot": "pipeline", "days": 1, "profile": 1},
+                headers={"x-api-key": "test"},
+            )
+
+    resp = asyncio.run(main())
+    assert resp.status_code == 200
+    assert "X-Surf-Profile" in resp.headers
+    assert http_requests._values.get(label, 0) == before + 1
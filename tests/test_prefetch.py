@@ -0,0 +1,22 @@
+import asyncio
+
+from app.core import cache, surfline
+from app.core.prefetch import PrefetchScheduler
+from bench import fake_surfline
+
+
+def test_failed_refreshes_are_counted_as_failures(fake):
+    prefetcher = PrefetchScheduler(cache.response_cache)
+
+    async def main():
+        prefetcher._semaphore = asyncio.Semaphore(1)
+        await surfline.get_wind("pipeline", 1)
+        (key,) = cache.response_cache._entries
+
+        await prefetcher._refresh(key)
+        fake_surfline.install(fake_surfline.create_app(error_rate=1, error_status=404))
+        await prefetcher._refresh(key)
+
+    asyncio.run(main())
+    assert prefetcher.stats()["refreshes"] == 1
+    assert prefetcher.stats()["failures"] == 1
@@ -0,0 +1,149 @@
+import numpy as np
+import pytest
+
+from app.core.resample import RESOLUTIONS, resample_rating, resample_wave, resample_wind
+from app.core.series import DAY, HOUR, RatingSeries, WaveSeries, WindSeries
+
+# Local midnight at UTC-10.
+MIDNIGHT = 1_700_000_000 // DAY * DAY + 10 * HOUR
+
+
+def hourly(hours: int, start: int = MIDNIGHT) -> np.ndarray:
+    return start + np.arange(hours, dtype=np.int64) * HOUR
+
+
+def wind(timestamps, speed=None, direction=None, gust=None, types=None):
+    n = len(timestamps)
+    return WindSeries(
+        timestamp=np.asarray(timestamps, dtype=np.int64),
+        utc_offset=np.full(n, -10, dtype=np.int64),
+        speed=np.ones(n) if speed is None else np.asarray(speed, dtype=np.float64),
+        direction=np.zeros(n, dtype=np.int64)
+        if direction is None
+        else np.asarray(direction, dtype=np.int64),
+        direction_type=np.array(types or ["Offshore"] * n, dtype=object),
+        gust=np.full(n, np.nan) if gust is None else np.asarray(gust, np.float64),
+        optimal_score=np.arange(n, dtype=np.int64) % 3,
+    )
+
+
+def rating(timestamps, values, keys):
+    n = len(timestamps)
+    return RatingSeries(
+        timestamp=np.asarray(timestamps, dtype=np.int64),
+        utc_offset=np.full(n, -10, dtype=np.int64),
+        rating_key=np.array(keys, dtype=object),
+        rating_value=np.asarray(values, dtype=np.float64),
+    )
+
+
+# 30 hours from 22:00 local.
+START = MIDNIGHT - 2 * HOUR
+
+
+@pytest.mark.parametrize(
+    "resolution, samples, first_hour",
+    [
+        ("3h", [2] + [3] * 9 + [1], 21),
+        ("6h", [2, 6, 6, 6, 6, 4], 18),
+        ("ampm", [2, 12, 12, 4], 12),
+        ("day", [2, 24, 4], 0),
+    ],
+)
+def test_buckets_follow_local_time(resolution, samples, first_hour):
+    rows = resample_wind(wind(hourly(30, START)), resolution)
+    assert [row["samples"] for row in rows] == samples
+    first = rows[0]["interval_local_datetime"]
+    assert first.hour == first_hour
+    assert first.utcoffset().total_seconds() == -10 * HOUR
+    # Every bucket after the first starts on its boundary in local time.
+    for row in rows[1:]:
+        start = row["interval_local_datetime"]
+        seconds = start.hour * HOUR + start.minute * 60
+        assert seconds % RESOLUTIONS[resolution] == 0
+
+
+def test_ampm_periods():
+    rows = resample_wind(wind(hourly(30, START)), "ampm")
+    assert [row["period"] for row in rows] == ["PM", "AM", "PM", "AM"]
+    rows = resample_wind(wind(hourly(30, START)), "day")
+    assert {row["period"] for row in rows} == {None}
+
+
+@pytest.mark.parametrize(
+    "directions, speeds, expected",
+    [
+        ([350, 10], [5, 5], 0),
+        ([350, 20], [5, 5], 5),
+        ([270, 90, 0], [1, 1, 2], 0),
+        ([0, 90], [3, 1], 18),
+        ([340, 350], [1, 1], 345),
+    ],
+)
+def test_direction_is_a_speed_weighted_vector_mean(directions, speeds, expected):
+    series = wind(hourly(len(directions)), speeds, directions)
+    (row,) = resample_wind(series, "day")
+    assert row["direction"] == expected
+
+
+def test_calm_hours_still_give_a_direction():
+    series = wind(hourly(2), [0, np.nan], [350, 10])
+    (row,) = resample_wind(series, "day")
+    assert row["direction"] == 0
+
+
+def test_nan_values_are_skipped_and_empty_buckets_are_none():
+    speed = [np.nan, np.nan, np.nan, 4, np.nan, 8]
+    gust = [np.nan, np.nan, np.nan, 6, 9, np.nan]
+    rows = resample_wind(wind(hourly(6), speed, gust=gust), "3h")
+    assert [row["samples"] for row in rows] == [3, 3]
+    first, second = rows
+    assert first["speed_min"] is first["speed_max"] is first["speed_mean"] is None
+    assert first["gust_max"] is None
+    assert (second["speed_min"], second["speed_max"]) == (4, 8)
+    assert second["speed_mean"] == 6
+    assert second["gust_max"] == 9
+
+
+def test_direction_type_is_the_most_common():
+    types = ["Onshore", "Offshore", "Offshore", "Cross-shore", "Onshore", "Cross-shore"]
+    rows = resample_wind(wind(hourly(6), types=types), "3h")
+    assert [row["direction_type"] for row in rows] == ["Offshore", "Cross-shore"]
+
+
+def test_empty_series_resample_to_nothing():
+    assert resample_wind(WindSeries.empty(), "day") == []
+    assert resample_wave(WaveSeries.empty(), "day") == []
+    assert resample_rating(RatingSeries.empty(), "day") == []
+
+
+def test_rating_is_keyed_by_the_best_value():
+    series = rating(hourly(6), [1, 3, np.nan, np.nan, np.nan, np.nan], list("ABCDEF"))
+    first, second = resample_rating(series, "3h")
+    assert first["rating_key"] == "B"
+    assert (first["rating_min"], first["rating_max"], first["rating_mean"]) == (1, 3, 2)
+    assert second["rating_mean"] is None
+    assert second["samples"] == 3
+
+
+def test_wave_reports_the_biggest_swell_of_each_bucket():
+    n = 6
+    heights = np.array(
+        [[1.0, 2.0], [3.0, np.nan], [0.5, 0.5], [np.nan, np.nan], [1.0, 4.0], [2, 1]]
+    )
+    series = WaveSeries(
+        timestamp=hourly(n),
+        utc_offset=np.full(n, -10, dtype=np.int64),
+        surf_min=np.array([1, 2, 1, np.nan, 3, 2.0]),
+        surf_max=np.array([2, 3, 2, np.nan, 5, 3.0]),
+        surf_optimal_score=np.array([0, 1, 0, np.nan, 2, 1.0]),
+        swell_height=heights,
+        swell_period=np.arange(2 * n, dtype=np.float64).reshape(n, 2),
+        swell_direction=np.full((n, 2), 180.0),
+        swells=np.empty(n, dtype=object),
+    )
+    first, second = resample_wave(series, "3h")
+    assert (first["swell_height"], first["swell_period"]) == (3.0, 2)
+    assert (second["swell_height"], second["swell_period"]) == (4.0, 9)
+    assert (first["surf_min"], first["surf_max"]) == (1, 3)
+    assert second["surf_optimal_score"] == 2
@@ -0,0 +1,91 @@
+import asyncio
+from http import HTTPStatus
+
+import httpx
+import pytest
+
+from app.core.resilience import CircuitBreaker, Upstream, UpstreamError
+
+
+def ok():
+    async def send():
+        return httpx.Response(200)
+
+    return send
+
+
+def half_open(upstream: Upstream, name: str) -> CircuitBreaker:
+    breaker = upstream.breaker(name)
+    breaker.opened_at = 0.0
+    assert breaker.state == "half-open"
+    return breaker
+
+
+def test_trial_cancelled_frees_the_breaker():
+    async def main():
+        upstream = Upstream(attempts=0)
+        breaker = half_open(upstream, "path")
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(10)
+
+        task = asyncio.create_task(upstream.call("path", hang))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert breaker.state == "half-open"
+        resp = await upstream.call("path", ok())
+        assert resp.status_code == 200
+        assert breaker.state == "closed"
+
+    asyncio.run(main())
+
+
+def test_trial_budget_timeout_frees_the_breaker():
+    async def main():
+        upstream = Upstream(attempts=0, budget=1, budget_wait=0.01)
+        breaker = half_open(upstream, "path")
+        upstream._semaphore = asyncio.Semaphore(0)
+        with pytest.raises(UpstreamError) as e:
+            await upstream.call("path", ok())
+        assert e.value.status == HTTPStatus.SERVICE_UNAVAILABLE
+        assert breaker.state == "half-open"
+        assert not breaker._trial_running
+        upstream._semaphore = asyncio.Semaphore(1)
+        assert (await upstream.call("path", ok())).status_code == 200
+        assert breaker.state == "closed"
+
+    asyncio.run(main())
+
+
+def test_budget_exhaustion_does_not_open_the_circuit():
+    async def main():
+        upstream = Upstream(attempts=0, budget=1, budget_wait=0.01)
+        breaker = upstream.breaker("path")
+        upstream._semaphore = asyncio.Semaphore(0)
+        for _ in range(breaker.failure_threshold * 2):
+            with pytest.raises(UpstreamError):
+                await upstream.call("path", ok())
+        assert breaker.state == "closed"
+        assert upstream.rejected == breaker.failure_threshold * 2
+
+    asyncio.run(main())
+
+
+def test_trial_unexpected_error_reopens_the_breaker():
+    async def main():
+        upstream = Upstream(attempts=0)
+        breaker = half_open(upstream, "path")
+
+        async def broken():
+            raise ValueError("bad")
+
+        with pytest.raises(ValueError):
+            await upstream.call("path", broken)
+        assert breaker.state == "open"
+        assert not breaker._trial_running
+
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+import asyncio
+import re
+import time
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+from app.api import compression, dependencies, responses
+from app.api.compression import coded_etag, negotiate
+from app.api.middleware import CompressionMiddleware
+from app.core import cache
+
+WAVE = {"spot": "pipeline", "days": 2}
+
+
+@pytest.fixture
+def get(fake, monkeypatch):
+    """GET a /surf path through the app, with empty rendered responses."""
+    from app.main import app
+
+    monkeypatch.setattr(dependencies, "MAIN_API_KEY", "test")
+    responses.rendered_cache.clear()
+
+    def get(path: str, params: dict, **headers) -> httpx.Response:
+        async def main():
+            async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+                return await client.get(
+                    path, params=params, headers={"x-api-key": "test", **headers}
+                )
+
+        return asyncio.run(main())
+
+    yield get
+    responses.rendered_cache.clear()
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip;q=0", None),
+        ("deflate, gzip;q=0.5", "gzip"),
+        ("*", compression.ENCODINGS[0]),
+        ("*;q=0, gzip", "gzip"),
+        ("GZIP;q=abc", None),
+    ],
+)
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
+
+
+def test_br_is_preferred_when_available():
+    if compression.brotli is None:
+        assert negotiate("gzip, br") == "gzip"
+    else:
+        assert negotiate("gzip, br") == "br"
+        assert negotiate("gzip, br;q=0.5") == "gzip"
+
+
+def test_coded_etag():
+    assert coded_etag('"abc"', "gzip") == '"abc-gzip"'
+    assert coded_etag('W/"abc"', "br") == 'W/"abc-br"'
+
+
+def test_each_coding_has_its_own_etag(get):
+    identity = get("/surf/wave", WAVE, **{"accept-encoding": "identity"})
+    gzipped = get("/surf/wave", WAVE, **{"accept-encoding": "gzip"})
+    assert "content-encoding" not in identity.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert identity.content == gzipped.content
+    etag = identity.headers["etag"]
+    assert re.fullmatch(r'"[0-9a-f]{32}"', etag)
+    assert gzipped.headers["etag"] == coded_etag(etag, "gzip")
+    assert gzipped.headers["vary"] == "Accept-Encoding"
+
+
+@pytest.mark.parametrize("encoding", ["identity", "gzip"])
+def test_if_none_match_gets_a_304_with_the_clients_tag(get, encoding):
+    first = get("/surf/wave", WAVE, **{"accept-encoding": encoding})
+    etag = first.headers["etag"]
+    again = get(
+        "/surf/wave", WAVE, **{"accept-encoding": encoding, "if-none-match": etag}
+    )
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert again.content == b""
+
+    # Also before the body is rendered, and with a weak tag.
+    responses.rendered_cache.clear()
+    weak = get("/surf/wave", WAVE, **{"if-none-match": f"W/{etag}"})
+    assert weak.status_code == 304
+    assert weak.headers["etag"] == etag
+
+
+def test_other_tags_get_the_full_body(get):
+    resp = get("/surf/wave", WAVE, **{"if-none-match": '"other", "other-gzip"'})
+    assert resp.status_code == 200
+    assert resp.json()["spot_name"] == "pipeline"
+
+
+def test_cache_control_lasts_until_the_upstream_response_expires(get, monkeypatch):
+    monkeypatch.setenv("SURFLINE_CACHE_TTL_WAVE", "120")
+    # Keep the expected arrival of the next model run out of the way.
+    monkeypatch.setattr(cache, "RUN_PUBLISH_DELAY", -10 * 24 * 3600)
+    resp = get("/surf/wave", WAVE)
+    max_age = int(
+        re.fullmatch(r"private, max-age=(\d+)", resp.headers["cache-control"])[1]
+    )
+    assert 110 <= max_age <= 120
+
+    responses.rendered_cache.clear()
+    time.sleep(1.1)
+    resp = get("/surf/wave", WAVE)
+    assert int(resp.headers["cache-control"].rsplit("=", 1)[1]) < max_age
+
+
+def test_compression_middleware_codes_etags_and_skips_small_bodies():
+    async def endpoint(request):
+        size = int(request.query_params["size"])
+        return Response(
+            b"x" * size, media_type="application/json", headers={"ETag": '"tag"'}
+        )
+
+    app = CompressionMiddleware(Starlette(routes=[Route("/", endpoint)]))
+
+    async def main():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            headers = {"accept-encoding": "gzip"}
+            large = await client.get("/", params={"size": 4096}, headers=headers)
+            small = await client.get("/", params={"size": 10}, headers=headers)
+            return large, small
+
+    large, small = asyncio.run(main())
+    assert large.headers["content-encoding"] == "gzip"
+    assert large.headers["etag"] == '"tag-gzip"'
+    assert large.content == b"x" * 4096
+    assert "content-encoding" not in small.headers
+    assert small.headers["etag"] == '"tag"'
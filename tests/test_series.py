@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+from app.core.decoding import decode
+from app.core.series import (
+    DAY,
+    HOUR,
+    RatingSeries,
+    WindSeries,
+    align,
+    get_series,
+)
+from app.models import WindResponse
+from bench import payloads
+
+# Local midnight at UTC-10.
+START = 1_700_000_000 // DAY * DAY + 10 * HOUR
+
+
+def wind(timestamps, utc_offset=-10) -> WindSeries:
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    n = len(timestamps)
+    offsets = np.broadcast_to(np.asarray(utc_offset, dtype=np.int64), (n,)).copy()
+    return WindSeries(
+        timestamp=timestamps,
+        utc_offset=offsets,
+        speed=np.arange(n, dtype=np.float64),
+        direction=np.zeros(n, dtype=np.int64),
+        direction_type=np.array(["Offshore"] * n, dtype=object),
+        gust=np.full(n, np.nan),
+        optimal_score=np.zeros(n, dtype=np.int64),
+    )
+
+
+def hourly(hours: int, start: int = START) -> np.ndarray:
+    return start + np.arange(hours) * HOUR
+
+
+def test_where_keeps_the_series_type_and_columns():
+    series = wind(hourly(6))
+    picked = series.where(series.speed % 2 == 0)
+    assert isinstance(picked, WindSeries)
+    assert picked.speed.tolist() == [0, 2, 4]
+    assert picked.timestamp.tolist() == hourly(6)[::2].tolist()
+    assert picked.direction_type.tolist() == ["Offshore"] * 3
+
+
+@pytest.mark.parametrize(
+    "start, end, expected",
+    [
+        (START + HOUR, START + 3 * HOUR, [1, 2]),
+        (START + HOUR + 1, START + 3 * HOUR + 1, [2, 3]),
+        (None, START + 2 * HOUR, [0, 1]),
+        (START + 4 * HOUR, None, [4, 5]),
+        (None, None, [0, 1, 2, 3, 4, 5]),
+        (START + 10 * HOUR, None, []),
+    ],
+)
+def test_between_is_half_open(start, end, expected):
+    assert wind(hourly(6)).between(start, end).speed.tolist() == expected
+
+
+def test_split_days_on_local_midnights():
+    # 30 hours from 22:00 local: 2 hours, a full day, then 4 hours.
+    series = wind(hourly(30, START - 2 * HOUR))
+    days = series.split_days()
+    assert [len(day) for day in days] == [2, 24, 4]
+    assert days[1].timestamp[0] == START
+    assert all(isinstance(day, WindSeries) for day in days)
+    assert np.concatenate([day.speed for day in days]).tolist() == series.speed.tolist()
+
+
+def test_split_days_follows_utc_offset_changes():
+    # The offset moves from -10 to -9 at 12:00 local, so the next local
+    # midnight comes an hour earlier in UTC.
+    timestamps = hourly(48)
+    offsets = np.where(timestamps < START + 12 * HOUR, -10, -9)
+    days = wind(timestamps, offsets).split_days()
+    assert [len(day) for day in days] == [23, 24, 1]
+
+
+def test_split_days_of_an_empty_series():
+    assert WindSeries.empty().split_days() == []
+
+
+def test_align_finds_exact_timestamps_only():
+    series = wind(hourly(4))
+    timeline = np.array([START - HOUR, START, START + HOUR + 1, START + 3 * HOUR])
+    assert align(timeline, series).tolist() == [-1, 0, -1, 3]
+    assert align(np.array([START + 9 * HOUR]), series).tolist() == [-1]
+    assert align(timeline, WindSeries.empty()).tolist() == [-1] * 4
+
+
+def test_pick_maps_missing_rows_and_nan_to_none():
+    series = RatingSeries(
+        timestamp=hourly(3),
+        utc_offset=np.full(3, -10),
+        rating_key=np.array(["GOOD", "FAIR", "POOR"], dtype=object),
+        rating_value=np.array([4.0, np.nan, 1.0]),
+    )
+    index = np.array([0, -1, 1, 2])
+    assert series.pick("rating_value", index) == [4.0, None, None, 1.0]
+    assert series.pick("rating_value", index, int) == [4, None, None, 1]
+    assert RatingSeries.empty().pick("rating_value", index) == [None] * 4
+
+
+def test_local_timestamps_apply_the_utc_offset():
+    series = wind(hourly(2))
+    assert (series.local_timestamps() % DAY).tolist() == [0, HOUR]
+    assert [d.hour for d in series.local_datetimes()] == [0, 1]
+    assert series.local_datetimes()[0].utcoffset().total_seconds() == -10 * HOUR
+
+
+def test_get_series_is_built_once_per_response():
+    data = payloads.wind(2, 1, seed=0)
+    data["spot"] = "Pipeline"
+    response = decode(data, WindResponse)
+    series = get_series(response)
+    assert get_series(response) is series
+    assert len(series) == len(response.data.wind)
+    assert series.speed.tolist() == [i.speed for i in response.data.wind]
+    assert np.all(np.diff(series.timestamp) > 0)
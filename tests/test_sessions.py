@@ -0,0 +1,90 @@
+import math
+import time
+
+import numpy as np
+import pytest
+
+from app.core.series import DAY, HOUR, RatingSeries, WaveSeries, WindSeries
+from app.core.sessions import DAYLIGHT_HOURS, WEIGHTS, score_sessions
+from app.core.tides import TideCurve
+from bench.bench_sessions import reference, synthetic_spots
+
+START = int(time.time()) // HOUR * HOUR
+END = START + 2 * DAY
+
+
+@pytest.fixture(scope="module")
+def spots():
+    return synthetic_spots(4, 3)
+
+
+def assert_matches_reference(fetched, top, tide="mid", daylight=True):
+    expected = reference(fetched, START, END, tide, daylight)
+    found = score_sessions(fetched, START, END, top, tide, daylight)
+    best = sorted(expected.values(), reverse=True)[:top]
+    assert len(found) == len(best)
+    for session, score in zip(found, best):
+        assert math.isclose(session["score"], score, abs_tol=1e-3)
+        key = (session["spot"], session["timestamp"])
+        assert math.isclose(session["score"], expected[key], abs_tol=1e-3)
+    return found
+
+
+@pytest.mark.parametrize("tide", ["low", "mid", "high", "any"])
+@pytest.mark.parametrize("daylight", [True, False])
+def test_matches_the_reference_scorer(spots, tide, daylight):
+    found = assert_matches_reference(spots, 20, tide, daylight)
+    assert len(found) == 20
+    if tide == "any":
+        assert all("tide" not in s["components"] for s in found)
+
+
+def test_missing_components_drop_out_of_the_mean(spots):
+    fetched = {spot: dict(kinds) for spot, kinds in spots.items()}
+    fetched["spot_0"]["wind"] = WindSeries.empty()
+    fetched["spot_1"]["rating"] = RatingSeries.empty()
+    fetched["spot_2"]["tide"] = TideCurve.empty()
+    assert_matches_reference(fetched, 1000)
+
+    only_waves = {"spot_3": {"wave": spots["spot_3"]["wave"]}}
+    found = score_sessions(only_waves, START, END, 5)
+    assert len(found) == 5
+    for session in found:
+        parts = session["components"]
+        assert parts["wind"] is parts["rating"] is parts["tide"] is None
+        mean = (WEIGHTS["surf"] * parts["surf"] + WEIGHTS["swell"] * parts["swell"]) / (
+            WEIGHTS["surf"] + WEIGHTS["swell"]
+        )
+        assert math.isclose(session["score"], mean, abs_tol=2e-3)
+
+
+@pytest.mark.parametrize("utc_offset", [-10, 0, 8])
+def test_daylight_uses_the_local_hour(spots, utc_offset):
+    wave = spots["spot_0"]["wave"]
+    columns = {name: getattr(wave, name) for name in WaveSeries.columns}
+    columns["utc_offset"] = np.full(len(wave), utc_offset, dtype=np.int64)
+    fetched = {"spot_0": {**spots["spot_0"], "wave": WaveSeries(**columns)}}
+
+    found = assert_matches_reference(fetched, 1000)
+    hours = {s["local_datetime"].hour for s in found}
+    assert hours == set(range(*DAYLIGHT_HOURS))
+    offsets = {s["local_datetime"].utcoffset().total_seconds() for s in found}
+    assert offsets == {utc_offset * HOUR}
+
+
+def test_top_larger_than_the_valid_windows(spots):
+    found = assert_matches_reference(spots, 10_000)
+    daylight = DAYLIGHT_HOURS[1] - DAYLIGHT_HOURS[0]
+    assert len(found) == len(spots) * 2 * daylight
+    assert score_sessions(spots, END, END + HOUR, 10) == []
+    assert score_sessions({}, START, END, 10) == []
+
+
+def test_ties_keep_spot_then_time_order(spots):
+    # The same forecast under two names ties every window pairwise.
+    fetched = {"first": spots["spot_0"], "second": spots["spot_0"]}
+    found = score_sessions(fetched, START, END, 1000)
+    keys = [(-s["score"], s["spot"], s["timestamp"]) for s in found]
+    assert keys == sorted(keys)
+    assert [s["spot"] for s in found[:2]] == ["first", "second"]
+    assert found[0]["timestamp"] == found[1]["timestamp"]
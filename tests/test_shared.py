@@ -0,0 +1,197 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core import shared
+from app.core.shared import (
+    MemoryBackend,
+    RedisBackend,
+    Shared,
+    SharedCache,
+    SQLiteBackend,
+)
+
+KEY = ("wind", "pipeline", 1)
+
+
+class FakeRedis:
+    """The part of the redis-py client `RedisBackend` uses, kept in memory."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def _live(self, key):
+        item = self._data.get(key)
+        if item is not None and item[1] is not None and item[1] <= time.time():
+            del self._data[key]
+            item = None
+        return item
+
+    def get(self, key):
+        with self._lock:
+            item = self._live(key)
+            return item[0] if item else None
+
+    def set(self, key, value, nx=False, px=None):
+        with self._lock:
+            if nx and self._live(key) is not None:
+                return None
+            if isinstance(value, str):
+                value = value.encode()
+            expires_at = time.time() + px / 1000 if px else None
+            self._data[key] = (value, expires_at)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            return int(self._data.pop(key, None) is not None)
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def caches(request, tmp_path, monkeypatch):
+    """Two workers' shared caches on one store of the parametrized kind."""
+    monkeypatch.setattr(shared, "LEASE_POLL", 0.01)
+    if request.param == "memory":
+        backend = MemoryBackend()
+        backends = [backend, backend]
+    elif request.param == "sqlite":
+        path = str(tmp_path / "shared.db")
+        backends = [SQLiteBackend(path), SQLiteBackend(path)]
+    else:
+        client = FakeRedis()
+        backends = [RedisBackend(client), RedisBackend(client)]
+    caches = [SharedCache(backend) for backend in backends]
+    yield caches
+    for cache in caches:
+        cache.close()
+
+
+def entry(body: bytes, ttl: float = 60) -> Shared:
+    return Shared(body, time.time() + ttl, None, 1)
+
+
+def test_concurrent_callers_fetch_once(caches):
+    fetches = []
+
+    async def caller(cache: SharedCache):
+        found = await cache.get_or_lease(KEY)
+        if found is not None:
+            return found.body
+        await asyncio.sleep(0.05)
+        fetches.append(cache.owner)
+        await cache.set(KEY, entry(b"fresh"))
+        await cache.release(KEY)
+        return b"fresh"
+
+    async def main():
+        return await asyncio.gather(*(caller(cache) for cache in caches))
+
+    assert asyncio.run(main()) == [b"fresh", b"fresh"]
+    assert len(fetches) == 1
+    assert sum(cache.waits for cache in caches) == 1
+    assert sum(cache.hits for cache in caches) == 1
+
+
+def test_waiter_takes_over_a_released_lease(caches):
+    holder, waiter = caches
+
+    async def main():
+        assert await holder.get_or_lease(KEY) is None
+        waiting = asyncio.create_task(waiter.get_or_lease(KEY))
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        # The holder's fetch failed: it releases without storing anything.
+        await holder.release(KEY)
+        assert await waiting is None
+        # The waiter now holds the lease itself.
+        assert not await asyncio.to_thread(
+            holder.backend.acquire, repr(KEY), holder.owner, 30
+        )
+
+    asyncio.run(main())
+
+
+def test_expired_lease_is_taken_over(caches, monkeypatch):
+    holder, waiter = caches
+    monkeypatch.setattr(shared, "LEASE_TTL", 0.1)
+
+    async def main():
+        assert await holder.get_or_lease(KEY) is None
+        started = time.monotonic()
+        assert await waiter.get_or_lease(KEY) is None
+        assert time.monotonic() - started >= 0.09
+        assert waiter.wait_timeouts == 0
+
+    asyncio.run(main())
+
+
+def test_waiter_gives_up_after_lease_wait(caches, monkeypatch):
+    holder, waiter = caches
+    monkeypatch.setattr(shared, "LEASE_WAIT", 0.05)
+
+    async def main():
+        assert await holder.get_or_lease(KEY) is None
+        assert await waiter.get_or_lease(KEY) is None
+        assert waiter.wait_timeouts == 1
+
+    asyncio.run(main())
+
+
+def test_expired_entries_are_not_served(caches):
+    writer, reader = caches
+
+    async def main():
+        await writer.set(KEY, entry(b"old", ttl=-1))
+        assert await reader.get_or_lease(KEY) is None
+
+    asyncio.run(main())
+
+
+def test_backend_errors_fall_back_to_upstream():
+    class Broken(MemoryBackend):
+        def get(self, key):
+            raise OSError("down")
+
+    cache = SharedCache(Broken())
+    assert asyncio.run(cache.get_or_lease(KEY)) is None
+    assert cache.errors >= 1
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        shared.SharedBackend()
+
+
+def test_newer_than_skips_the_copy_being_refreshed(caches):
+    writer, reader = caches
+    stored = entry(b"old")
+
+    async def main():
+        await writer.set(KEY, stored)
+        assert await reader.get_or_lease(KEY, stored.expires_at) is None
+        await reader.release(KEY)
+        found = await reader.get_or_lease(KEY, stored.expires_at - 1)
+        assert found is not None and found.body == b"old"
+
+    asyncio.run(main())
+
+
+def test_prefetch_tick_goes_upstream_with_the_shared_tier(fake, monkeypatch):
+    from app.core import cache, surfline
+    from app.core.prefetch import PrefetchScheduler
+
+    monkeypatch.setattr(cache.shared_cache, "backend", MemoryBackend())
+    prefetcher = PrefetchScheduler(cache.response_cache, lead=1e9)
+
+    async def main():
+        prefetcher._semaphore = asyncio.Semaphore(1)
+        await surfline.get_wind("pipeline", 1)
+        assert fake.state.calls["wind"] == 1
+        await prefetcher.tick()
+
+    asyncio.run(main())
+    assert fake.state.calls["wind"] == 2
+    assert prefetcher.stats()["refreshes"] == 1
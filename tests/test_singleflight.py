@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+def counting(result="value", fail=False):
+    calls = []
+    release = asyncio.Event()
+
+    async def fn():
+        calls.append(1)
+        await release.wait()
+        if fail:
+            raise RuntimeError("upstream failed")
+        return result
+
+    return fn, calls, release
+
+
+def test_cancelled_first_caller_does_not_cancel_the_call():
+    async def main():
+        flight = SingleFlight()
+        fn, calls, release = counting()
+        first = asyncio.create_task(flight.do("key", fn))
+        second = asyncio.create_task(flight.do("key", fn))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert await second == "value"
+        assert len(calls) == 1
+        assert len(flight) == 0
+
+    asyncio.run(main())
+
+
+def test_call_left_by_every_caller_finishes_and_is_forgotten():
+    async def main():
+        flight = SingleFlight()
+        fn, calls, release = counting()
+        first = asyncio.create_task(flight.do("key", fn))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        # The abandoned call is still in flight and is joined, not repeated.
+        joined = asyncio.create_task(flight.do("key", fn))
+        await asyncio.sleep(0)
+        release.set()
+        assert await joined == "value"
+        assert len(calls) == 1
+        # Once it finished, the next caller starts a new call.
+        release.clear()
+        again = asyncio.create_task(flight.do("key", fn))
+        await asyncio.sleep(0)
+        release.set()
+        assert await again == "value"
+        assert len(calls) == 2
+
+    asyncio.run(main())
+
+
+def test_failure_reaches_every_caller_and_allows_a_retry():
+    async def main():
+        flight = SingleFlight()
+        fn, calls, release = counting(fail=True)
+        callers = [asyncio.create_task(flight.do("key", fn)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert len(calls) == 1
+        assert len(flight) == 0
+
+        retry, retry_calls, release = counting()
+        release.set()
+        assert await flight.do("key", retry) == "value"
+        assert len(retry_calls) == 1
+
+    asyncio.run(main())
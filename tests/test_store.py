@@ -0,0 +1,92 @@
+import asyncio
+import multiprocessing
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from app.core import surfline
+from app.db import store
+from app.db.store import SnapshotStore, connect, migrate
+
+
+@pytest.fixture
+def snapshots(tmp_path, monkeypatch):
+    snapshots = SnapshotStore(str(tmp_path / "surf_log.db"))
+    monkeypatch.setattr(surfline, "snapshot_store", snapshots)
+    return snapshots
+
+
+def _count(path: str, table: str) -> int:
+    with closing(sqlite3.connect(path)) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_failed_migration_leaves_version_and_schema(tmp_path, monkeypatch):
+    migrations = tmp_path / "migrations"
+    migrations.mkdir()
+    (migrations / "0001_a.sql").write_text("CREATE TABLE a (x INTEGER);")
+    (migrations / "0002_b.sql").write_text(
+        "CREATE TABLE b (x INTEGER);\nCREATE TABLE a (x INTEGER);"
+    )
+    monkeypatch.setattr(store, "MIGRATIONS_DIR", migrations)
+
+    with closing(connect(str(tmp_path / "test.db"))) as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            migrate(conn)
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 1
+        tables = {
+            row[0]
+            for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        }
+        assert tables == {"a"}
+
+
+def _migrate(path: str):
+    with closing(connect(path)) as conn:
+        migrate(conn)
+
+
+def test_concurrent_workers_migrate_once(tmp_path):
+    path = str(tmp_path / "surf_log.db")
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_migrate, args=(path,)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert [worker.exitcode for worker in workers] == [0] * 4
+    with closing(connect(path)) as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+    assert version == len(list(store.MIGRATIONS_DIR.glob("*.sql")))
+
+
+def test_forecast_queries_use_kind_index(snapshots):
+    async def main():
+        await snapshots.start()
+        await snapshots.stop()
+
+    asyncio.run(main())
+    with closing(connect(snapshots.path)) as conn:
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT data FROM forecast_intervals "
+            "WHERE spot = ? AND kind = ? AND timestamp >= ? AND timestamp < ?",
+            ("pipeline", "wind", 0, 1),
+        ).fetchall()
+    assert "ix_forecast_intervals_kind_spot_timestamp" in str(plan)
+
+
+def test_stop_writes_the_batch_being_collected(fake, snapshots, monkeypatch):
+    monkeypatch.setattr(store, "FLUSH_INTERVAL", 60)
+
+    async def main():
+        await snapshots.start()
+        status, data = await surfline.get_wind("pipeline", 1)
+        # Let the writer take the snapshot off the queue and wait for more.
+        await asyncio.sleep(0.05)
+        assert snapshots._queue.empty()
+        await snapshots.stop()
+        return len(data.data.wind)
+
+    intervals = asyncio.run(main())
+    assert _count(snapshots.path, "forecast_intervals") == intervals
@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from app.core.helpers import get_full_report
+from app.core.sessions import get_best_sessions
+from app.core.series import HOUR, TideSeries
+from app.core.tides import TideCurve, get_tide_heights
+
+T0 = 1_700_000_000 // HOUR * HOUR
+# Hour offsets from T0: a low at 1h, a high at 7h and a low at 13h.
+POINTS = [
+    (0, "NORMAL", 0.3),
+    (1, "LOW", 0.0),
+    (4, "NORMAL", 0.9),
+    (7, "HIGH", 2.0),
+    (10, "NORMAL", 1.1),
+    (13, "LOW", 0.5),
+    (14, "NORMAL", 0.6),
+]
+
+
+def tides(points=POINTS) -> TideSeries:
+    hours, types, heights = zip(*points)
+    n = len(points)
+    return TideSeries(
+        timestamp=T0 + np.array(hours, dtype=np.int64) * HOUR,
+        utc_offset=np.full(n, -10, dtype=np.int64),
+        type=np.array(types, dtype=object),
+        height=np.array(heights, dtype=np.float64),
+    )
+
+
+def at(*hours) -> np.ndarray:
+    return T0 + (np.array(hours) * HOUR).astype(np.int64)
+
+
+def _next_hours(hours: int) -> list:
+    start = int(time.time()) // HOUR * HOUR
+    return list(range(start, start + hours * HOUR, HOUR))
+
+
+def test_tide_shares_the_best_sessions_forecast(fake):
+    async def main():
+        start = int(time.time()) // HOUR * HOUR
+        await get_best_sessions(["pipeline"], start, 48, 5)
+        heights = await get_tide_heights("pipeline", _next_hours(48))
+        assert heights is not None
+
+    asyncio.run(main())
+    assert fake.state.calls["tides"] == 1
+
+
+def test_tide_uses_a_wider_cached_forecast(fake):
+    async def main():
+        await get_full_report("pipeline", 5)
+        heights = await get_tide_heights("pipeline", _next_hours(24))
+        assert heights is not None
+
+    asyncio.run(main())
+    assert fake.state.calls["tides"] == 1
+
+
+def test_curve_passes_through_the_extremes():
+    curve = TideCurve(tides())
+    heights, rates = curve.query(at(1, 7, 13))
+    np.testing.assert_allclose(heights, [0.0, 2.0, 0.5])
+    np.testing.assert_allclose(rates, 0, atol=1e-12)
+
+
+def test_curve_is_a_half_cosine_between_extremes():
+    curve = TideCurve(tides())
+    heights, rates = curve.query(at(4, 10, 2.5))
+    # Midpoints sit halfway and change fastest: amplitude * pi / duration.
+    np.testing.assert_allclose(heights[:2], [1.0, 1.25])
+    np.testing.assert_allclose(rates[:2], [2 * np.pi / 12, -1.5 * np.pi / 12])
+    # A quarter of the way in, the cosine is still below the straight line.
+    assert 0 < heights[2] < 0.5
+
+
+def test_rising_and_falling_follow_the_rate():
+    curve = TideCurve(tides())
+    times = at(2, 6, 8, 12)
+    _, rates = curve.query(times)
+    assert curve.states(times) == ["rising", "rising", "falling", "falling"]
+    assert list(np.sign(rates)) == [1, 1, -1, -1]
+    # Turns of the tide report the direction the tide goes next.
+    assert curve.states(at(1, 7)) == ["rising", "falling"]
+
+
+def test_mirrored_ends_cover_the_forecast_and_nothing_more():
+    curve = TideCurve(tides())
+    heights, rates = curve.query(at(0, 14))
+    assert np.isfinite(heights).all()
+    assert rates[0] < 0 < rates[1]
+    heights, rates = curve.query(at(-1, 15))
+    assert np.isnan(heights).all() and np.isnan(rates).all()
+    assert curve.states(at(-1, 0, 15)) == [None, "falling", None]
+
+
+def test_heights_are_clamped_to_the_station_range():
+    curve = TideCurve(tides(), low=0.2, high=1.8)
+    np.testing.assert_allclose(curve.heights(at(1, 4, 7)), [0.2, 1.0, 1.8])
+
+
+@pytest.mark.parametrize("extreme", ["NORMAL", "HIGH"])
+def test_fewer_than_two_extremes_fall_back_to_straight_lines(extreme):
+    curve = TideCurve(
+        tides([(0, "NORMAL", 1.0), (2, extreme, 2.0), (6, "NORMAL", 0.0)])
+    )
+    assert not curve.cosine
+    heights, rates = curve.query(at(1, 4))
+    np.testing.assert_allclose(heights, [1.5, 1.0])
+    np.testing.assert_allclose(rates, [0.5, -0.5])
+
+
+def test_empty_curve_is_all_nan():
+    heights, rates = TideCurve.empty().query(at(0, 1))
+    assert np.isnan(heights).all() and np.isnan(rates).all()
+    assert TideCurve.empty().states(at(0)) == [None]
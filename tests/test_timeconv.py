@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pytest
+
+from app.core.timeconv import local_datetimes, to_local
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Zone and a UTC start a few days before a transition (or none for HST).
+BOUNDARIES = [
+    ("America/Los_Angeles", datetime(2023, 3, 9, tzinfo=timezone.utc)),
+    ("America/Los_Angeles", datetime(2023, 11, 2, tzinfo=timezone.utc)),
+    ("Europe/London", datetime(2023, 3, 23, tzinfo=timezone.utc)),
+    ("Europe/London", datetime(2023, 10, 26, tzinfo=timezone.utc)),
+    ("Australia/Sydney", datetime(2023, 3, 30, tzinfo=timezone.utc)),
+    ("Australia/Lord_Howe", datetime(2023, 9, 28, tzinfo=timezone.utc)),
+    ("Pacific/Honolulu", datetime(2023, 3, 9, tzinfo=timezone.utc)),
+]
+
+
+def timestamps(start: datetime, step: int) -> np.ndarray:
+    first = int(start.timestamp())
+    return np.arange(first, first + 16 * DAY, step)
+
+
+def reference(stamps: np.ndarray, zone: str):
+    tz = ZoneInfo(zone)
+    return [datetime.fromtimestamp(ts, tz=tz) for ts in stamps.tolist()]
+
+
+def assert_same(got, expected):
+    assert len(got) == len(expected)
+    for g, e in zip(got, expected):
+        assert g.isoformat() == e.isoformat()
+        assert g.timestamp() == e.timestamp()
+
+
+@pytest.mark.parametrize("step", [HOUR, HOUR // 2])
+@pytest.mark.parametrize("zone, start", BOUNDARIES)
+def test_zone_conversion_across_dst(zone, start, step):
+    stamps = timestamps(start, step)
+    assert_same(local_datetimes(stamps, zone=zone), reference(stamps, zone))
+
+
+@pytest.mark.parametrize("step", [HOUR, HOUR // 2])
+@pytest.mark.parametrize("zone, start", BOUNDARIES)
+def test_offset_conversion_across_dst(zone, start, step):
+    stamps = timestamps(start, step)
+    expected = reference(stamps, zone)
+    offsets = np.array([e.utcoffset().total_seconds() / HOUR for e in expected])
+    assert_same(local_datetimes(stamps, offsets), expected)
+
+
+def test_single_offset_and_utc():
+    stamps = np.array([1_700_000_000, 1_700_003_600])
+    got = local_datetimes(stamps, -10)
+    assert [d.isoformat() for d in got] == [
+        "2023-11-14T12:13:20-10:00",
+        "2023-11-14T13:13:20-10:00",
+    ]
+    assert to_local(1_700_000_000, "UTC").isoformat() == "2023-11-14T22:13:20+00:00"